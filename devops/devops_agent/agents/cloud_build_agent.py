@@ -8,6 +8,7 @@ Responsible for:
 - Version tagging (timestamp/commit hash)
 """
 
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -314,7 +315,6 @@ Only respond with valid JSON, no explanation."""
         try:
             response = await self.gemini.generate(prompt, enable_tools=False)
             
-            import json
             response_text = response.strip()
             if response_text.startswith("```"):
                 response_text = response_text.split("```")[1]
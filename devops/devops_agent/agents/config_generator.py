@@ -9,6 +9,7 @@ Generates missing configuration files using AI reasoning:
 - Port and start command detection
 """
 
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -439,7 +440,6 @@ Only respond with valid JSON, no explanation."""
             response = await self.gemini.generate(prompt, enable_tools=False)
             
             # Parse JSON response
-            import json
             # Extract JSON from response
             response_text = response.strip()
             if response_text.startswith("```"):
@@ -317,37 +317,28 @@ Use proper resource naming, enable appropriate APIs, and configure IAM correctly
             # Step 1: Generate main.tf
             self.log_step("Generating main.tf", 1)
             main_tf = await self._generate_main_tf(project_info, config)
-            main_path = tf_dir / "main.tf"
-            await self.file_manager.write_file(main_path, main_tf)
             result["files"]["main.tf"] = main_tf
             
             # Step 2: Generate variables.tf
             self.log_step("Generating variables.tf", 2)
-            variables_tf = self._generate_variables_tf(project_info, config)
-            variables_path = tf_dir / "variables.tf"
-            await self.file_manager.write_file(variables_path, variables_tf)
-            result["files"]["variables.tf"] = variables_tf
+            result["files"]["variables.tf"] = self._generate_variables_tf(project_info, config)
             
             # Step 3: Generate outputs.tf
             self.log_step("Generating outputs.tf", 3)
-            outputs_tf = self._generate_outputs_tf(project_info, config)
-            outputs_path = tf_dir / "outputs.tf"
-            await self.file_manager.write_file(outputs_path, outputs_tf)
-            result["files"]["outputs.tf"] = outputs_tf
+            result["files"]["outputs.tf"] = self._generate_outputs_tf(project_info, config)
             
             # Step 4: Generate terraform.tfvars.example
             self.log_step("Generating terraform.tfvars.example", 4)
-            tfvars = self._generate_tfvars_example(project_info, config)
-            tfvars_path = tf_dir / "terraform.tfvars.example"
-            await self.file_manager.write_file(tfvars_path, tfvars)
-            result["files"]["terraform.tfvars.example"] = tfvars
+            result["files"]["terraform.tfvars.example"] = self._generate_tfvars_example(project_info, config)
             
             # Step 5: Generate .gitignore for terraform
             self.log_step("Generating Terraform .gitignore", 5)
-            gitignore = self._generate_tf_gitignore()
-            gitignore_path = tf_dir / ".gitignore"
-            await self.file_manager.write_file(gitignore_path, gitignore)
-            result["files"][".gitignore"] = gitignore
+            result["files"][".gitignore"] = self._generate_tf_gitignore()
+            
+            # Write all generated files in one concurrent batch
+            await self.file_manager.write_files({
+                tf_dir / name: content for name, content in result["files"].items()
+            })
             
             # Step 6: Auto-apply if requested
             if auto_apply:
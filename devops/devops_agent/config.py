@@ -74,6 +74,8 @@ class Config:
     max_retries: int = 3
     timeout_seconds: int = 300
     verbose: bool = field(default_factory=lambda: os.getenv("VERBOSE", "false").lower() == "true")
+    # Template authoring: re-check template files on every render, no bytecode cache
+    dev_mode: bool = field(default_factory=lambda: os.getenv("DEV_MODE", "false").lower() == "true")
     
     def __post_init__(self):
         """Ensure directories exist."""
@@ -4,18 +4,64 @@ Error Recovery System - Self-healing build failures using Gemini AI.
 This module provides:
 - Error analysis and classification
 - AI-powered fix generation
-- Retry loop with exponential backoff
+- Retry loop with jittered exponential backoff
 """
 
 import asyncio
+import functools
+import os
+import random
 import re
+import shlex
+import time
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Callable
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Tuple
 
 from ..core.logger import get_logger
+from ..utils.helpers import json_loads
+
+
+# Only the tail of a failing command's output is kept on ErrorInfo; prompts
+# use less than this, and full build logs can run to megabytes per attempt.
+RAW_OUTPUT_TAIL = 4096
+
+_FILE_LINE_RE = re.compile(r'File "([^"]+)", line (\d+)')
+_JSON_OBJECT_RE = re.compile(r'\{[^{}]*\}', re.DOTALL)
+_PKG_EXTRACT_RE = re.compile(
+    r"No module named '([^']+)'"
+    r"|Cannot find module '([^']+)'"
+    r"|Can't resolve '([^']+)'"
+)
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+
+# Recovery objects are often built per command; share one logger per name
+_logger = functools.lru_cache(maxsize=None)(get_logger)
+
+
+def _parse_fix_reply(response: str) -> Any:
+    """
+    Decode a Gemini fix reply.
+    
+    The whole reply is tried first. Otherwise the array or object that
+    starts first in the text is extracted, so an object holding a list
+    is not mistaken for that inner list.
+    """
+    text = response.strip()
+    try:
+        return json_loads(text)
+    except ValueError:
+        pass
+    starts = [i for i in (text.find("["), text.find("{")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    pattern = _JSON_ARRAY_RE if text[start] == "[" else _JSON_OBJECT_RE
+    match = pattern.search(text, start)
+    return json_loads(match.group()) if match else None
 
 
 class ErrorCategory(Enum):
@@ -50,7 +96,7 @@ class ErrorInfo:
     file_path: Optional[str] = None
     line_number: Optional[int] = None
     details: str = ""
-    raw_output: str = ""
+    raw_output: str = ""  # Tail of the output, at most RAW_OUTPUT_TAIL chars
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -90,6 +136,8 @@ class RecoveryAttempt:
     started_at: datetime = field(default_factory=datetime.now)
     finished_at: Optional[datetime] = None
     duration_seconds: float = 0
+    # Monotonic clock reading for duration; immune to wall-clock jumps
+    started_monotonic: float = field(default_factory=time.monotonic, repr=False)
 
 
 @dataclass
@@ -176,20 +224,26 @@ class ErrorAnalyzer:
         ],
     }
     
+    # PATTERNS compiled once, in match order
+    _COMPILED_PATTERNS: Tuple[Tuple[ErrorCategory, re.Pattern], ...] = tuple(
+        (category, re.compile(pattern, re.IGNORECASE | re.MULTILINE))
+        for category, patterns in PATTERNS.items()
+        for pattern in patterns
+    )
+    
     def __init__(self):
-        self.logger = get_logger("ErrorAnalyzer")
+        self.logger = _logger("ErrorAnalyzer")
     
     def analyze(self, error_output: str, command: str = "") -> ErrorInfo:
         """Analyze error output and classify it."""
         # Check each pattern category
-        for category, patterns in self.PATTERNS.items():
-            for pattern in patterns:
-                match = re.search(pattern, error_output, re.IGNORECASE | re.MULTILINE)
-                if match:
-                    return self._create_error_info(category, match, error_output)
+        for category, pattern in self._COMPILED_PATTERNS:
+            match = pattern.search(error_output)
+            if match:
+                return self._create_error_info(category, match, error_output)
         
         # Try to extract file and line info even for unknown errors
-        file_match = re.search(r'File "([^"]+)", line (\d+)', error_output)
+        file_match = _FILE_LINE_RE.search(error_output)
         file_path = file_match.group(1) if file_match else None
         line_number = int(file_match.group(2)) if file_match else None
         
@@ -205,7 +259,7 @@ class ErrorAnalyzer:
             message=message.strip(),
             file_path=file_path,
             line_number=line_number,
-            raw_output=error_output,
+            raw_output=error_output[-RAW_OUTPUT_TAIL:],
         )
     
     def _create_error_info(
@@ -216,7 +270,7 @@ class ErrorAnalyzer:
     ) -> ErrorInfo:
         """Create ErrorInfo from a match."""
         # Try to extract file and line
-        file_match = re.search(r'File "([^"]+)", line (\d+)', full_output)
+        file_match = _FILE_LINE_RE.search(full_output)
         
         return ErrorInfo(
             category=category,
@@ -224,7 +278,7 @@ class ErrorAnalyzer:
             file_path=file_match.group(1) if file_match else None,
             line_number=int(file_match.group(2)) if file_match else None,
             details=match.group(1) if match.lastindex else "",
-            raw_output=full_output,
+            raw_output=full_output[-RAW_OUTPUT_TAIL:],
         )
 
 
@@ -233,15 +287,25 @@ class FixGenerator:
     
     def __init__(self, gemini_client=None):
         self.gemini = gemini_client
-        self.logger = get_logger("FixGenerator")
+        self.logger = _logger("FixGenerator")
+        # Unused Gemini candidates, keyed by (project path, category, message)
+        self._candidates: Dict[Tuple[str, ErrorCategory, str], List[Fix]] = {}
     
     async def generate_fix(
         self, 
         error: ErrorInfo, 
         project_path: Path,
         context: Dict[str, Any] = None,
+        candidates: int = 1,
     ) -> Optional[Fix]:
-        """Generate a fix for the given error."""
+        """
+        Generate a fix for the given error.
+        
+        Rule-based fixes win. Otherwise the best remaining Gemini candidate
+        for this error is returned; when none are left, up to ``candidates``
+        new ones are requested in a single call so later retries of the same
+        error don't need another round trip.
+        """
         # First try rule-based fixes
         rule_fix = self._get_rule_based_fix(error)
         if rule_fix:
@@ -250,56 +314,97 @@ class FixGenerator:
         
         # Fall back to Gemini
         if self.gemini:
-            return await self._get_gemini_fix(error, project_path, context)
+            pending = self._candidates.get(self._candidate_key(error, project_path))
+            if not pending:
+                pending = await self.generate_fixes(error, project_path, context, candidates)
+            if pending:
+                return pending.pop(0)
         
         return None
     
-    def _get_rule_based_fix(self, error: ErrorInfo) -> Optional[Fix]:
-        """Get a fix using predefined rules."""
-        if error.category == ErrorCategory.DEPENDENCY_MISSING:
-            # Extract package name
-            pkg_patterns = [
-                r"No module named '([^']+)'",
-                r"Cannot find module '([^']+)'",
-                r"Can't resolve '([^']+)'",
-            ]
-            
-            for pattern in pkg_patterns:
-                match = re.search(pattern, error.message)
-                if match:
-                    pkg_name = match.group(1).split(".")[0]  # Get root package
-                    return Fix(
-                        action=FixAction.INSTALL_DEPENDENCY,
-                        description=f"Install missing package: {pkg_name}",
-                        target=pkg_name,
-                        confidence=0.9,
-                    )
-        
-        elif error.category == ErrorCategory.PERMISSION:
-            return Fix(
-                action=FixAction.RUN_COMMAND,
-                description="Fix file permissions",
-                content="chmod -R 755 .",
-                confidence=0.7,
-            )
+    async def generate_fixes(
+        self,
+        error: ErrorInfo,
+        project_path: Path,
+        context: Dict[str, Any] = None,
+        n: int = 3,
+    ) -> List[Fix]:
+        """
+        Ask Gemini for up to ``n`` candidate fixes in one call.
         
-        elif error.category == ErrorCategory.NETWORK:
-            return Fix(
-                action=FixAction.SKIP,
-                description="Network error - retry after delay",
-                confidence=0.6,
-            )
+        Candidates are ordered by confidence (highest first) and cached on
+        the generator; generate_fix consumes them across retries.
+        """
+        if not self.gemini:
+            return []
         
-        return None
+        fixes = await self._get_gemini_fixes(error, project_path, context, n)
+        fixes.sort(key=lambda f: f.confidence, reverse=True)
+        self._candidates[self._candidate_key(error, project_path)] = fixes
+        return fixes
+    
+    def clear_candidates(self, project_path: Optional[Path] = None) -> None:
+        """Forget unused Gemini candidates for one project, or for all."""
+        if project_path is None:
+            self._candidates.clear()
+            return
+        root = os.fspath(project_path)
+        for key in [k for k in self._candidates if k[0] == root]:
+            del self._candidates[key]
+    
+    @staticmethod
+    def _candidate_key(error: ErrorInfo, project_path: Path) -> Tuple[str, ErrorCategory, str]:
+        return (os.fspath(project_path), error.category, error.message)
+    
+    def _rule_missing_dependency(self, error: ErrorInfo) -> Optional[Fix]:
+        # Extract package name
+        match = _PKG_EXTRACT_RE.search(error.message)
+        if not match:
+            return None
+        pkg_name = next(g for g in match.groups() if g).split(".", 1)[0]  # Get root package
+        return Fix(
+            action=FixAction.INSTALL_DEPENDENCY,
+            description=f"Install missing package: {pkg_name}",
+            target=pkg_name,
+            confidence=0.9,
+        )
+    
+    def _rule_permission(self, error: ErrorInfo) -> Optional[Fix]:
+        return Fix(
+            action=FixAction.RUN_COMMAND,
+            description="Fix file permissions",
+            content="chmod -R 755 .",
+            confidence=0.7,
+        )
+    
+    def _rule_network(self, error: ErrorInfo) -> Optional[Fix]:
+        return Fix(
+            action=FixAction.SKIP,
+            description="Network error - retry after delay",
+            confidence=0.6,
+        )
+    
+    # Rule handlers by error category
+    _RULE_HANDLERS: Dict[ErrorCategory, Callable[["FixGenerator", ErrorInfo], Optional[Fix]]] = {
+        ErrorCategory.DEPENDENCY_MISSING: _rule_missing_dependency,
+        ErrorCategory.PERMISSION: _rule_permission,
+        ErrorCategory.NETWORK: _rule_network,
+    }
+    
+    def _get_rule_based_fix(self, error: ErrorInfo) -> Optional[Fix]:
+        """Get a fix using predefined rules."""
+        handler = self._RULE_HANDLERS.get(error.category)
+        return handler(self, error) if handler else None
     
-    async def _get_gemini_fix(
+    async def _get_gemini_fixes(
         self, 
         error: ErrorInfo, 
         project_path: Path,
         context: Dict[str, Any] = None,
-    ) -> Optional[Fix]:
-        """Use Gemini to generate a fix."""
-        prompt = f"""You are a DevOps expert. Analyze this build error and suggest a fix.
+        n: int = 1,
+    ) -> List[Fix]:
+        """Use Gemini to generate up to n candidate fixes."""
+        prompt = f"""You are a DevOps expert. Analyze this build error and suggest up to {n} alternative fixes, most likely first.
 
 Error Category: {error.category.value}
 Error Message: {error.message}
@@ -312,37 +417,47 @@ Full Error Output (last 1000 chars):
 Additional Context:
 {context or 'None'}
 
-Respond in JSON format:
-{{
-    "action": "install_dependency|update_dependency|modify_file|create_file|run_command|skip",
-    "description": "Brief description of the fix",
-    "target": "file path or package name",
-    "content": "new content or command to run",
-    "confidence": 0.0-1.0
-}}
+Respond with a JSON array of fix objects:
+[
+    {{
+        "action": "install_dependency|update_dependency|modify_file|create_file|run_command|skip",
+        "description": "Brief description of the fix",
+        "target": "file path or package name",
+        "content": "new content or command to run",
+        "confidence": 0.0-1.0
+    }}
+]
 
 Only respond with the JSON, no other text."""
 
         try:
             response = await self.gemini.generate(prompt, enable_tools=False)
             
-            # Parse JSON response
-            import json
-            # Extract JSON from response
-            json_match = re.search(r'\{[^{}]*\}', response, re.DOTALL)
-            if json_match:
-                fix_data = json.loads(json_match.group())
-                return Fix(
+            # Parse JSON response: an array, or a lone object from
+            # older-style replies
+            data = _parse_fix_reply(response)
+            if isinstance(data, dict):
+                data = [data]
+            if not isinstance(data, list):
+                return []
+        except Exception as e:
+            self.logger.warning(f"Gemini fix generation failed: {e}")
+            return []
+        
+        fixes = []
+        for fix_data in data[:n]:
+            try:
+                fixes.append(Fix(
                     action=FixAction(fix_data["action"]),
                     description=fix_data["description"],
                     target=fix_data.get("target"),
                     content=fix_data.get("content"),
                     confidence=float(fix_data.get("confidence", 0.7)),
-                )
-        except Exception as e:
-            self.logger.warning(f"Gemini fix generation failed: {e}")
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.warning(f"Skipping malformed fix candidate: {e}")
         
-        return None
+        return fixes
 
 
 class RecoveryLoop:
@@ -370,7 +485,7 @@ class RecoveryLoop:
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
-        self.logger = get_logger("RecoveryLoop")
+        self.logger = _logger("RecoveryLoop")
     
     async def run(
         self,
@@ -378,6 +493,7 @@ class RecoveryLoop:
         project_path: Path,
         apply_fix_fn: Callable[[Fix], bool] = None,
         context: Dict[str, Any] = None,
+        cancel_event: Optional[asyncio.Event] = None,
     ) -> RecoveryResult:
         """
         Run a command with automatic error recovery.
@@ -387,10 +503,28 @@ class RecoveryLoop:
             project_path: Path to the project
             apply_fix_fn: Function to apply a fix, returns success bool
             context: Additional context for fix generation
+            cancel_event: Once set, backoff waits end early and the next
+                attempt runs immediately
             
         Returns:
             RecoveryResult with all attempts
         """
+        try:
+            return await self._run(
+                command_fn, project_path, apply_fix_fn, context, cancel_event,
+            )
+        finally:
+            # Leftover candidates only apply to this run's project state
+            self.fix_generator.clear_candidates(project_path)
+    
+    async def _run(
+        self,
+        command_fn: Callable,
+        project_path: Path,
+        apply_fix_fn: Optional[Callable[[Fix], bool]],
+        context: Optional[Dict[str, Any]],
+        cancel_event: Optional[asyncio.Event],
+    ) -> RecoveryResult:
         result = RecoveryResult(
             original_error=ErrorInfo(
                 category=ErrorCategory.UNKNOWN,
@@ -398,6 +532,10 @@ class RecoveryLoop:
             ),
         )
         
+        # Rule-based fixes are deterministic, so an error seen again on a
+        # later attempt reuses the fix chosen the first time
+        rule_fixes: Dict[Tuple[ErrorCategory, str], Fix] = {}
+        
         for attempt in range(1, self.max_retries + 1):
             self.logger.info(f"Attempt {attempt}/{self.max_retries}")
             
@@ -420,7 +558,17 @@ class RecoveryLoop:
             )
             
             # Generate a fix
-            fix = await self.fix_generator.generate_fix(error, project_path, context)
+            key = (error.category, error.message)
+            fix = rule_fixes.get(key)
+            if fix is None:
+                fix = self.fix_generator._get_rule_based_fix(error)
+                if fix:
+                    self.logger.info(f"Using rule-based fix: {fix.description}")
+                    rule_fixes[key] = fix
+                else:
+                    fix = await self.fix_generator.generate_fix(
+                        error, project_path, context, candidates=self.max_retries,
+                    )
             
             # Record the attempt
             attempt_record = RecoveryAttempt(
@@ -443,22 +591,36 @@ class RecoveryLoop:
             else:
                 self.logger.warning("No fix could be generated")
             
-            attempt_record.finished_at = datetime.now()
             attempt_record.duration_seconds = (
-                attempt_record.finished_at - attempt_record.started_at
-            ).total_seconds()
+                time.monotonic() - attempt_record.started_monotonic
+            )
+            attempt_record.finished_at = attempt_record.started_at + timedelta(
+                seconds=attempt_record.duration_seconds
+            )
             result.attempts.append(attempt_record)
             
-            # Wait before retry (exponential backoff)
+            # Wait before retry (exponential backoff, jittered so parallel
+            # loops don't retry in lockstep)
             if attempt < self.max_retries:
                 delay = min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+                delay *= 0.5 + random.random() * 0.5
                 self.logger.info(f"Waiting {delay:.1f}s before retry...")
-                await asyncio.sleep(delay)
+                await self._backoff(delay, cancel_event)
         
         result.total_attempts = self.max_retries
         self.logger.error(f"All {self.max_retries} attempts failed")
         return result
     
+    async def _backoff(self, delay: float, cancel_event: Optional[asyncio.Event]) -> None:
+        """Sleep for delay seconds, or until cancel_event is set."""
+        if cancel_event is None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            await asyncio.wait_for(cancel_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+    
     async def _apply_fix(
         self, 
         fix: Fix, 
@@ -491,7 +653,9 @@ class SelfHealingExecutor:
         self.gemini = gemini_client
         self.base_executor = base_executor or CommandExecutor()
         self.recovery_loop = RecoveryLoop(gemini_client)
-        self.logger = get_logger("SelfHealingExecutor")
+        self.logger = _logger("SelfHealingExecutor")
+        # Directories already ensured by CREATE_FILE fixes
+        self._created_dirs: set = set()
     
     async def run_with_recovery(
         self,
@@ -529,44 +693,80 @@ class SelfHealingExecutor:
     
     async def _apply_fix(self, fix: Fix, project_path: Path) -> bool:
         """Apply a fix to the project."""
-        if fix.action == FixAction.INSTALL_DEPENDENCY:
-            # Detect package manager and install
-            return await self._install_dependency(fix.target, project_path)
-        
-        elif fix.action == FixAction.RUN_COMMAND:
-            if fix.content:
-                result = await self.base_executor.run(fix.content, timeout=60)
-                return result.success
-        
-        elif fix.action == FixAction.MODIFY_FILE:
-            if fix.target and fix.content:
-                file_path = project_path / fix.target
-                file_path.write_text(fix.content)
-                return True
-        
-        elif fix.action == FixAction.CREATE_FILE:
-            if fix.target and fix.content:
-                file_path = project_path / fix.target
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(fix.content)
-                return True
-        
-        elif fix.action == FixAction.SKIP:
-            return True  # Just retry
-        
+        handler = self._FIX_HANDLERS.get(fix.action)
+        if handler is None:
+            return False
+        return await handler(self, fix, project_path)
+    
+    async def _apply_install_dependency(self, fix: Fix, project_path: Path) -> bool:
+        # Detect package manager and install
+        return await self._install_dependency(fix.target, project_path)
+    
+    async def _apply_run_command(self, fix: Fix, project_path: Path) -> bool:
+        if fix.content:
+            result = await self.base_executor.run(fix.content, timeout=60)
+            return result.success
+        return False
+    
+    async def _apply_modify_file(self, fix: Fix, project_path: Path) -> bool:
+        if fix.target and fix.content:
+            self._write_file(os.path.join(project_path, fix.target), fix.content)
+            return True
         return False
     
+    async def _apply_create_file(self, fix: Fix, project_path: Path) -> bool:
+        if fix.target and fix.content:
+            full_path = os.path.join(project_path, fix.target)
+            parent = os.path.dirname(full_path)
+            if parent not in self._created_dirs:
+                os.makedirs(parent, exist_ok=True)
+                self._created_dirs.add(parent)
+            self._write_file(full_path, fix.content)
+            return True
+        return False
+    
+    @staticmethod
+    def _write_file(full_path: str, content: str) -> None:
+        """Write UTF-8 content straight through a file descriptor."""
+        data = memoryview(content.encode("utf-8"))
+        fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+    
+    async def _apply_skip(self, fix: Fix, project_path: Path) -> bool:
+        return True  # Just retry
+    
+    # Fix handlers by action; UPDATE_DEPENDENCY has none and is reported as not applied
+    _FIX_HANDLERS: Dict[FixAction, Callable[..., Awaitable[bool]]] = {
+        FixAction.INSTALL_DEPENDENCY: _apply_install_dependency,
+        FixAction.RUN_COMMAND: _apply_run_command,
+        FixAction.MODIFY_FILE: _apply_modify_file,
+        FixAction.CREATE_FILE: _apply_create_file,
+        FixAction.SKIP: _apply_skip,
+    }
+    
     async def _install_dependency(self, package: str, project_path: Path) -> bool:
         """Install a missing dependency."""
-        # Detect project type
-        if (project_path / "requirements.txt").exists():
-            cmd = f"pip install {package}"
-        elif (project_path / "package.json").exists():
-            cmd = f"npm install {package}"
-        elif (project_path / "go.mod").exists():
-            cmd = f"go get {package}"
-        elif (project_path / "Cargo.toml").exists():
-            cmd = f"cargo add {package}"
+        # Detect project type from a single directory listing
+        try:
+            with os.scandir(project_path) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            return False
+        
+        # Package names come from error output; never hand them to the shell raw
+        quoted = shlex.quote(package)
+        if "requirements.txt" in names:
+            cmd = f"pip install {quoted}"
+        elif "package.json" in names:
+            cmd = f"npm install {quoted}"
+        elif "go.mod" in names:
+            cmd = f"go get {quoted}"
+        elif "Cargo.toml" in names:
+            cmd = f"cargo add {quoted}"
         else:
             return False
         
@@ -5,15 +5,65 @@ SECURITY: Includes command injection prevention.
 """
 
 import asyncio
+import logging
+import os
+import re
 import subprocess
 import shlex
+import shutil
+import time
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Callable, List
+from functools import cached_property
+from typing import Optional, Callable, Dict, List, Tuple, Union
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 from .logger import AgentLogger
 from .security import InputValidator, SecretsMasker
 
 
+# Read size for streamed child output, matching the most asyncio's pipe
+# transport reads per wakeup. Also used as the stream buffer limit, so a
+# reader only pauses the pipe once several chunks are waiting.
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Pipe capacity requested for streamed output. A roomier pipe lets a chatty
+# child keep writing while the loop is busy, and each wakeup drains more.
+PIPE_BUFFER_SIZE = 1024 * 1024
+
+# Only Linux can resize pipes
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", None)
+
+# Anything the shell would interpret beyond plain word splitting and quoting
+_SHELL_META_RE = re.compile(r'[|&;<>(){}$`\\*?\[\]~#\n\r]')
+
+# Builtins have no executable to exec
+_SHELL_BUILTINS = frozenset({
+    ".", "alias", "cd", "eval", "exec", "exit", "export", "set", "source",
+    "ulimit", "umask", "unset",
+})
+
+
+def _output_pipe() -> Tuple[int, int]:
+    """Create a pipe for child output, enlarged to PIPE_BUFFER_SIZE if allowed."""
+    read_fd, write_fd = os.pipe()
+    try:
+        fcntl.fcntl(read_fd, _F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+    except OSError:
+        pass  # Above /proc/sys/fs/pipe-max-size; keep the default
+    return read_fd, write_fd
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write data to fd, continuing after partial writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
 @dataclass
 class CommandResult:
     """Result of a command execution."""
@@ -29,13 +79,25 @@ class CommandResult:
         """Combined stdout and stderr."""
         return f"{self.stdout}\n{self.stderr}".strip()
     
+    @cached_property
+    def _safe_command(self) -> str:
+        return SecretsMasker.mask_secrets(self.command)
+    
+    @cached_property
+    def _safe_stdout(self) -> str:
+        return SecretsMasker.mask_secrets(self.stdout)
+    
+    @cached_property
+    def _safe_stderr(self) -> str:
+        return SecretsMasker.mask_secrets(self.stderr)
+    
     def to_dict(self) -> dict:
         """Convert to dictionary with secrets masked."""
         return {
-            "command": SecretsMasker.mask_secrets(self.command),
+            "command": self._safe_command,
             "return_code": self.return_code,
-            "stdout": SecretsMasker.mask_secrets(self.stdout),
-            "stderr": SecretsMasker.mask_secrets(self.stderr),
+            "stdout": self._safe_stdout,
+            "stderr": self._safe_stderr,
             "success": self.success,
             "duration_seconds": self.duration_seconds,
         }
@@ -55,39 +117,58 @@ class CommandExecutor:
         self.logger = logger or AgentLogger("CommandExecutor")
         self.allowed_commands = allowed_commands
         self.validate_commands = validate_commands
+        # Tool availability is stable for the life of the process
+        # Only tools found and versions read are cached; a miss may be a tool
+        # installed later, or a transient failure, so it is checked again
+        self._tool_cache: Dict[str, bool] = {}
+        self._version_cache: Dict[Tuple[str, str], str] = {}
     
     async def run(
         self,
-        command: str,
+        command: Union[str, List[str]],
         timeout: int = 300,
         env: dict = None,
         capture_output: bool = True,
         stream_output: bool = False,
         on_output: Callable[[str], None] = None,
         skip_validation: bool = False,  # For trusted internal commands only
+        on_output_fd: Optional[int] = None,
     ) -> CommandResult:
         """
-        Execute a shell command asynchronously.
+        Execute a command asynchronously.
         
         Args:
-            command: The command to execute
+            command: The command to execute, either as a shell string or as
+                an argv list that is exec'd directly (no shell parsing, so
+                arguments need no quoting)
             timeout: Maximum execution time in seconds
             env: Additional environment variables
             capture_output: Whether to capture stdout/stderr
-            stream_output: Whether to stream output in real-time
+            stream_output: Whether to stream output in real-time. Only takes
+                effect when on_output is given; otherwise the output is
+                collected in one communicate() call.
             on_output: Callback for real-time output
             skip_validation: Skip security validation (use only for trusted commands)
+            on_output_fd: File descriptor (e.g. an open log file) that gets
+                the raw output bytes as they arrive, without decoding or
+                line splitting. Writes block the event loop, so it should
+                be a file rather than a slow pipe or socket.
             
         Returns:
             CommandResult with execution details
         """
-        import os
-        import time
+        argv = None
+        if not isinstance(command, str):
+            argv = list(command)
+            command = shlex.join(argv)
         
-        # SECURITY: Validate command before execution
+        # SECURITY: Validate command before execution. An argv list never
+        # reaches a shell, so only the executable is checked.
         if self.validate_commands and not skip_validation:
             try:
-                InputValidator.validate_command(command, self.allowed_commands)
+                InputValidator.validate_command(
+                    argv[0] if argv else command, self.allowed_commands
+                )
             except Exception as e:
                 self.logger.error(f"Command validation failed: {e}")
                 return CommandResult(
@@ -99,21 +180,30 @@ class CommandExecutor:
                     duration_seconds=0,
                 )
         
-        # Mask secrets in logs
-        safe_command = SecretsMasker.mask_secrets(command)
-        self.logger.debug(f"Executing: {safe_command}")
+        # Mask secrets in logs (only worth the regex pass if debug is on)
+        safe_command = None
+        if self.logger.is_enabled_for(logging.DEBUG):
+            safe_command = SecretsMasker.mask_secrets(command)
+            self.logger.debug(f"Executing: {safe_command}")
         start_time = time.time()
         
-        # Prepare environment
-        full_env = os.environ.copy()
-        if env:
-            full_env.update(env)
+        # Prepare environment; with no overrides the child simply inherits
+        # os.environ, so there is nothing to copy
+        full_env = {**os.environ, **env} if env else None
+        
+        # Without a callback or fd there is nobody to stream to
+        stream_output = stream_output and (
+            on_output is not None or on_output_fd is not None
+        )
         
         try:
+            target = argv if argv is not None else command
             if stream_output:
-                result = await self._run_streaming(command, timeout, full_env, on_output)
+                result = await self._run_streaming(
+                    target, timeout, full_env, on_output, on_output_fd
+                )
             else:
-                result = await self._run_simple(command, timeout, full_env)
+                result = await self._run_simple(target, timeout, full_env)
             
             duration = time.time() - start_time
             
@@ -125,6 +215,9 @@ class CommandExecutor:
                 success=result.returncode == 0,
                 duration_seconds=duration,
             )
+            if safe_command is not None:
+                # Prime the cached mask so to_dict() doesn't redo it
+                cmd_result.__dict__["_safe_command"] = safe_command
             
             if cmd_result.success:
                 self.logger.debug(f"Command succeeded in {duration:.2f}s")
@@ -146,6 +239,22 @@ class CommandExecutor:
             )
         except Exception as e:
             duration = time.time() - start_time
+            if (
+                isinstance(e, FileNotFoundError)
+                and argv is not None
+                and e.filename == argv[0]
+            ):
+                # Same exit code the shell gives for an unknown command. Other
+                # missing files (e.g. the working directory) are plain failures.
+                self.logger.warning(f"Command not found: {argv[0]}")
+                return CommandResult(
+                    command=command,
+                    return_code=127,
+                    stdout="",
+                    stderr=str(e),
+                    success=False,
+                    duration_seconds=duration,
+                )
             self.logger.error(f"Command execution failed: {e}", exc=e)
             return CommandResult(
                 command=command,
@@ -156,15 +265,92 @@ class CommandExecutor:
                 duration_seconds=duration,
             )
     
-    async def _run_simple(self, command: str, timeout: int, env: dict) -> subprocess.CompletedProcess:
-        """Run command without streaming."""
-        process = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+    @staticmethod
+    def _direct_argv(command: str) -> Optional[List[str]]:
+        """
+        Split a command that needs no shell features into argv.
+        
+        Returns None when the command uses shell syntax (pipes, expansion,
+        redirection, env assignments, builtins) and must go through /bin/sh.
+        """
+        if _SHELL_META_RE.search(command):
+            return None
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return None
+        if not argv or "=" in argv[0] or argv[0] in _SHELL_BUILTINS:
+            return None
+        return argv
+    
+    async def _spawn(
+        self,
+        command: Union[str, List[str]],
+        env: Optional[dict],
+        stdout: int = asyncio.subprocess.PIPE,
+        stderr: int = asyncio.subprocess.PIPE,
+    ) -> asyncio.subprocess.Process:
+        """Start a command, skipping the intermediate shell when possible."""
+        # Keep to plain pipes/cwd/env: a preexec_fn, user/group switch or
+        # umask would stop CPython spawning children with vfork, and every
+        # spawn would then copy this process's page tables.
+        kwargs = dict(
+            stdout=stdout,
+            stderr=stderr,
+            limit=STREAM_CHUNK_SIZE,
             cwd=self.working_dir,
             env=env,
         )
+        if not isinstance(command, str):
+            return await asyncio.create_subprocess_exec(*command, **kwargs)
+        argv = self._direct_argv(command)
+        if argv is not None:
+            try:
+                return await asyncio.create_subprocess_exec(*argv, **kwargs)
+            except FileNotFoundError:
+                pass  # Let the shell report it (exit code 127) as before
+        return await asyncio.create_subprocess_shell(command, **kwargs)
+    
+    async def _spawn_with_pipes(
+        self, command: Union[str, List[str]], env: Optional[dict]
+    ) -> Tuple[asyncio.subprocess.Process, List[asyncio.StreamReader], list]:
+        """
+        Start a command writing to enlarged stdout/stderr pipes.
+        
+        Returns the process, a reader for each pipe, and the pipe transports
+        (for the caller to close).
+        """
+        pipes = [_output_pipe(), _output_pipe()]
+        try:
+            process = await self._spawn(
+                command, env, stdout=pipes[0][1], stderr=pipes[1][1]
+            )
+        except BaseException:
+            for read_fd, _ in pipes:
+                os.close(read_fd)
+            raise
+        finally:
+            # The child has its own copies of the write ends
+            for _, write_fd in pipes:
+                os.close(write_fd)
+        
+        loop = asyncio.get_running_loop()
+        readers, transports = [], []
+        for read_fd, _ in pipes:
+            reader = asyncio.StreamReader(limit=STREAM_CHUNK_SIZE)
+            transport, _ = await loop.connect_read_pipe(
+                lambda reader=reader: asyncio.StreamReaderProtocol(reader),
+                os.fdopen(read_fd, "rb", buffering=0),
+            )
+            readers.append(reader)
+            transports.append(transport)
+        return process, readers, transports
+    
+    async def _run_simple(
+        self, command: Union[str, List[str]], timeout: int, env: Optional[dict]
+    ) -> subprocess.CompletedProcess:
+        """Run command without streaming."""
+        process = await self._spawn(command, env)
         
         stdout, stderr = await asyncio.wait_for(
             process.communicate(),
@@ -180,38 +366,54 @@ class CommandExecutor:
     
     async def _run_streaming(
         self, 
-        command: str, 
+        command: Union[str, List[str]], 
         timeout: int, 
-        env: dict,
+        env: Optional[dict],
         on_output: Callable[[str], None] = None,
+        output_fd: Optional[int] = None,
     ) -> subprocess.CompletedProcess:
         """Run command with real-time output streaming."""
-        process = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=self.working_dir,
-            env=env,
-        )
+        transports = []
+        if _F_SETPIPE_SZ is not None:
+            process, (stdout, stderr), transports = await self._spawn_with_pipes(
+                command, env
+            )
+        else:
+            process = await self._spawn(command, env)
+            stdout, stderr = process.stdout, process.stderr
         
-        stdout_lines = []
-        stderr_lines = []
+        # Keep raw bytes; decoding happens once per stream in run()
+        stdout_chunks: List[bytes] = []
+        stderr_chunks: List[bytes] = []
         
-        async def read_stream(stream, lines: list, is_stderr: bool = False):
+        async def read_stream(stream, chunks: List[bytes]):
+            # Lines are only split out when a callback wants them; a line
+            # straddling two reads is held back until its newline arrives.
+            pending = bytearray()
             while True:
-                line = await stream.readline()
-                if not line:
+                chunk = await stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
                     break
-                decoded = line.decode()
-                lines.append(decoded)
+                chunks.append(chunk)
+                if output_fd is not None:
+                    _write_all(output_fd, chunk)
                 if on_output:
-                    on_output(decoded)
+                    pending += chunk
+                    lines = pending.splitlines(keepends=True)
+                    if not lines[-1].endswith((b"\n", b"\r")):
+                        pending = lines.pop()
+                    else:
+                        pending = bytearray()
+                    for line in lines:
+                        on_output(bytes(line).decode("utf-8", "replace"))
+            if on_output and pending:
+                on_output(bytes(pending).decode("utf-8", "replace"))
         
         try:
             await asyncio.wait_for(
                 asyncio.gather(
-                    read_stream(process.stdout, stdout_lines),
-                    read_stream(process.stderr, stderr_lines, True),
+                    read_stream(stdout, stdout_chunks),
+                    read_stream(stderr, stderr_chunks),
                 ),
                 timeout=timeout
             )
@@ -219,12 +421,15 @@ class CommandExecutor:
         except asyncio.TimeoutError:
             process.kill()
             raise
+        finally:
+            for transport in transports:
+                transport.close()
         
         return subprocess.CompletedProcess(
             args=command,
             returncode=process.returncode,
-            stdout="".join(stdout_lines).encode(),
-            stderr="".join(stderr_lines).encode(),
+            stdout=b"".join(stdout_chunks),
+            stderr=b"".join(stderr_chunks),
         )
     
     def run_sync(self, command: str, timeout: int = 300, env: dict = None) -> CommandResult:
@@ -232,13 +437,20 @@ class CommandExecutor:
         return asyncio.run(self.run(command, timeout, env))
     
     async def check_tool_exists(self, tool: str) -> bool:
-        """Check if a command-line tool is available."""
-        result = await self.run(f"which {tool}", timeout=10)
-        return result.success
+        """Check if a command-line tool is available (cached per executor once found)."""
+        if tool not in self._tool_cache:
+            # PATH lookup without forking `which` through a shell
+            if await asyncio.to_thread(shutil.which, tool) is None:
+                return False
+            self._tool_cache[tool] = True
+        return True
     
     async def get_tool_version(self, tool: str, version_flag: str = "--version") -> Optional[str]:
-        """Get the version of a tool."""
-        result = await self.run(f"{tool} {version_flag}", timeout=10)
-        if result.success:
-            return result.stdout.strip().split("\n")[0]
-        return None
+        """Get the version of a tool (cached per executor once read)."""
+        key = (tool, version_flag)
+        if key not in self._version_cache:
+            result = await self.run(f"{tool} {version_flag}", timeout=10)
+            if not result.success:
+                return None
+            self._version_cache[key] = result.stdout.strip().split("\n")[0]
+        return self._version_cache[key]
@@ -3,61 +3,281 @@ File system management for DevOps Automation Agent.
 Handles file operations, project scanning, and template rendering.
 """
 
+import asyncio
+import fnmatch
+import hashlib
 import os
+import re
 import shutil
+from collections import Counter
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Container, Dict, Iterable, List, Optional, Tuple
 import aiofiles
 import aiofiles.os
-from jinja2 import Environment, FileSystemLoader, BaseLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, BaseLoader, Template
+from ..config import get_config
+from ..utils.helpers import walk_scandir
 from .logger import AgentLogger
 
 
+# Directories never worth descending into when searching a project
+_DEFAULT_EXCLUDE_DIRS = frozenset({
+    ".git", "node_modules", "__pycache__", ".venv", "venv", "target", "dist", "build",
+})
+
+# scan_project also skips editor metadata
+_SCAN_EXCLUDE_DIRS = _DEFAULT_EXCLUDE_DIRS | {".idea", ".vscode"}
+
+# Upper bound on concurrent file operations in the bulk helpers, to stay
+# well clear of file descriptor limits
+MAX_CONCURRENT_FILE_OPS = 64
+
+# Files up to this size are read with a single read() call; larger ones
+# are read in READ_CHUNK_SIZE chunks
+SMALL_FILE_BYTES = 64 * 1024
+READ_CHUNK_SIZE = 128 * 1024
+
+
+# Whole-file operations run as one blocking call in a worker thread. aiofiles
+# would hand open, read/write and close to the pool as separate hops.
+
+def _read_bytes(path: Path) -> bytes:
+    """
+    Read a whole file. Large files come back as a bytearray, filled in place
+    chunk by chunk, so they are held in memory once rather than copied.
+    """
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= SMALL_FILE_BYTES:
+            return f.read()
+        buf = bytearray(size)
+        view = memoryview(buf)
+        filled = 0
+        while filled < size:
+            n = f.readinto(view[filled:filled + READ_CHUNK_SIZE])
+            if not n:
+                break
+            filled += n
+        view.release()
+        if filled < size:
+            # The file shrank while being read
+            del buf[filled:]
+        else:
+            # Or grew
+            buf.extend(f.read())
+    return buf
+
+
+def _read_text(path: Path) -> str:
+    text = _read_bytes(path).decode("utf-8", errors="replace")
+    # Universal newlines, as text-mode open() would give
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_many(paths: List[Path]) -> List[str]:
+    return [_read_text(path) for path in paths]
+
+
+def _write_text(path: Path, content: str, create_dirs: bool) -> None:
+    if create_dirs:
+        os.makedirs(path.parent, exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _name_matcher(pattern: str) -> Optional[Callable[[str], Any]]:
+    """
+    Compile a single-component glob into a predicate on bare file names.
+    
+    For such patterns this gives the same result as Path.match, without
+    building a Path per file. Multi-component patterns return None, and the
+    caller falls back to Path.match.
+    """
+    if "/" in pattern or os.sep in pattern:
+        return None
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    return re.compile(fnmatch.translate(pattern), flags).match
+
+
+def _name_suffix(name: str) -> str:
+    """Same result as PurePath(name).suffix for a bare file name."""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i:]
+    return ""
+
+
+def _scan_project_sync(scan_path: Path) -> Dict[str, Any]:
+    """Blocking body of FileManager.scan_project."""
+    scan_str = os.fspath(scan_path)
+    # Walked paths are built by joining names onto scan_str, so relative
+    # paths are plain suffixes of them
+    prefix_len = len(os.path.join(scan_str, ""))
+    sep = os.sep
+    
+    # Accumulate as parallel arrays: each file is a name plus an index
+    # into the table of relative directory paths
+    dir_table: List[str] = []
+    file_names: List[str] = []
+    file_dirs: List[int] = []
+    directories: List[str] = []
+    
+    for root, dirs, files in walk_scandir(scan_str, _SCAN_EXCLUDE_DIRS):
+        if root == scan_str:
+            rel_root = ""
+            directories.extend(dirs)
+        else:
+            rel_root = root[prefix_len:]
+            directories.extend([rel_root + sep + d for d in dirs])
+        dir_id = len(dir_table)
+        dir_table.append(rel_root)
+        
+        file_names.extend(files)
+        file_dirs.extend([dir_id] * len(files))
+    
+    # Count extensions in one pass over all names once the walk is done
+    extensions = Counter(filter(None, [_name_suffix(f).lower() for f in file_names]))
+    
+    return {
+        "root": str(scan_path),
+        "files": [
+            dir_table[d] + sep + name if d else name
+            for d, name in zip(file_dirs, file_names)
+        ],
+        "directories": directories,
+        "file_count": len(file_names),
+        "extensions": dict(extensions),
+    }
+
+
+def _walk_collect(search_path: Path, pattern: str, exclude_dirs: Container[str]) -> List[Path]:
+    """Blocking body of a recursive FileManager.find_files."""
+    matches_name = _name_matcher(pattern)
+    files = []
+    for root, _, filenames in walk_scandir(os.fspath(search_path), exclude_dirs):
+        if matches_name:
+            files.extend(Path(root, f) for f in filenames if matches_name(f))
+        else:
+            root_path = Path(root)
+            for filename in filenames:
+                file_path = root_path / filename
+                if file_path.match(pattern):
+                    files.append(file_path)
+    return files
+
+
 class FileManager:
     """Manages file system operations for the agent."""
     
-    def __init__(self, base_dir: Path = None, logger: AgentLogger = None):
+    def __init__(
+        self,
+        base_dir: Path = None,
+        logger: AgentLogger = None,
+        dev_mode: bool = None,
+    ):
         self.base_dir = base_dir or Path.cwd()
         self.logger = logger or AgentLogger("FileManager")
+        config = get_config()
+        self.dev_mode = config.dev_mode if dev_mode is None else dev_mode
         
-        # Setup Jinja2 for template rendering
+        # Setup Jinja2 for template rendering. Outside dev mode templates are
+        # not re-checked on disk and compiled code persists across runs, in
+        # Jinja's per-user temp directory: it refuses one another user owns or
+        # can write to, which matters because cached bytecode gets executed.
+        bytecode_cache = None if self.dev_mode else FileSystemBytecodeCache()
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(self.base_dir)),
             trim_blocks=True,
             lstrip_blocks=True,
+            cache_size=400,
+            auto_reload=self.dev_mode,
+            bytecode_cache=bytecode_cache,
         )
+        # Compiled templates: by source string, and by (file path, mtime)
+        self._template_cache: Dict[str, Template] = {}
+        self._file_template_cache: Dict[Tuple[str, int], Template] = {}
     
     async def read_file(self, path: Path) -> str:
         """Read file contents asynchronously."""
         full_path = self._resolve_path(path)
         try:
-            async with aiofiles.open(full_path, 'r') as f:
-                return await f.read()
+            return await asyncio.to_thread(_read_text, full_path)
         except Exception as e:
             self.logger.error(f"Failed to read {full_path}: {e}")
             raise
     
+    async def read_bytes(self, path: Path) -> bytes:
+        """
+        Read raw file contents, for callers that hash or upload without decoding.
+        
+        Files over SMALL_FILE_BYTES are returned as a bytearray.
+        """
+        full_path = self._resolve_path(path)
+        try:
+            return await asyncio.to_thread(_read_bytes, full_path)
+        except Exception as e:
+            self.logger.error(f"Failed to read {full_path}: {e}")
+            raise
+    
+    async def read_lines(self, path: Path) -> AsyncIterator[str]:
+        """Yield file lines one at a time, so callers can stop early."""
+        full_path = self._resolve_path(path)
+        async with aiofiles.open(full_path, "r", encoding="utf-8", errors="replace") as f:
+            async for line in f:
+                yield line
+    
     async def write_file(self, path: Path, content: str, create_dirs: bool = True) -> None:
         """Write content to a file asynchronously."""
         full_path = self._resolve_path(path)
         try:
-            if create_dirs:
-                await aiofiles.os.makedirs(full_path.parent, exist_ok=True)
-            async with aiofiles.open(full_path, 'w') as f:
-                await f.write(content)
+            await asyncio.to_thread(_write_text, full_path, content, create_dirs)
             self.logger.debug(f"Written to {full_path}")
         except Exception as e:
             self.logger.error(f"Failed to write {full_path}: {e}")
             raise
     
+    async def read_files(self, paths: List[Path]) -> List[str]:
+        """
+        Read several files, returning contents in order.
+        
+        The reads run back to back in a single worker thread: the agent
+        mostly batches small manifests and configs, where a thread hop per
+        file costs more than the read itself.
+        """
+        full_paths = [self._resolve_path(p) for p in paths]
+        try:
+            return await asyncio.to_thread(_read_many, full_paths)
+        except Exception as e:
+            self.logger.error(f"Failed to read files: {e}")
+            raise
+    
+    async def write_files(self, files: Dict[Path, str], create_dirs: bool = True) -> None:
+        """Write several files concurrently (path -> content)."""
+        await self._gather_bounded(
+            self.write_file(path, content, create_dirs) for path, content in files.items()
+        )
+    
+    async def _gather_bounded(self, coros: Iterable[Awaitable[Any]]) -> List[Any]:
+        """Run coroutines concurrently, at most MAX_CONCURRENT_FILE_OPS at a time."""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILE_OPS)
+        
+        async def bounded(coro: Awaitable[Any]) -> Any:
+            async with semaphore:
+                return await coro
+        
+        return await asyncio.gather(*(bounded(c) for c in coros))
+    
     async def copy_file(self, src: Path, dst: Path) -> None:
         """Copy a file asynchronously."""
         src_path = self._resolve_path(src)
         dst_path = self._resolve_path(dst)
         try:
             await aiofiles.os.makedirs(dst_path.parent, exist_ok=True)
-            # Use sync copy for simplicity (could use aiofiles for large files)
-            shutil.copy2(src_path, dst_path)
+            # shutil already copies in-kernel (sendfile/fcopyfile) where it
+            # can; run it off the event loop so large copies don't block
+            await asyncio.to_thread(shutil.copy2, src_path, dst_path)
             self.logger.debug(f"Copied {src_path} to {dst_path}")
         except Exception as e:
             self.logger.error(f"Failed to copy {src_path} to {dst_path}: {e}")
@@ -103,27 +323,23 @@ class FileManager:
         pattern: str = "*", 
         path: Path = None,
         recursive: bool = True,
-        exclude_dirs: List[str] = None
+        exclude_dirs: Iterable[str] = None
     ) -> List[Path]:
         """Find files matching a pattern."""
         search_path = self._resolve_path(path) if path else self.base_dir
-        exclude_dirs = exclude_dirs or [".git", "node_modules", "__pycache__", ".venv", "venv", "target", "dist", "build"]
+        exclude_dirs = frozenset(exclude_dirs) if exclude_dirs else _DEFAULT_EXCLUDE_DIRS
         
-        files = []
         if recursive:
-            for root, dirs, filenames in os.walk(search_path):
-                # Exclude specified directories
-                dirs[:] = [d for d in dirs if d not in exclude_dirs]
-                
-                root_path = Path(root)
-                for filename in filenames:
-                    file_path = root_path / filename
-                    if file_path.match(pattern):
-                        files.append(file_path)
-        else:
-            for entry in await self.list_dir(search_path):
-                if entry.is_file() and entry.match(pattern):
-                    files.append(entry)
+            # The walk is blocking; run it off the event loop
+            return await asyncio.to_thread(_walk_collect, search_path, pattern, exclude_dirs)
+        
+        matches_name = _name_matcher(pattern)
+        files = []
+        for entry in await self.list_dir(search_path):
+            if entry.is_file() and (
+                matches_name(entry.name) if matches_name else entry.match(pattern)
+            ):
+                files.append(entry)
         
         return files
     
@@ -139,41 +355,15 @@ class FileManager:
         Useful for project analysis.
         """
         scan_path = self._resolve_path(path) if path else self.base_dir
-        
-        result = {
-            "root": str(scan_path),
-            "files": [],
-            "directories": [],
-            "file_count": 0,
-            "extensions": {},
-        }
-        
-        exclude_dirs = {".git", "node_modules", "__pycache__", ".venv", "venv", "target", "dist", "build", ".idea", ".vscode"}
-        
-        for root, dirs, files in os.walk(scan_path):
-            # Exclude common non-essential directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            
-            rel_root = Path(root).relative_to(scan_path)
-            
-            for d in dirs:
-                result["directories"].append(str(rel_root / d))
-            
-            for f in files:
-                file_path = rel_root / f
-                result["files"].append(str(file_path))
-                result["file_count"] += 1
-                
-                # Track extensions
-                ext = Path(f).suffix.lower()
-                if ext:
-                    result["extensions"][ext] = result["extensions"].get(ext, 0) + 1
-        
-        return result
+        # The walk is blocking; run it off the event loop
+        return await asyncio.to_thread(_scan_project_sync, scan_path)
     
     def render_template(self, template_str: str, context: Dict[str, Any]) -> str:
         """Render a Jinja2 template string with context."""
-        template = self.jinja_env.from_string(template_str)
+        template = self._template_cache.get(template_str)
+        if template is None:
+            template = self._compile_template(template_str)
+            self._template_cache[template_str] = template
         return template.render(**context)
     
     async def render_template_file(
@@ -183,9 +373,44 @@ class FileManager:
         context: Dict[str, Any]
     ) -> None:
         """Render a template file and write to output."""
-        template_content = await self.read_file(template_path)
-        rendered = self.render_template(template_content, context)
-        await self.write_file(output_path, rendered)
+        full_path = self._resolve_path(template_path)
+        stat = await aiofiles.os.stat(full_path)
+        key = (str(full_path), stat.st_mtime_ns)
+        template = self._file_template_cache.get(key)
+        if template is None:
+            template_content = await self.read_file(full_path)
+            template = self._compile_template(template_content)
+            self._file_template_cache[key] = template
+        await self.write_file(output_path, template.render(**context))
+    
+    async def render_template_files(
+        self,
+        jobs: List[Tuple[Path, Path, Dict[str, Any]]],
+    ) -> None:
+        """Render several (template_path, output_path, context) jobs concurrently."""
+        await self._gather_bounded(
+            self.render_template_file(template_path, output_path, context)
+            for template_path, output_path, context in jobs
+        )
+    
+    def _compile_template(self, source: str) -> Template:
+        """
+        Compile a template string, going through the bytecode cache if set.
+        
+        Environment.from_string never consults the bytecode cache, so the
+        lookup is done here with the source hash as the bucket name.
+        """
+        env = self.jinja_env
+        bcc = env.bytecode_cache
+        if bcc is None:
+            return env.from_string(source)
+        
+        name = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        bucket = bcc.get_bucket(env, name, None, source)
+        if bucket.code is None:
+            bucket.code = env.compile(source)
+            bcc.set_bucket(bucket)
+        return env.template_class.from_code(env, bucket.code, env.make_globals(None))
     
     def _resolve_path(self, path: Path) -> Path:
         """Resolve a path relative to base_dir if not absolute."""
@@ -207,7 +432,7 @@ class FileManager:
         src_path = self._resolve_path(src)
         dst_path = self._resolve_path(dst)
         try:
-            shutil.copytree(src_path, dst_path, dirs_exist_ok=True)
+            await asyncio.to_thread(shutil.copytree, src_path, dst_path, dirs_exist_ok=True)
             self.logger.debug(f"Copied directory {src_path} to {dst_path}")
         except Exception as e:
             self.logger.error(f"Failed to copy directory {src_path}: {e}")
@@ -3,16 +3,112 @@ Gemini LLM Client for DevOps Automation Agent.
 Provides function calling capabilities for agentic workflows.
 """
 
+import asyncio
+import copy
+import hashlib
+import heapq
 import json
-from typing import Any, Dict, List, Optional, Callable, Awaitable
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Callable, Awaitable, Tuple
 from dataclasses import dataclass, field
 import google.generativeai as genai
 from google.generativeai.types import FunctionDeclaration, Tool
 
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 from ..config import get_config
+from ..utils.helpers import json_dumps, json_loads, strip_fence
 from .logger import AgentLogger
 
 
+# analyze_code results persisted under the workspace, keyed by content hash;
+# only the most recently used entries are kept
+ANALYZE_CACHE_FILE = ".analyze_cache.json"
+ANALYZE_CACHE_MAX_ENTRIES = 1000
+
+# Part of every analyze_code cache key; bump it when the analysis prompt
+# changes so results from the old prompt are not reused
+ANALYZE_PROMPT_VERSION = 1
+
+# API key the SDK was last configured with. genai.configure() drops the SDK's
+# cached service clients along with their open connections, so it only runs
+# when the key changes; every client's model then shares one connection.
+_configured_api_key: Optional[str] = None
+
+
+def _content_digest(text: str) -> str:
+    """Hex digest used to address cached analyses (BLAKE3 when available)."""
+    data = text.encode()
+    if BLAKE3_AVAILABLE:
+        return blake3(data).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+
+def _load_json_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            data = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_json_file(path: Path, data: Dict[str, Any]) -> None:
+    # Write then rename, so a concurrent reader never sees a partial file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(json_dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _configure_sdk(api_key: str) -> None:
+    global _configured_api_key
+    if api_key != _configured_api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+
+
+def _analyze_entries(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Well-formed analysis cache entries: {"used": epoch, "result": {...}}."""
+    return {
+        key: entry for key, entry in data.items()
+        if isinstance(entry, dict) and isinstance(entry.get("result"), dict)
+        and isinstance(entry.get("used"), (int, float))
+    }
+
+
+def _newest_entries(
+    entries: Dict[str, Dict[str, Any]], limit: int
+) -> Dict[str, Dict[str, Any]]:
+    if len(entries) <= limit:
+        return entries
+    return dict(heapq.nlargest(limit, entries.items(), key=lambda kv: kv[1]["used"]))
+
+
+def _merge_analyze_cache(
+    path: Path, entries: Dict[str, Dict[str, Any]], limit: int
+) -> None:
+    """
+    Merge entries into the cache file and keep the ``limit`` most recently used.
+    
+    Entries other clients saved to the same file since it was loaded are
+    kept; for a key in both, the more recently used entry wins.
+    """
+    merged = _analyze_entries(_load_json_file(path))
+    for key, entry in entries.items():
+        current = merged.get(key)
+        if current is None or entry["used"] >= current["used"]:
+            merged[key] = entry
+    _save_json_file(path, _newest_entries(merged, limit))
+
+
 @dataclass
 class ToolDefinition:
     """Definition of a tool that Gemini can call."""
@@ -20,6 +116,8 @@ class ToolDefinition:
     description: str
     parameters: Dict[str, Any]
     handler: Callable[..., Awaitable[Any]]
+    # Built once at registration; the SDK converts the schema to protobuf here
+    func_decl: Optional[FunctionDeclaration] = field(default=None, repr=False)
 
 
 class GeminiClient:
@@ -36,7 +134,7 @@ class GeminiClient:
         if not self.config.gemini.api_key:
             raise ValueError("GEMINI_API_KEY is required")
         
-        genai.configure(api_key=self.config.gemini.api_key)
+        _configure_sdk(self.config.gemini.api_key)
         
         # Default system instruction for DevOps tasks
         self.system_instruction = system_instruction or """You are an expert DevOps automation agent. 
@@ -55,11 +153,21 @@ When generating Dockerfiles, use multi-stage builds and security best practices.
             )
         )
         
-        # Tool registry
+        # Tool registry. The version bumps on every registration so the
+        # built Tool objects can be reused until the registry changes.
         self.tools: Dict[str, ToolDefinition] = {}
+        self._tools_version = 0
+        self._tools_cached: Tuple[int, List[Tool]] = (-1, [])
         
         # Conversation history for multi-turn
         self.chat_session = None
+        
+        # analyze_code results by content digest, with their last use time
+        # (loaded from disk on first use), plus in-flight analyses so
+        # concurrent callers share one call
+        self._analyze_cache_path = self.config.workspace_dir / ANALYZE_CACHE_FILE
+        self._analyze_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._analyze_pending: Dict[str, asyncio.Task] = {}
     
     def register_tool(
         self, 
@@ -74,7 +182,13 @@ When generating Dockerfiles, use multi-stage builds and security best practices.
             description=description,
             parameters=parameters,
             handler=handler,
+            func_decl=FunctionDeclaration(
+                name=name,
+                description=description,
+                parameters=parameters,
+            ),
         )
+        self._tools_version += 1
         self.logger.debug(f"Registered tool: {name}")
     
     def _build_tools(self) -> List[Tool]:
@@ -82,16 +196,13 @@ When generating Dockerfiles, use multi-stage builds and security best practices.
         if not self.tools:
             return []
         
-        function_declarations = []
-        for tool in self.tools.values():
-            func_decl = FunctionDeclaration(
-                name=tool.name,
-                description=tool.description,
-                parameters=tool.parameters,
-            )
-            function_declarations.append(func_decl)
+        version, tools = self._tools_cached
+        if version == self._tools_version:
+            return tools
         
-        return [Tool(function_declarations=function_declarations)]
+        tools = [Tool(function_declarations=[t.func_decl for t in self.tools.values()])]
+        self._tools_cached = (self._tools_version, tools)
+        return tools
     
     async def generate(
         self, 
@@ -112,22 +223,28 @@ When generating Dockerfiles, use multi-stage builds and security best practices.
         Returns:
             The final text response
         """
-        # Build the full prompt with context
+        # Build the full prompt with context. Compact JSON: the prompt is part
+        # of every request in a tool-calling exchange.
         full_prompt = prompt
         if context:
-            context_str = json.dumps(context, indent=2)
+            context_str = json_dumps(context)
             full_prompt = f"Context:\n```json\n{context_str}\n```\n\n{prompt}"
         
         # Get tools if enabled
         tools = self._build_tools() if enable_tools and self.tools else None
         
         try:
-            response = self.model.generate_content(
+            # The SDK call blocks for the whole round-trip; keep it off the loop
+            response = await asyncio.to_thread(
+                self.model.generate_content,
                 full_prompt,
                 tools=tools,
             )
             
-            # Handle function calls
+            # Handle function calls. Follow-up turns go through a chat session
+            # seeded with the opening exchange, which carries the history
+            # instead of this loop rebuilding the request each turn.
+            chat = None
             tool_call_count = 0
             while response.candidates[0].content.parts:
                 # Check for function calls
@@ -144,23 +261,28 @@ When generating Dockerfiles, use multi-stage builds and security best practices.
                     self.logger.warning(f"Reached max tool calls ({max_tool_calls})")
                     break
                 
-                # Execute function calls
-                function_responses = []
-                for fc in function_calls:
-                    tool_call_count += 1
-                    result = await self._execute_function_call(fc)
-                    function_responses.append({
-                        "name": fc.name,
-                        "response": {"result": result}
-                    })
+                # Execute function calls. Calls in one turn are independent, so
+                # run them concurrently; results keep the order of the calls.
+                tool_call_count += len(function_calls)
+                results = await asyncio.gather(
+                    *(self._execute_function_call(fc) for fc in function_calls)
+                )
+                function_responses = [
+                    genai.protos.Part(function_response=genai.protos.FunctionResponse(
+                        name=fc.name, response={"result": result},
+                    ))
+                    for fc, result in zip(function_calls, results)
+                ]
                 
                 # Continue the conversation with function results
-                response = self.model.generate_content(
-                    [
-                        full_prompt,
+                if chat is None:
+                    chat = self.model.start_chat(history=[
+                        {"role": "user", "parts": [full_prompt]},
                         response.candidates[0].content,
-                        {"function_response": function_responses}
-                    ],
+                    ])
+                response = await asyncio.to_thread(
+                    chat.send_message,
+                    function_responses,
                     tools=tools,
                 )
             
@@ -201,7 +323,63 @@ When generating Dockerfiles, use multi-stage builds and security best practices.
             return ""
     
     async def analyze_code(self, code: str, file_path: str = None) -> Dict[str, Any]:
-        """Analyze code and return structured insights."""
+        """
+        Analyze code and return structured insights.
+        
+        Results are cached by a hash of the model, prompt version, file path
+        and content, in memory and in the workspace, so unchanged files are
+        not sent to Gemini again.
+        """
+        key = _content_digest("\0".join((
+            self.config.gemini.model_name,
+            str(ANALYZE_PROMPT_VERSION),
+            file_path or "",
+            code,
+        )))
+        if self._analyze_cache is None:
+            loaded = await asyncio.to_thread(_load_json_file, self._analyze_cache_path)
+            # A concurrent first call may have loaded (and added to) it already
+            if self._analyze_cache is None:
+                self._analyze_cache = _analyze_entries(loaded)
+        
+        entry = self._analyze_cache.get(key)
+        if entry is not None:
+            entry["used"] = time.time()
+            cached = entry["result"]
+        else:
+            task = self._analyze_pending.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._analyze_and_cache(key, code, file_path))
+                self._analyze_pending[key] = task
+                task.add_done_callback(lambda _: self._analyze_pending.pop(key, None))
+            # Shielded so one caller being cancelled doesn't fail the others
+            cached = await asyncio.shield(task)
+        
+        # Callers get their own copy to modify
+        return copy.deepcopy(cached)
+    
+    async def _analyze_and_cache(
+        self, key: str, code: str, file_path: Optional[str]
+    ) -> Dict[str, Any]:
+        result = await self._analyze_code(code, file_path)
+        # Unparseable replies are worth retrying, so they are not cached
+        if "raw_response" not in result:
+            self._analyze_cache[key] = {"used": time.time(), "result": result}
+            self._analyze_cache = _newest_entries(
+                self._analyze_cache, ANALYZE_CACHE_MAX_ENTRIES
+            )
+            try:
+                await asyncio.to_thread(
+                    _merge_analyze_cache,
+                    self._analyze_cache_path,
+                    dict(self._analyze_cache),
+                    ANALYZE_CACHE_MAX_ENTRIES,
+                )
+            except OSError as e:
+                self.logger.warning(f"Failed to persist analysis cache: {e}")
+        return result
+    
+    async def _analyze_code(self, code: str, file_path: Optional[str]) -> Dict[str, Any]:
         prompt = f"""Analyze this code and return a JSON object with:
 - language: programming language
 - framework: framework if any (null if none)
@@ -220,13 +398,7 @@ Return ONLY valid JSON, no markdown code blocks."""
         response = await self.generate(prompt, enable_tools=False)
         
         try:
-            # Clean up response if needed
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("\n", 1)[1]
-            if response.endswith("```"):
-                response = response.rsplit("```", 1)[0]
-            return json.loads(response.strip())
+            return json_loads(strip_fence(response))
         except json.JSONDecodeError:
             self.logger.warning("Failed to parse code analysis as JSON")
             return {"raw_response": response}
@@ -241,7 +413,7 @@ Return ONLY valid JSON, no markdown code blocks."""
 
 Project Info:
 ```json
-{json.dumps(project_info, indent=2)}
+{json_dumps(project_info, indent=True)}
 ```
 
 Requirements:
@@ -267,7 +439,7 @@ Return ONLY the Dockerfile content, no explanations or markdown code blocks."""
 
 Project Info:
 ```json
-{json.dumps(project_info, indent=2)}
+{json_dumps(project_info, indent=True)}
 ```
 
 Requirements:
@@ -294,7 +466,7 @@ Return ONLY valid YAML, no explanations or markdown code blocks."""
 
 Project Info:
 ```json
-{json.dumps(project_info, indent=2)}
+{json_dumps(project_info, indent=True)}
 ```
 
 Environment: {environment}
@@ -316,19 +488,13 @@ Return ONLY valid JSON with the file contents."""
         response = await self.generate(prompt, enable_tools=False)
         
         try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("\n", 1)[1]
-            if response.endswith("```"):
-                response = response.rsplit("```", 1)[0]
-            return json.loads(response.strip())
+            return json_loads(strip_fence(response))
         except json.JSONDecodeError:
             self.logger.warning("Failed to parse Terraform config as JSON")
             return {"raw_response": response}
     
     def start_chat(self) -> None:
         """Start a new chat session for multi-turn conversations."""
-        tools = self._build_tools() if self.tools else None
         self.chat_session = self.model.start_chat(history=[])
     
     async def chat(self, message: str) -> str:
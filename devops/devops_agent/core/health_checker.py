@@ -3,19 +3,48 @@ Health Checker - Deployment verification via HTTP health checks.
 
 Provides:
 - HTTP health check client
-- Retry with exponential backoff
+- Retry with decorrelated-jitter backoff
 - Response validation
 - Readiness/liveness probes
 """
 
 import asyncio
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+import random
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional, Dict, Any, List, Set, Tuple
 
 import httpx
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 from ..core.logger import get_logger
+from ..utils.helpers import json_loads
+
+
+# Upper bound on additional endpoint checks probed at once by
+# DeploymentVerifier, to avoid flooding a freshly deployed service
+MAX_CONCURRENT_HEALTH_CHECKS = 10
+
+# 4xx status codes that are still worth retrying (timeouts, rate limits).
+# Any other 4xx is treated as permanent and ends HealthChecker.check early.
+RETRY_ON_STATUS = frozenset({408, 425, 429})
+
+# Largest health response body read into memory; bigger bodies fail JSON
+# validation (and are not drained when no validation is needed)
+MAX_HEALTH_BODY_BYTES = 1024 * 1024
+
+# Connection pool for a checker's client. Probes of one service reuse the
+# same keep-alive connection instead of a new TCP/TLS handshake each time.
+_POOL_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=60.0,
+)
 
 
 @dataclass
@@ -43,15 +72,24 @@ class HealthChecker:
     HTTP health check client with retry and verification.
     
     Usage:
-        checker = HealthChecker()
-        result = await checker.check(
-            url="https://my-service.run.app/health",
-            max_retries=5,
-        )
-        if result.healthy:
-            print("Deployment verified!")
+        async with HealthChecker() as checker:
+            result = await checker.check(
+                url="https://my-service.run.app/health",
+                max_retries=5,
+            )
+            if result.healthy:
+                print("Deployment verified!")
+    
+    The checker keeps one pooled HTTP client across probes; call aclose()
+    (or use it as an async context manager) when done.
+    
+    Healthy results are reused for CACHE_TTL seconds per URL, so checks
+    fired back to back don't probe the service twice.
     """
     
+    # Seconds a healthy result stays valid for the same URL
+    CACHE_TTL = 1.0
+    
     def __init__(
         self,
         timeout: float = 10.0,
@@ -67,9 +105,40 @@ class HealthChecker:
             expected_json_fields: JSON fields that must be present in response
         """
         self.timeout = timeout
-        self.expected_status_codes = expected_status_codes or [200]
-        self.expected_json_fields = expected_json_fields or []
+        self.expected_status_codes = frozenset(expected_status_codes or (200,))
+        self.expected_json_fields = tuple(expected_json_fields or ())
         self.logger = get_logger("HealthChecker")
+        self._client: Optional[httpx.AsyncClient] = None
+        # url -> (monotonic time of the probe, healthy result)
+        self._cache: Dict[str, Tuple[float, HealthCheckResult]] = {}
+        # url -> background poll shared by concurrent wait_for_ready calls
+        self._readiness_polls: Dict[str, _ReadinessPoll] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=_POOL_LIMITS,
+                http2=HTTP2_AVAILABLE,
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close pooled connections. The checker can still be used afterwards."""
+        for poll in self._readiness_polls.values():
+            poll.stopped = True
+            poll.task.cancel()
+        self._readiness_polls.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "HealthChecker":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
     
     async def check(
         self,
@@ -78,6 +147,8 @@ class HealthChecker:
         retry_delay: float = 5.0,
         max_delay: float = 60.0,
         headers: Dict[str, str] = None,
+        use_cache: bool = True,
+        retry_on_status: Set[int] = None,
     ) -> HealthCheckResult:
         """
         Perform health check with retries.
@@ -88,11 +159,17 @@ class HealthChecker:
             retry_delay: Initial delay between retries (seconds)
             max_delay: Maximum delay between retries
             headers: Additional headers to send
+            use_cache: Accept a healthy result from the last CACHE_TTL seconds
+            retry_on_status: 4xx status codes to keep retrying; any other
+                4xx fails immediately (default: RETRY_ON_STATUS)
             
         Returns:
             HealthCheckResult
         """
+        if retry_on_status is None:
+            retry_on_status = RETRY_ON_STATUS
         result = HealthCheckResult(healthy=False)
+        sleep = retry_delay
         
         for attempt in range(1, max_retries + 1):
             result.checks_performed = attempt
@@ -100,7 +177,7 @@ class HealthChecker:
             self.logger.info(f"Health check attempt {attempt}/{max_retries}: {url}")
             
             try:
-                check_result = await self._do_check(url, headers)
+                check_result = await self._do_check(url, headers, use_cache)
                 
                 if check_result.healthy:
                     self.logger.info(
@@ -109,16 +186,30 @@ class HealthChecker:
                     return check_result
                 
                 result = check_result
+                result.checks_performed = attempt
+                
+                # A client error won't fix itself; don't wait out the retries
+                status = check_result.status_code
+                if (
+                    status is not None
+                    and 400 <= status < 500
+                    and status not in retry_on_status
+                ):
+                    self.logger.error(
+                        f"Health check got non-retryable status {status}"
+                    )
+                    return result
                 
             except Exception as e:
                 result.last_error = str(e)
                 self.logger.warning(f"Health check failed: {e}")
             
-            # Wait before retry (exponential backoff)
+            # Wait before retry (decorrelated jitter, so callers probing the
+            # same service don't retry in lockstep)
             if attempt < max_retries:
-                delay = min(retry_delay * (2 ** (attempt - 1)), max_delay)
-                self.logger.info(f"Retrying in {delay:.1f}s...")
-                await asyncio.sleep(delay)
+                sleep = min(max_delay, random.uniform(retry_delay, sleep * 3))
+                self.logger.info(f"Retrying in {sleep:.1f}s...")
+                await asyncio.sleep(sleep)
         
         result.message = f"Health check failed after {max_retries} attempts"
         self.logger.error(result.message)
@@ -128,43 +219,82 @@ class HealthChecker:
         self,
         url: str,
         headers: Dict[str, str] = None,
+        use_cache: bool = True,
     ) -> HealthCheckResult:
         """Perform a single health check."""
+        # Requests with custom headers may see a different response, so
+        # they neither use nor fill the cache
+        use_cache = use_cache and not headers
+        if use_cache:
+            entry = self._cache.get(url)
+            if entry and time.monotonic() - entry[0] < self.CACHE_TTL:
+                return replace(entry[1])
+        
         result = HealthCheckResult(healthy=False)
         
-        start_time = datetime.now()
+        start = time.perf_counter()
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, headers=headers or {})
-            
+        # Stream the response so the body is only buffered when its JSON
+        # has to be validated
+        async with self._get_client().stream(
+            "GET", url, headers=headers or {}
+        ) as response:
             result.status_code = response.status_code
-            result.response_time_ms = (
-                datetime.now() - start_time
-            ).total_seconds() * 1000
+            result.response_time_ms = (time.perf_counter() - start) * 1000.0
             
-            # Check status code
+            # Check status code (the unread body is discarded on exit)
             if response.status_code not in self.expected_status_codes:
                 result.message = f"Unexpected status code: {response.status_code}"
                 return result
             
-            # Check JSON fields if specified
-            if self.expected_json_fields:
-                try:
-                    data = response.json()
-                    missing = [
-                        field for field in self.expected_json_fields
-                        if field not in data
-                    ]
-                    if missing:
-                        result.message = f"Missing JSON fields: {missing}"
-                        return result
-                except Exception:
-                    result.message = "Expected JSON response"
+            body = await self._read_body(
+                response, keep=bool(self.expected_json_fields)
+            )
+        
+        # Check JSON fields if specified
+        if self.expected_json_fields:
+            if body is None:
+                result.message = (
+                    f"Response body larger than {MAX_HEALTH_BODY_BYTES} bytes"
+                )
+                return result
+            try:
+                data = json_loads(body)
+                missing = [
+                    field for field in self.expected_json_fields
+                    if field not in data
+                ]
+                if missing:
+                    result.message = f"Missing JSON fields: {missing}"
                     return result
-            
-            result.healthy = True
-            result.message = "OK"
-            return result
+            except Exception:
+                result.message = "Expected JSON response"
+                return result
+        
+        result.healthy = True
+        result.message = "OK"
+        if use_cache:
+            self._cache[url] = (time.monotonic(), replace(result))
+        return result
+    
+    @staticmethod
+    async def _read_body(response: httpx.Response, keep: bool) -> Optional[bytes]:
+        """
+        Read a streamed body of up to MAX_HEALTH_BODY_BYTES.
+        
+        With keep=False the body is drained without buffering, which lets
+        the connection go back to the pool. Returns None if the body is
+        larger than the limit.
+        """
+        chunks = []
+        total = 0
+        async for chunk in response.aiter_bytes(chunk_size=65536):
+            total += len(chunk)
+            if total > MAX_HEALTH_BODY_BYTES:
+                return None
+            if keep:
+                chunks.append(chunk)
+        return b"".join(chunks)
     
     async def wait_for_ready(
         self,
@@ -176,6 +306,12 @@ class HealthChecker:
         """
         Wait for a service to become ready.
         
+        Concurrent waiters on the same URL (without custom headers) share
+        one background poller, at the poll_interval of the waiter that
+        started it, so the probe rate doesn't grow with the number of
+        callers. The poller stops once the service is ready or the last
+        waiter gives up.
+        
         Args:
             url: URL to check
             timeout: Maximum time to wait (seconds)
@@ -187,37 +323,87 @@ class HealthChecker:
         """
         self.logger.info(f"Waiting for service to be ready: {url}")
         
-        start_time = datetime.now()
-        attempts = 0
-        last_result = HealthCheckResult(healthy=False)
+        start_time = time.monotonic()
+        poll = None if headers else self._readiness_polls.get(url)
+        if poll is None:
+            poll = _ReadinessPoll()
+            if not headers:
+                self._readiness_polls[url] = poll
+            poll.task = asyncio.create_task(
+                self._poll_until_ready(url, poll_interval, headers, poll)
+            )
         
-        while (datetime.now() - start_time).total_seconds() < timeout:
-            attempts += 1
-            
-            try:
-                result = await self._do_check(url, headers)
-                result.checks_performed = attempts
-                
-                if result.healthy:
-                    self.logger.info(
-                        f"Service ready after {attempts} checks "
-                        f"({(datetime.now() - start_time).total_seconds():.1f}s)"
-                    )
-                    return result
-                
-                last_result = result
-                
-            except httpx.ConnectError:
-                last_result.last_error = "Connection refused"
-            except Exception as e:
-                last_result.last_error = str(e)
-            
-            await asyncio.sleep(poll_interval)
+        poll.waiters += 1
+        try:
+            await asyncio.wait_for(poll.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            poll.waiters -= 1
+            if poll.waiters == 0 and not poll.task.done():
+                poll.stopped = True
+                poll.task.cancel()
+                if self._readiness_polls.get(url) is poll:
+                    del self._readiness_polls[url]
+        
+        result = replace(poll.latest, checks_performed=poll.checks)
+        if result.healthy:
+            self.logger.info(
+                f"Service ready after {poll.checks} checks "
+                f"({time.monotonic() - start_time:.1f}s)"
+            )
+            return result
         
-        last_result.checks_performed = attempts
-        last_result.message = f"Timeout after {timeout}s"
+        result.message = f"Timeout after {timeout}s"
         self.logger.error(f"Service not ready after {timeout}s")
-        return last_result
+        return result
+    
+    async def _poll_until_ready(
+        self,
+        url: str,
+        poll_interval: float,
+        headers: Optional[Dict[str, str]],
+        poll: "_ReadinessPoll",
+    ) -> None:
+        """Probe url until healthy, publishing each result on poll."""
+        try:
+            # The flag backs up cancel(), which a cancellation racing with
+            # the HTTP client's own cleanup can occasionally swallow
+            while not poll.stopped:
+                poll.checks += 1
+                
+                try:
+                    result = await self._do_check(url, headers)
+                    poll.latest = result
+                    
+                    if result.healthy:
+                        poll.ready.set()
+                        return
+                    
+                except httpx.ConnectError:
+                    poll.latest.last_error = "Connection refused"
+                except Exception as e:
+                    poll.latest.last_error = str(e)
+                
+                await asyncio.sleep(poll_interval)
+        finally:
+            # Later waiters start a fresh poll rather than reuse a
+            # finished one
+            if self._readiness_polls.get(url) is poll:
+                del self._readiness_polls[url]
+
+
+@dataclass
+class _ReadinessPoll:
+    """State shared between wait_for_ready callers polling one URL."""
+    task: Optional[asyncio.Task] = None
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    latest: HealthCheckResult = field(
+        default_factory=lambda: HealthCheckResult(healthy=False)
+    )
+    checks: int = 0
+    waiters: int = 0
+    stopped: bool = False
 
 
 class DeploymentVerifier:
@@ -250,65 +436,80 @@ class DeploymentVerifier:
         Returns:
             Verification result dict
         """
-        result = {
-            "success": False,
-            "url": base_url,
-            "checks": [],
-            "errors": [],
-        }
-        
-        # Primary health check
-        health_url = f"{base_url.rstrip('/')}{health_path}"
-        self.logger.info(f"Verifying deployment at: {health_url}")
-        
-        health_result = await self.health_checker.check(
-            url=health_url,
-            max_retries=max_retries,
-        )
-        
-        result["checks"].append({
-            "name": "health",
-            "url": health_url,
-            "passed": health_result.healthy,
-            "response_time_ms": health_result.response_time_ms,
-        })
-        
-        if not health_result.healthy:
-            result["errors"].append(
-                f"Health check failed: {health_result.last_error or health_result.message}"
-            )
-            return result
-        
-        # Additional checks
-        all_passed = True
-        for check in (additional_checks or []):
-            check_url = f"{base_url.rstrip('/')}{check.get('path', '/')}"
-            check_result = await self.health_checker.check(
-                url=check_url,
-                max_retries=1,
+        try:
+            result = {
+                "success": False,
+                "url": base_url,
+                "checks": [],
+                "errors": [],
+            }
+            
+            # Primary health check
+            base = base_url.rstrip('/')
+            health_url = f"{base}{health_path}"
+            self.logger.info(f"Verifying deployment at: {health_url}")
+            
+            health_result = await self.health_checker.check(
+                url=health_url,
+                max_retries=max_retries,
             )
             
             result["checks"].append({
-                "name": check.get("name", check.get("path")),
-                "url": check_url,
-                "passed": check_result.healthy,
-                "response_time_ms": check_result.response_time_ms,
+                "name": "health",
+                "url": health_url,
+                "passed": health_result.healthy,
+                "response_time_ms": health_result.response_time_ms,
             })
             
-            if not check_result.healthy:
-                all_passed = False
+            if not health_result.healthy:
                 result["errors"].append(
-                    f"Check '{check.get('name')}' failed"
+                    f"Health check failed: {health_result.last_error or health_result.message}"
                 )
-        
-        result["success"] = all_passed
-        
-        if result["success"]:
-            self.logger.info("Deployment verification passed!")
-        else:
-            self.logger.warning("Deployment verification failed")
-        
-        return result
+                return result
+            
+            # Additional checks are independent; probe them concurrently
+            checks = additional_checks or []
+            check_urls = [f"{base}{check.get('path', '/')}" for check in checks]
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_HEALTH_CHECKS)
+            
+            async def run_check(url: str) -> HealthCheckResult:
+                async with semaphore:
+                    return await self.health_checker.check(url=url, max_retries=1)
+            
+            check_results = await asyncio.gather(
+                *(run_check(url) for url in check_urls),
+                return_exceptions=True,
+            )
+            
+            all_passed = True
+            for check, check_url, check_result in zip(checks, check_urls, check_results):
+                if isinstance(check_result, Exception):
+                    check_result = HealthCheckResult(healthy=False, last_error=str(check_result))
+                
+                result["checks"].append({
+                    "name": check.get("name", check.get("path")),
+                    "url": check_url,
+                    "passed": check_result.healthy,
+                    "response_time_ms": check_result.response_time_ms,
+                })
+                
+                if not check_result.healthy:
+                    all_passed = False
+                    result["errors"].append(
+                        f"Check '{check.get('name')}' failed"
+                    )
+            
+            result["success"] = all_passed
+            
+            if result["success"]:
+                self.logger.info("Deployment verification passed!")
+            else:
+                self.logger.warning("Deployment verification failed")
+            
+            return result
+        finally:
+            # Release pooled connections between verifications
+            await self.health_checker.aclose()
 
 
 # Convenience function
@@ -328,9 +529,9 @@ async def verify_deployment(
     Returns:
         True if deployment is healthy
     """
-    checker = HealthChecker()
-    result = await checker.wait_for_ready(
-        url=f"{url.rstrip('/')}{health_path}",
-        timeout=timeout,
-    )
+    async with HealthChecker() as checker:
+        result = await checker.wait_for_ready(
+            url=f"{url.rstrip('/')}{health_path}",
+            timeout=timeout,
+        )
     return result.healthy
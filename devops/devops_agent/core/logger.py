@@ -3,11 +3,13 @@ Structured logging for DevOps Automation Agent.
 Uses structlog for rich, contextual logging.
 """
 
+import logging
+import os
 import sys
 import structlog
 from rich.console import Console
 from rich.theme import Theme
-from typing import Any
+from typing import Any, Optional
 
 # Custom theme for rich output
 custom_theme = Theme({
@@ -20,9 +22,22 @@ custom_theme = Theme({
 
 console = Console(theme=custom_theme)
 
+# Minimum stdlib level that gets emitted; NOTSET until setup_logging runs
+_min_level = logging.NOTSET
+
+
+def _resolve_level(verbose: bool) -> int:
+    """Log level from LOG_LEVEL (e.g. "WARNING"), else DEBUG/INFO by verbosity."""
+    name = os.getenv("LOG_LEVEL", "").strip().upper()
+    if name in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+        return getattr(logging, name)
+    return logging.DEBUG if verbose else logging.INFO
+
 
 def setup_logging(verbose: bool = False) -> None:
     """Configure structured logging."""
+    global _min_level
+    _min_level = _resolve_level(verbose)
     
     processors = [
         structlog.contextvars.merge_contextvars,
@@ -39,7 +54,7 @@ def setup_logging(verbose: bool = False) -> None:
     
     structlog.configure(
         processors=processors,
-        wrapper_class=structlog.make_filtering_bound_logger(0),
+        wrapper_class=structlog.make_filtering_bound_logger(_min_level),
         context_class=dict,
         logger_factory=structlog.PrintLoggerFactory(),
         cache_logger_on_first_use=True,
@@ -56,34 +71,65 @@ class AgentLogger:
     
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
-        self.logger = get_logger(agent_name)
+        # Returns each rendered event instead of printing it, so _emit can
+        # write it together with the console line
+        self.logger = structlog.wrap_logger(structlog.ReturnLogger())
+    
+    def _emit(self, console_line: Optional[str], event: Optional[str]) -> None:
+        """Write the console line and the structured event in one write."""
+        out = ""
+        if console_line is not None and not console.quiet:
+            console.begin_capture()
+            console.print(console_line)
+            out = console.end_capture()
+        if event is not None:
+            out += event + "\n"
+        if out:
+            console.file.write(out)
+            console.file.flush()
     
     def step(self, message: str, step_num: int = None) -> None:
         """Log a step in the pipeline."""
         prefix = f"[Step {step_num}]" if step_num else "[→]"
-        console.print(f"[step]{prefix}[/step] [{self.agent_name}] {message}")
-        self.logger.info(message, step=step_num)
+        self._emit(
+            f"[step]{prefix}[/step] [{self.agent_name}] {message}",
+            self.logger.info(message, step=step_num),
+        )
     
     def success(self, message: str) -> None:
         """Log a success message."""
-        console.print(f"[success]✓[/success] [{self.agent_name}] {message}")
-        self.logger.info(message, status="success")
+        self._emit(
+            f"[success]✓[/success] [{self.agent_name}] {message}",
+            self.logger.info(message, status="success"),
+        )
     
     def warning(self, message: str) -> None:
         """Log a warning message."""
-        console.print(f"[warning]⚠[/warning] [{self.agent_name}] {message}")
-        self.logger.warning(message)
+        self._emit(
+            f"[warning]⚠[/warning] [{self.agent_name}] {message}",
+            self.logger.warning(message),
+        )
     
     def error(self, message: str, exc: Exception = None) -> None:
         """Log an error message."""
-        console.print(f"[error]✗[/error] [{self.agent_name}] {message}")
-        self.logger.error(message, exc_info=exc)
+        self._emit(
+            f"[error]✗[/error] [{self.agent_name}] {message}",
+            self.logger.error(message, exc_info=exc),
+        )
     
     def info(self, message: str, **kwargs: Any) -> None:
         """Log an info message."""
-        console.print(f"[info]ℹ[/info] [{self.agent_name}] {message}")
-        self.logger.info(message, **kwargs)
+        event = self.logger.info(message, **kwargs) if _min_level <= logging.INFO else None
+        self._emit(f"[info]ℹ[/info] [{self.agent_name}] {message}", event)
+    
+    def is_enabled_for(self, level: int) -> bool:
+        """Check whether messages at the given stdlib level would be emitted."""
+        return self.logger.is_enabled_for(level)
     
     def debug(self, message: str, **kwargs: Any) -> None:
         """Log a debug message."""
-        self.logger.debug(message, **kwargs)
+        # Checked here rather than left to structlog, so disabled debug
+        # logging costs one global load and compare
+        if _min_level > logging.DEBUG:
+            return
+        self._emit(None, self.logger.debug(message, **kwargs))
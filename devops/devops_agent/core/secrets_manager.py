@@ -8,18 +8,58 @@ Provides:
 - Environment variable fallback
 """
 
+import functools
 import os
-import json
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from base64 import urlsafe_b64encode
-from hashlib import pbkdf2_hmac
 
-try:
-    from cryptography.fernet import Fernet
-    CRYPTO_AVAILABLE = True
-except ImportError:
-    CRYPTO_AVAILABLE = False
+from ..utils.helpers import json_dumps_bytes, json_loads
+
+
+# Static salt (ideally should be random and stored)
+_KDF_SALT = b'devops-agent-salt'
+_KDF_ITERATIONS = 100000
+
+# (secrets file, passphrase) -> ((mtime_ns, size), decrypted secrets).
+# Lets new managers skip decrypting a file that hasn't changed since it
+# was last read or written in this process.
+_FILE_CACHE: Dict[Tuple[Path, str], Tuple[Tuple[int, int], Dict[str, str]]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _fernet_class():
+    """
+    Import Fernet on first use, or None if cryptography isn't installed.
+    
+    Deferred so importing this module doesn't pay for loading cryptography.
+    """
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        return None
+    return Fernet
+
+
+@functools.lru_cache(maxsize=8)
+def _derive_fernet(passphrase: str, salt: bytes, iters: int, dklen: int) -> bytes:
+    """
+    Derive a Fernet key from a passphrase using PBKDF2-SHA256.
+    
+    Cached, since each derivation costs ~100k hash rounds and every
+    SecretsManager with the same passphrase needs the same key.
+    """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=dklen,
+        salt=salt,
+        iterations=iters,
+    )
+    # Fernet requires base64-encoded 32-byte key
+    return urlsafe_b64encode(kdf.derive(passphrase.encode()))
 
 
 class SecretsManager:
@@ -59,49 +99,57 @@ class SecretsManager:
     
     def _get_cipher(self):
         """Get Fernet cipher from passphrase."""
-        if not CRYPTO_AVAILABLE:
+        fernet_cls = _fernet_class()
+        if fernet_cls is None:
             return None
         
         # Derive key from passphrase using PBKDF2
-        key = pbkdf2_hmac(
-            'sha256',
-            self.passphrase.encode(),
-            b'devops-agent-salt',  # Static salt (ideally should be random and stored)
-            100000,  # iterations
-            dklen=32
-        )
-        
-        # Fernet requires base64-encoded 32-byte key
-        fernet_key = urlsafe_b64encode(key)
-        return Fernet(fernet_key)
+        return fernet_cls(_derive_fernet(self.passphrase, _KDF_SALT, _KDF_ITERATIONS, 32))
     
     def _load_secrets(self) -> Dict[str, str]:
         """Load and decrypt secrets from file."""
         if self._secrets_cache is not None:
             return self._secrets_cache
         
-        if not self.secrets_file.exists():
+        try:
+            st = self.secrets_file.stat()
+        except FileNotFoundError:
             self._secrets_cache = {}
             return self._secrets_cache
         
+        cache_key = (self.secrets_file, self.passphrase)
+        entry = _FILE_CACHE.get(cache_key)
+        if entry and entry[0] == (st.st_mtime_ns, st.st_size):
+            self._secrets_cache = dict(entry[1])
+            return self._secrets_cache
+        
         try:
             encrypted_data = self.secrets_file.read_bytes()
             
             if self._cipher:
                 decrypted_data = self._cipher.decrypt(encrypted_data)
-                self._secrets_cache = json.loads(decrypted_data.decode())
+                self._secrets_cache = json_loads(decrypted_data)
             else:
                 # Fallback: unencrypted (NOT RECOMMENDED)
-                self._secrets_cache = json.loads(encrypted_data.decode())
+                self._secrets_cache = json_loads(encrypted_data)
             
+            _FILE_CACHE[cache_key] = (
+                (st.st_mtime_ns, st.st_size), dict(self._secrets_cache)
+            )
             return self._secrets_cache
         except Exception as e:
             raise RuntimeError(f"Failed to load secrets: {e}")
     
     def _save_secrets(self, secrets: Dict[str, str]):
-        """Encrypt and save secrets to file."""
+        """Replace the cached secrets and write them to file."""
+        self._secrets_cache = secrets
+        self._flush()
+    
+    def _flush(self):
+        """Encrypt the cached secrets and write them to file."""
+        secrets = self._secrets_cache
         try:
-            data = json.dumps(secrets).encode()
+            data = json_dumps_bytes(secrets)
             
             if self._cipher:
                 encrypted_data = self._cipher.encrypt(data)
@@ -113,7 +161,10 @@ class SecretsManager:
             self.secrets_file.write_bytes(encrypted_data)
             self.secrets_file.chmod(0o600)  # Owner read/write only
             
-            self._secrets_cache = secrets
+            st = self.secrets_file.stat()
+            _FILE_CACHE[(self.secrets_file, self.passphrase)] = (
+                (st.st_mtime_ns, st.st_size), dict(secrets)
+            )
         except Exception as e:
             raise RuntimeError(f"Failed to save secrets: {e}")
     
@@ -125,9 +176,18 @@ class SecretsManager:
             key: Secret identifier
             value: Secret value
         """
-        secrets = self._load_secrets()
-        secrets[key] = value
-        self._save_secrets(secrets)
+        self._load_secrets()[key] = value
+        self._flush()
+    
+    def update(self, secrets: Dict[str, str]):
+        """
+        Store several secrets with a single encrypt and write.
+        
+        Args:
+            secrets: Mapping of secret identifiers to values
+        """
+        self._load_secrets().update(secrets)
+        self._flush()
     
     def get_secret(self, key: str, default: str = None) -> Optional[str]:
         """
@@ -159,7 +219,7 @@ class SecretsManager:
         secrets = self._load_secrets()
         if key in secrets:
             del secrets[key]
-            self._save_secrets(secrets)
+            self._flush()
     
     def list_secrets(self) -> list[str]:
         """
@@ -8,11 +8,11 @@ Provides:
 - Secrets masking in logs
 """
 
+import functools
 import re
 import os
 from pathlib import Path
 from typing import List, Optional, Tuple
-from urllib.parse import urlparse
 
 
 class SecurityError(Exception):
@@ -28,12 +28,30 @@ class InputValidator:
     # Dangerous shell characters that could enable injection
     SHELL_DANGEROUS_CHARS = [";", "|", "&", "$", "`", "\\n", "\\r", "(", ")", "<", ">"]
     
+    # SHELL_DANGEROUS_CHARS as one pattern, so a command is scanned once
+    SHELL_DANGEROUS_PATTERN = re.compile(
+        '|'.join(re.escape(char) for char in SHELL_DANGEROUS_CHARS)
+    )
+    
     # Allowed characters in Docker image names
-    DOCKER_IMAGE_PATTERN = re.compile(r'^[a-z0-9]+([._-][a-z0-9]+)*(:[a-z0-9._-]+)?$', re.IGNORECASE)
+    # (ASCII-only, and used with fullmatch so a trailing newline can't slip
+    # past the "$" anchor)
+    DOCKER_IMAGE_PATTERN = re.compile(
+        r'^[a-z0-9]+([._-][a-z0-9]+)*(:[a-z0-9._-]+)?$', re.IGNORECASE | re.ASCII
+    )
     
-    # GitHub repo URL pattern
+    # GitHub repo URL pattern; the groups give owner and repo (without a
+    # trailing .git) directly
     GITHUB_URL_PATTERN = re.compile(
-        r'^https://github\.com/[a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+/?$'
+        r'^https://github\.com/(?P<owner>[a-zA-Z0-9_-]+)/(?P<repo>[a-zA-Z0-9_.-]+?)(?:\.git)?/?$',
+        re.ASCII,
+    )
+    
+    # Template injection attempts stripped by sanitize_template_input: Jinja2
+    # expressions and statements (non-greedy, across lines) and XSS openers
+    TEMPLATE_INJECTION_PATTERN = re.compile(
+        r'\{\{.*?\}\}|\{%.*?%\}|<script|javascript:',
+        re.IGNORECASE | re.DOTALL,
     )
     
     @staticmethod
@@ -51,25 +69,32 @@ class InputValidator:
         Raises:
             SecurityError: If path attempts traversal or is outside base_dir
         """
+        # Check for path traversal attempts
+        if ".." in str(path):
+            raise SecurityError("Path traversal detected: '..' not allowed")
+        
+        # Without a base_dir there is nothing to contain the path in, so a
+        # textual absolute path will do; skip resolve()'s per-component stat
+        # and symlink syscalls
+        if not base_dir:
+            if "\0" in str(path):
+                raise SecurityError("Invalid path: embedded null byte")
+            return Path(os.path.abspath(path))
+        
         # Convert to Path and resolve to absolute path
         try:
             sanitized = Path(path).resolve()
         except (ValueError, OSError) as e:
             raise SecurityError(f"Invalid path: {e}")
         
-        # Check for path traversal attempts
-        if ".." in str(path):
-            raise SecurityError("Path traversal detected: '..' not allowed")
-        
-        # If base_dir specified, ensure path is within it
-        if base_dir:
-            base_resolved = Path(base_dir).resolve()
-            try:
-                sanitized.relative_to(base_resolved)
-            except ValueError:
-                raise SecurityError(
-                    f"Path {path} is outside allowed directory {base_dir}"
-                )
+        # Ensure path is within base_dir
+        base_resolved = Path(base_dir).resolve()
+        try:
+            sanitized.relative_to(base_resolved)
+        except ValueError:
+            raise SecurityError(
+                f"Path {path} is outside allowed directory {base_dir}"
+            )
         
         return sanitized
     
@@ -89,16 +114,17 @@ class InputValidator:
             SecurityError: If command contains dangerous patterns
         """
         # Check for dangerous characters
-        for char in InputValidator.SHELL_DANGEROUS_CHARS:
-            if char in command:
-                raise SecurityError(
-                    f"Dangerous character '{char}' detected in command"
-                )
+        match = InputValidator.SHELL_DANGEROUS_PATTERN.search(command)
+        if match:
+            raise SecurityError(
+                f"Dangerous character '{match.group()}' detected in command"
+            )
         
         # If whitelist provided, check command starts with allowed prefix
         if allowed_commands:
-            command_start = command.split()[0] if command.split() else ""
-            if not any(command_start.startswith(cmd) for cmd in allowed_commands):
+            parts = command.split(maxsplit=1)
+            command_start = parts[0] if parts else ""
+            if not command_start.startswith(tuple(allowed_commands)):
                 raise SecurityError(
                     f"Command '{command_start}' not in allowed list"
                 )
@@ -123,7 +149,7 @@ class InputValidator:
         parts = image_name.split("/")
         image_part = parts[-1]
         
-        if not InputValidator.DOCKER_IMAGE_PATTERN.match(image_part):
+        if not InputValidator.DOCKER_IMAGE_PATTERN.fullmatch(image_part):
             raise SecurityError(
                 f"Invalid Docker image name: {image_name}"
             )
@@ -150,18 +176,11 @@ class InputValidator:
         Raises:
             SecurityError: If URL is invalid
         """
-        if not InputValidator.GITHUB_URL_PATTERN.match(url.rstrip("/")):
+        match = InputValidator.GITHUB_URL_PATTERN.fullmatch(url.rstrip("/"))
+        if not match:
             raise SecurityError(f"Invalid GitHub URL: {url}")
         
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip("/").split("/")
-        
-        if len(path_parts) < 2:
-            raise SecurityError(f"Invalid GitHub URL format: {url}")
-        
-        owner, repo = path_parts[0], path_parts[1].replace(".git", "")
-        
-        return owner, repo
+        return match["owner"], match["repo"]
     
     @staticmethod
     def validate_env_var_name(name: str) -> bool:
@@ -196,17 +215,12 @@ class InputValidator:
         Returns:
             Sanitized value
         """
-        # Remove any template injection attempts
-        dangerous_patterns = [
-            r'\{\{.*\}\}',  # Jinja2 expressions
-            r'\{%.*%\}',    # Jinja2 statements
-            r'<script',     # XSS
-            r'javascript:',  # XSS
-        ]
-        
-        sanitized = value
-        for pattern in dangerous_patterns:
-            sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE)
+        # Remove any template injection attempts. Repeat until nothing
+        # matches, since a removal can splice together a new match
+        # (e.g. "<scr{{x}}ipt")
+        sanitized, count = InputValidator.TEMPLATE_INJECTION_PATTERN.subn('', value)
+        while count:
+            sanitized, count = InputValidator.TEMPLATE_INJECTION_PATTERN.subn('', sanitized)
         
         return sanitized
 
@@ -216,16 +230,31 @@ class SecretsMasker:
     Masks secrets in logs and output to prevent exposure.
     """
     
-    # Common secret patterns
+    # Common secret patterns (GENERIC_TOKEN last: specific ones win)
     SECRET_PATTERNS = [
         (re.compile(r'(ghp_[a-zA-Z0-9]{36})'), 'GITHUB_TOKEN'),
         (re.compile(r'(gho_[a-zA-Z0-9]{36})'), 'GITHUB_OAUTH_TOKEN'),
         (re.compile(r'(AIza[a-zA-Z0-9_-]{35})'), 'GOOGLE_API_KEY'),
-        (re.compile(r'([a-zA-Z0-9_-]{40})'), 'GENERIC_TOKEN'),
         (re.compile(r'(sk-[a-zA-Z0-9]{48})'), 'OPENAI_KEY'),
         (re.compile(r'(xox[baprs]-[a-zA-Z0-9-]+)'), 'SLACK_TOKEN'),
+        (re.compile(r'([a-zA-Z0-9_-]{40})'), 'GENERIC_TOKEN'),
     ]
     
+    # The prefixed SECRET_PATTERNS as one alternation, so text is scanned
+    # once; the named group that matched gives the mask label
+    COMBINED_PATTERN = re.compile(
+        '|'.join(f'(?P<{name}>{pattern.pattern})' for pattern, name in SECRET_PATTERNS[:-1])
+    )
+    
+    # GENERIC_TOKEN has no literal prefix, so the regex engine would try it
+    # at every position; it only runs when _has_token_run finds a candidate
+    GENERIC_TOKEN_PATTERN = SECRET_PATTERNS[-1][0]
+    
+    # Common env var assignments, e.g. "password=hunter2"
+    ENV_VAR_PATTERN = re.compile(
+        r'(password|token|key|secret)[\s=:]+[^\s]+', re.IGNORECASE
+    )
+    
     @staticmethod
     def mask_secrets(text: str) -> str:
         """
@@ -237,18 +266,12 @@ class SecretsMasker:
         Returns:
             Text with secrets masked
         """
-        masked = text
-        
-        for pattern, name in SecretsMasker.SECRET_PATTERNS:
-            masked = pattern.sub(f'***{name}***', masked)
+        masked = SecretsMasker.COMBINED_PATTERN.sub(_mask_match, text)
+        if _has_token_run(masked):
+            masked = SecretsMasker.GENERIC_TOKEN_PATTERN.sub('***GENERIC_TOKEN***', masked)
         
         # Also mask common env var patterns
-        masked = re.sub(
-            r'(password|token|key|secret)[\s=:]+[^\s]+',
-            r'\1=***REDACTED***',
-            masked,
-            flags=re.IGNORECASE
-        )
+        masked = SecretsMasker.ENV_VAR_PATTERN.sub(r'\1=***REDACTED***', masked)
         
         return masked
     
@@ -267,7 +290,7 @@ class SecretsMasker:
         
         for key, value in data.items():
             # Check if key suggests a secret
-            if any(word in key.lower() for word in ['password', 'token', 'key', 'secret']):
+            if _key_is_secret(key.lower()):
                 masked[key] = '***REDACTED***'
             elif isinstance(value, dict):
                 masked[key] = SecretsMasker.mask_dict(value)
@@ -279,6 +302,37 @@ class SecretsMasker:
         return masked
 
 
+# Words in a dict key that mark its value as a secret
+_SECRET_KEY_WORDS = ('password', 'token', 'key', 'secret')
+
+
+# Byte table marking GENERIC_TOKEN's charset [a-zA-Z0-9_-] as 1, else 0,
+# and the run of marks a GENERIC_TOKEN match needs
+_TOKEN_CHAR_MARKS = bytes(
+    1 if chr(i).isascii() and (chr(i).isalnum() or chr(i) in '_-') else 0
+    for i in range(256)
+)
+_TOKEN_RUN = b'\x01' * 40
+
+
+def _has_token_run(text: str) -> bool:
+    """Whether text has 40 consecutive token characters, in two C-level passes."""
+    # Dropping non-UTF-8-encodable characters can only join runs, so this
+    # errs towards running the regex
+    return _TOKEN_RUN in text.encode('utf-8', 'ignore').translate(_TOKEN_CHAR_MARKS)
+
+
+def _mask_match(match: re.Match) -> str:
+    """Replace a SecretsMasker.COMBINED_PATTERN match with its label."""
+    return f'***{match.lastgroup}***'
+
+
+@functools.lru_cache(maxsize=1024)
+def _key_is_secret(key_lower: str) -> bool:
+    """Whether a lowercased dict key suggests a secret value."""
+    return any(word in key_lower for word in _SECRET_KEY_WORDS)
+
+
 # Convenience functions
 def validate_path(path: str, base_dir: Optional[Path] = None) -> Path:
     """Validate and sanitize a file path."""
@@ -9,15 +9,270 @@ Provides:
 """
 
 import asyncio
+import hashlib
 import json
 import os
+import re
+import tempfile
+import time
+import weakref
 from dataclasses import dataclass, field
-from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Callable
+from typing import Optional, Dict, Any, List, Callable, Tuple, Union
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
 
 from ..core.logger import get_logger
-from ..core.executor import CommandExecutor
+from ..core.executor import CommandExecutor, CommandResult
+from ..utils.helpers import json_dumps, json_dumps_bytes, json_loads
+
+
+# Shared provider download cache, so a first init in a new working dir
+# links already-downloaded plugins instead of fetching them again
+PLUGIN_CACHE_DIR = Path.home() / ".terraform.d" / "plugin-cache"
+
+# (working dir, backend config) -> fingerprint of that dir after its last
+# successful init; init is skipped while the fingerprint is unchanged
+_INIT_CACHE: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Tuple[int, ...]] = {}
+
+# Last `terraform output -json` per working dir, tagged with the state
+# lineage and serial it was read at
+OUTPUTS_CACHE_DIR = Path.home() / ".devops_agent" / "tf_outputs"
+
+# Fingerprint of the config, variables and provider locks behind the last
+# successful deploy per working dir, with the state serial it left behind
+DEPLOY_CACHE_DIR = Path.home() / ".devops_agent" / "tf_deploys"
+
+# Fingerprint of each working dir's config as of its last successful validate
+VALIDATE_CACHE_DIR = Path.home() / ".devops_agent" / "tf_validate"
+
+# Files whose contents decide what a deploy does
+_CONFIG_SUFFIXES = (".tf", ".tf.json", ".tfvars", ".tfvars.json")
+
+# Lineage and serial near the top of a local state file
+_STATE_SERIAL_RE = re.compile(rb'"serial":\s*(\d+),\s*"lineage":\s*"([^"]+)"')
+
+# How many state-changing Terraform commands (init, plan, apply, destroy,
+# refresh, import) may run at once per event loop; each one starts its own
+# provider plugins. Read-only commands aren't limited. An unparsable
+# DEVPILOT_TF_CONCURRENCY falls back to the default.
+TF_CONCURRENCY = min(os.cpu_count() or 1, 4)
+try:
+    TF_CONCURRENCY = max(1, int(os.getenv("DEVPILOT_TF_CONCURRENCY", TF_CONCURRENCY)))
+except ValueError:
+    pass
+_TF_SLOTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Result of `terraform version` once Terraform was found; a missing binary
+# is probed again, since it may be installed while the process runs
+_installed: Optional[Tuple[bool, Optional[str]]] = None
+
+
+def _tf_slots() -> asyncio.Semaphore:
+    """The running loop's semaphore for heavy Terraform commands."""
+    loop = asyncio.get_running_loop()
+    slots = _TF_SLOTS.get(loop)
+    if slots is None:
+        slots = _TF_SLOTS[loop] = asyncio.Semaphore(TF_CONCURRENCY)
+    return slots
+
+
+def _hash_config(terraform_dir: Path):
+    """
+    Start a digest of the config and tfvars files under the dir (skipping
+    dot dirs like .terraform) and the provider lock file. BLAKE3 when
+    available.
+    """
+    hasher = blake3() if BLAKE3_AVAILABLE else hashlib.sha256()
+    for root, dirs, files in os.walk(terraform_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(_CONFIG_SUFFIXES) or name == ".terraform.lock.hcl":
+                path = Path(root) / name
+                hasher.update(str(path.relative_to(terraform_dir)).encode() + b"\0")
+                hasher.update(path.read_bytes() + b"\0")
+    return hasher
+
+
+def _validate_fingerprint(working_dir: Path) -> Optional[str]:
+    """
+    Digest of what `terraform validate` checks: the config, plus the
+    installed providers and modules whose schemas it is checked against.
+    None if the dir was never initialized.
+    """
+    installed = _init_fingerprint(working_dir)
+    if installed is None:
+        return None
+    hasher = _hash_config(working_dir)
+    hasher.update(repr(installed).encode())
+    return hasher.hexdigest()
+
+
+def _deploy_fingerprint(
+    terraform_dir: Path, var_file: Optional[str], variables: Optional[Dict[str, str]]
+) -> str:
+    """
+    Digest of everything a deploy depends on apart from the state.
+    
+    Covers the config (see _hash_config), the var file, the variable
+    overrides and TF_VAR_* environment variables.
+    """
+    hasher = _hash_config(terraform_dir)
+    if var_file:
+        try:
+            hasher.update((terraform_dir / var_file).read_bytes())
+        except OSError:
+            hasher.update(b"\0missing var file")
+    tf_vars = sorted(
+        (key, value) for key, value in os.environ.items() if key.startswith("TF_VAR_")
+    )
+    hasher.update(json_dumps_bytes([sorted((variables or {}).items()), tf_vars]))
+    return hasher.hexdigest()
+
+
+def _terraform_env() -> Optional[Dict[str, str]]:
+    """
+    Environment defaults for unattended Terraform runs.
+    
+    Shares one provider cache across working dirs, and turns off the
+    version checkpoint call and interactive hints. Anything already set in
+    the environment wins. Terraform only links cached providers that the
+    lock file already vouches for; set
+    TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE=1 to also use them for
+    dirs without a lock file entry, at the cost of incomplete checksums.
+    """
+    defaults = {
+        "TF_PLUGIN_CACHE_DIR": str(PLUGIN_CACHE_DIR),
+        "TF_IN_AUTOMATION": "1",
+        "CHECKPOINT_DISABLE": "1",
+    }
+    env = {key: value for key, value in defaults.items() if key not in os.environ}
+    if "TF_PLUGIN_CACHE_DIR" in env:
+        PLUGIN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return env or None
+
+
+def _init_fingerprint(working_dir: Path) -> Optional[Tuple[int, ...]]:
+    """
+    Modification times that change whenever init would do new work.
+    
+    Covers the provider lock file, the installed providers and modules, and
+    the newest *.tf file (a newly added module or provider needs init).
+    Returns None if the directory was never initialized.
+    """
+    try:
+        stamps = [
+            (working_dir / ".terraform").stat().st_mtime_ns,
+            (working_dir / ".terraform.lock.hcl").stat().st_mtime_ns,
+        ]
+    except FileNotFoundError:
+        return None
+    for sub in ("providers", "modules"):
+        try:
+            stamps.append((working_dir / ".terraform" / sub).stat().st_mtime_ns)
+        except FileNotFoundError:
+            stamps.append(0)
+    newest_tf = 0
+    with os.scandir(working_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".tf") and entry.is_file():
+                newest_tf = max(newest_tf, entry.stat().st_mtime_ns)
+    stamps.append(newest_tf)
+    return tuple(stamps)
+
+
+def _state_serial(working_dir: Path) -> Optional[Tuple[str, int]]:
+    """
+    Lineage and serial of the working dir's local state.
+    
+    Terraform bumps the serial on every state write, so together they
+    identify the outputs exactly. Returns None when the state isn't the
+    default local terraform.tfstate (remote backend, custom path, other
+    workspace) or can't be read.
+    """
+    if os.environ.get("TF_WORKSPACE", "default") != "default":
+        return None
+    try:
+        if (working_dir / ".terraform" / "environment").read_text().strip() != "default":
+            return None
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return None
+    
+    try:
+        backend = json_loads(
+            (working_dir / ".terraform" / "terraform.tfstate").read_bytes()
+        ).get("backend") or {}
+    except FileNotFoundError:
+        backend = {}
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+    if backend and (
+        backend.get("type") != "local" or (backend.get("config") or {}).get("path")
+    ):
+        return None
+    
+    try:
+        with open(working_dir / "terraform.tfstate", "rb") as f:
+            head = f.read(4096)
+    except OSError:
+        return None
+    match = _STATE_SERIAL_RE.search(head)
+    if not match:
+        return None
+    return match.group(2).decode(), int(match.group(1))
+
+
+def _cache_file(cache_dir: Path, working_dir: Path) -> Path:
+    digest = hashlib.sha256(str(working_dir.resolve()).encode()).hexdigest()
+    return cache_dir / f"{digest[:32]}.json"
+
+
+def _read_outputs_cache(working_dir: Path, serial: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+    """Cached outputs for the working dir, if read at this state serial."""
+    try:
+        cached = json_loads(_cache_file(OUTPUTS_CACHE_DIR, working_dir).read_bytes())
+    except (OSError, json.JSONDecodeError):
+        return None
+    if [cached.get("lineage"), cached.get("serial")] != list(serial):
+        return None
+    return cached.get("outputs")
+
+
+def _write_cache_file(cache_file: Path, data: Dict[str, Any]) -> None:
+    """Atomically store a cache entry; caches are best-effort, so errors are ignored."""
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(json_dumps(data))
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        tmp_file.unlink(missing_ok=True)
+
+
+def _write_outputs_cache(
+    working_dir: Path, serial: Tuple[str, int], outputs: Dict[str, Any]
+) -> None:
+    _write_cache_file(
+        _cache_file(OUTPUTS_CACHE_DIR, working_dir),
+        {"lineage": serial[0], "serial": serial[1], "outputs": outputs},
+    )
+
+
+def _drop_outputs_cache(working_dir: Path) -> None:
+    try:
+        _cache_file(OUTPUTS_CACHE_DIR, working_dir).unlink(missing_ok=True)
+    except OSError:
+        pass
 
 
 @dataclass
@@ -78,19 +333,91 @@ class TerraformClient:
         self.backend_config = backend_config or {}
         self.logger = get_logger("TerraformClient")
         self.executor = CommandExecutor(working_dir=self.working_dir)
+        # Last outputs read by this client, with the local state serial (or
+        # None for remote state) they were read at
+        self._outputs: Optional[Tuple[Optional[Tuple[str, int]], Dict[str, Any]]] = None
+    
+    async def _run(self, argv: List[str], **kwargs) -> CommandResult:
+        """Run a Terraform command with the automation environment."""
+        return await self.executor.run(argv, env=_terraform_env(), **kwargs)
+    
+    def _var_args(self, var_overrides: Dict[str, str] = None) -> List[str]:
+        """-var-file and -var arguments for the client's vars plus overrides."""
+        args = [f"-var-file={self.var_file}"] if self.var_file else []
+        if var_overrides:
+            args.extend(f"-var={key}={value}" for key, value in var_overrides.items())
+        return args
+    
+    @classmethod
+    async def prewarm(cls, providers: Union[List[str], Dict[str, str]]) -> bool:
+        """
+        Seed the plugin cache by initializing a throwaway configuration.
+        
+        Later inits in real working dirs then link the cached providers
+        instead of downloading them.
+        
+        Args:
+            providers: Provider source addresses (e.g. "hashicorp/google"),
+                or a mapping of source address to version constraint
+            
+        Returns:
+            True if successful
+        """
+        if not isinstance(providers, dict):
+            providers = dict.fromkeys(providers)
+        
+        blocks = []
+        for source, version in providers.items():
+            local_name = re.sub(r"[^a-z0-9_-]", "_", source.rsplit("/", 1)[-1].lower())
+            block = f'    {local_name} = {{ source = "{source}"'
+            if version:
+                block += f', version = "{version}"'
+            blocks.append(block + " }")
+        versions_tf = (
+            "terraform {\n  required_providers {\n"
+            + "\n".join(blocks)
+            + "\n  }\n}\n"
+        )
+        
+        with tempfile.TemporaryDirectory(prefix="tf-prewarm-") as tmp:
+            (Path(tmp) / "versions.tf").write_text(versions_tf)
+            client = cls(working_dir=Path(tmp))
+            async with _tf_slots():
+                result = await client._run(
+                    ["terraform", "init", "-backend=false", "-input=false"],
+                    timeout=300,
+                )
+        
+        if not result.success:
+            client.logger.warning(f"Plugin cache prewarm failed: {result.stderr}")
+        return result.success
     
     async def check_installed(self) -> tuple[bool, Optional[str]]:
-        """Check if Terraform is installed and return version."""
-        result = await self.executor.run("terraform version -json", timeout=10)
+        """Check if Terraform is installed and return version (cached per process)."""
+        # Concurrent first calls may each probe once; that's harmless, and
+        # a module-level asyncio.Lock would be tied to one event loop
+        global _installed
+        if _installed is not None:
+            return _installed
+        result = await self._probe_installed()
+        if result[0]:
+            _installed = result
+        return result
+    
+    async def _probe_installed(self) -> tuple[bool, Optional[str]]:
+        """Run `terraform version` to find the installed version."""
+        result = await self._run(
+            ["terraform", "version", "-json"], timeout=10
+        )
         
         if result.success:
             try:
-                data = json.loads(result.stdout)
+                data = json_loads(result.stdout)
                 version = data.get("terraform_version", "unknown")
                 return True, version
             except json.JSONDecodeError:
                 # Fallback to text parsing
-                return True, result.stdout.split("\n")[0]
+                return True, result.stdout.partition("\n")[0]
         
         return False, None
     
@@ -111,32 +438,38 @@ class TerraformClient:
         Returns:
             True if successful
         """
-        self.logger.info("Initializing Terraform...")
-        
-        cmd_parts = ["terraform", "init"]
-        
-        if upgrade:
-            cmd_parts.append("-upgrade")
-        
-        if reconfigure:
-            cmd_parts.append("-reconfigure")
-        
-        # Add backend config
-        for key, value in self.backend_config.items():
-            cmd_parts.append(f"-backend-config={key}={value}")
+        cache_key = (
+            str(self.working_dir.resolve()),
+            tuple(sorted(self.backend_config.items())),
+        )
+        if not (upgrade or reconfigure):
+            fingerprint = _init_fingerprint(self.working_dir)
+            if fingerprint is not None and _INIT_CACHE.get(cache_key) == fingerprint:
+                self.logger.info("Terraform already initialized, skipping init")
+                return True
         
-        cmd_parts.append("-input=false")
+        self.logger.info("Initializing Terraform...")
         
-        cmd = " ".join(cmd_parts)
+        cmd_parts = [
+            "terraform", "init",
+            *(("-upgrade",) if upgrade else ()),
+            *(("-reconfigure",) if reconfigure else ()),
+            *(f"-backend-config={key}={value}" for key, value in self.backend_config.items()),
+            "-input=false",
+        ]
         
-        result = await self.executor.run(
-            cmd,
-            timeout=300,
-            stream_output=on_output is not None,
-            on_output=on_output,
-        )
+        async with _tf_slots():
+            result = await self._run(
+                cmd_parts,
+                timeout=300,
+                stream_output=on_output is not None,
+                on_output=on_output,
+            )
         
         if result.success:
+            fingerprint = _init_fingerprint(self.working_dir)
+            if fingerprint is not None:
+                _INIT_CACHE[cache_key] = fingerprint
             self.logger.info("Terraform initialized successfully")
         else:
             self.logger.error(f"Terraform init failed: {result.stderr}")
@@ -147,22 +480,37 @@ class TerraformClient:
         """
         Validate Terraform configuration.
         
+        Skipped when the config and installed providers are unchanged
+        since the last successful validate.
+        
         Returns:
             Tuple of (is_valid, error_messages)
         """
-        result = await self.executor.run(
-            "terraform validate -json",
+        cache_file = _cache_file(VALIDATE_CACHE_DIR, self.working_dir)
+        fingerprint = _validate_fingerprint(self.working_dir)
+        if fingerprint is not None:
+            try:
+                cached = json_loads(cache_file.read_bytes())
+            except (OSError, json.JSONDecodeError):
+                cached = {}
+            if cached.get("fingerprint") == fingerprint:
+                return True, []
+        
+        result = await self._run(
+            ["terraform", "validate", "-json"],
             timeout=60,
         )
         
         try:
-            data = json.loads(result.stdout)
+            data = json_loads(result.stdout)
             is_valid = data.get("valid", False)
             errors = [
                 diag.get("summary", "")
                 for diag in data.get("diagnostics", [])
                 if diag.get("severity") == "error"
             ]
+            if is_valid and fingerprint is not None:
+                _write_cache_file(cache_file, {"fingerprint": fingerprint})
             return is_valid, errors
         except json.JSONDecodeError:
             return result.success, [result.stderr] if not result.success else []
@@ -173,6 +521,7 @@ class TerraformClient:
         var_overrides: Dict[str, str] = None,
         target: str = None,
         on_output: Callable[[str], None] = None,
+        on_output_fd: Optional[int] = None,
     ) -> TerraformPlan:
         """
         Create Terraform plan.
@@ -182,6 +531,7 @@ class TerraformClient:
             var_overrides: Variable overrides
             target: Specific resource to target
             on_output: Callback for streaming output
+            on_output_fd: File descriptor that gets the raw -json output
             
         Returns:
             TerraformPlan with changes summary
@@ -190,64 +540,98 @@ class TerraformClient:
         
         plan = TerraformPlan(success=False, plan_file=out_file)
         
-        cmd_parts = ["terraform", "plan", "-input=false"]
+        # Read progress and counts from the -json messages as they arrive
+        progress = _JsonProgress(on_output)
+        cmd_parts = [
+            "terraform", "plan", "-input=false", "-json",
+            *((f"-out={out_file}",) if out_file else ()),
+            *self._var_args(var_overrides),
+            *((f"-target={target}",) if target else ()),
+        ]
         
-        if out_file:
-            cmd_parts.append(f"-out={out_file}")
-        
-        if self.var_file:
-            cmd_parts.append(f"-var-file={self.var_file}")
-        
-        if var_overrides:
-            for key, value in var_overrides.items():
-                cmd_parts.append(f"-var={key}={value}")
-        
-        if target:
-            cmd_parts.append(f"-target={target}")
-        
-        cmd = " ".join(cmd_parts)
-        
-        result = await self.executor.run(
-            cmd,
-            timeout=600,
-            stream_output=on_output is not None,
-            on_output=on_output,
-        )
+        async with _tf_slots():
+            result = await self._run(
+                cmd_parts,
+                timeout=600,
+                stream_output=True,
+                on_output=progress.feed,
+                on_output_fd=on_output_fd,
+            )
         
         plan.success = result.success
-        plan.output = result.output
+        plan.output = "\n".join(progress.messages)
         
         if result.success:
-            # Parse plan output for changes
-            plan.has_changes = "No changes" not in result.stdout
-            
-            # Try to parse change counts
-            import re
-            match = re.search(
-                r"(\d+) to add, (\d+) to change, (\d+) to destroy",
-                result.output
-            )
-            if match:
-                plan.add = int(match.group(1))
-                plan.change = int(match.group(2))
-                plan.destroy = int(match.group(3))
-                plan.has_changes = (plan.add + plan.change + plan.destroy) > 0
+            summary = progress.summaries.get("plan")
+            if summary is not None:
+                plan.add = summary.get("add", 0)
+                plan.change = summary.get("change", 0)
+                plan.destroy = summary.get("remove", 0)
+                plan.has_changes = bool(
+                    plan.add or plan.change or plan.destroy or progress.outputs_changed
+                )
+            else:
+                # No summary in the stream; read the saved plan instead
+                counts = await self._plan_counts(out_file) if out_file else None
+                if counts is not None:
+                    plan.add, plan.change, plan.destroy, plan.has_changes = counts
+                else:
+                    # Unknown, so don't let a caller skip the apply
+                    plan.has_changes = True
             
             self.logger.info(
                 f"Plan complete: +{plan.add} ~{plan.change} -{plan.destroy}"
             )
         else:
-            plan.errors.append(result.stderr)
-            self.logger.error(f"Plan failed: {result.stderr}")
+            plan.errors.extend(progress.errors or [result.stderr])
+            self.logger.error(f"Plan failed: {'; '.join(plan.errors)}")
         
         return plan
     
+    async def _plan_counts(
+        self, plan_file: str
+    ) -> Optional[Tuple[int, int, int, bool]]:
+        """
+        Count planned changes from `terraform show -json <plan_file>`.
+        
+        Returns (add, change, destroy, has_changes), or None if the plan
+        can't be read. A replacement counts as one add and one destroy,
+        like Terraform's own summary; output-only changes set has_changes.
+        """
+        result = await self._run(
+            ["terraform", "show", "-json", plan_file],
+            timeout=120,
+        )
+        if not result.success:
+            return None
+        try:
+            data = json_loads(result.stdout)
+        except json.JSONDecodeError:
+            return None
+        
+        add = change = destroy = 0
+        for resource_change in data.get("resource_changes") or []:
+            actions = resource_change.get("change", {}).get("actions", ())
+            if "create" in actions:
+                add += 1
+            if "update" in actions:
+                change += 1
+            if "delete" in actions:
+                destroy += 1
+        
+        outputs_changed = any(
+            output.get("actions") != ["no-op"]
+            for output in (data.get("output_changes") or {}).values()
+        )
+        return add, change, destroy, bool(add or change or destroy or outputs_changed)
+    
     async def apply(
         self,
         plan_file: str = None,
         auto_approve: bool = False,
         var_overrides: Dict[str, str] = None,
         on_output: Callable[[str], None] = None,
+        on_output_fd: Optional[int] = None,
     ) -> TerraformApplyResult:
         """
         Apply Terraform changes.
@@ -257,6 +641,7 @@ class TerraformClient:
             auto_approve: Skip approval prompt
             var_overrides: Variable overrides
             on_output: Callback for streaming output
+            on_output_fd: File descriptor that gets the raw output
             
         Returns:
             TerraformApplyResult with outputs
@@ -264,57 +649,56 @@ class TerraformClient:
         self.logger.info("Applying Terraform changes...")
         
         result = TerraformApplyResult(success=False)
-        start_time = datetime.now()
-        
-        cmd_parts = ["terraform", "apply", "-input=false"]
-        
-        if auto_approve:
-            cmd_parts.append("-auto-approve")
+        start = time.perf_counter()
         
-        if plan_file:
-            cmd_parts.append(plan_file)
-        else:
-            if self.var_file:
-                cmd_parts.append(f"-var-file={self.var_file}")
-            
-            if var_overrides:
-                for key, value in var_overrides.items():
-                    cmd_parts.append(f"-var={key}={value}")
+        # Machine-readable output gives an exact change summary. Terraform
+        # only allows it when no approval prompt is needed (and with
+        # -input=false it won't apply without one anyway).
+        progress = None
+        if plan_file or auto_approve:
+            progress = _JsonProgress(on_output)
+            on_output = progress.feed
         
-        cmd = " ".join(cmd_parts)
+        # A saved plan already carries its variables
+        cmd_parts = [
+            "terraform", "apply", "-input=false",
+            *(("-json",) if progress else ()),
+            *(("-auto-approve",) if auto_approve else ()),
+            *((plan_file,) if plan_file else self._var_args(var_overrides)),
+        ]
         
-        exec_result = await self.executor.run(
-            cmd,
-            timeout=1200,  # 20 minute timeout
-            stream_output=on_output is not None,
-            on_output=on_output,
-        )
+        async with _tf_slots():
+            exec_result = await self._run(
+                cmd_parts,
+                timeout=1200,  # 20 minute timeout
+                stream_output=on_output is not None or on_output_fd is not None,
+                on_output=on_output,
+                on_output_fd=on_output_fd,
+            )
         
+        self._forget_outputs()
         result.success = exec_result.success
-        result.duration_seconds = (datetime.now() - start_time).total_seconds()
+        result.duration_seconds = time.perf_counter() - start
         
         if exec_result.success:
             # Get outputs
             result.outputs = await self.get_outputs()
             
-            # Parse resource counts
-            import re
-            match = re.search(
-                r"(\d+) added, (\d+) changed, (\d+) destroyed",
-                exec_result.output
-            )
-            if match:
-                result.resources_created = int(match.group(1))
-                result.resources_updated = int(match.group(2))
-                result.resources_destroyed = int(match.group(3))
+            # Resource counts from the apply's change summary
+            summary = progress.summaries.get("apply") if progress else None
+            if summary is not None:
+                result.resources_created = summary.get("add", 0)
+                result.resources_updated = summary.get("change", 0)
+                result.resources_destroyed = summary.get("remove", 0)
             
             self.logger.info(
                 f"Apply complete: +{result.resources_created} "
                 f"~{result.resources_updated} -{result.resources_destroyed}"
             )
         else:
-            result.errors.append(exec_result.stderr)
-            self.logger.error(f"Apply failed: {exec_result.stderr}")
+            # With -json, errors arrive as diagnostics on stdout
+            result.errors.extend((progress and progress.errors) or [exec_result.stderr])
+            self.logger.error(f"Apply failed: {'; '.join(result.errors)}")
         
         return result
     
@@ -337,25 +721,21 @@ class TerraformClient:
         """
         self.logger.warning("Destroying Terraform infrastructure...")
         
-        cmd_parts = ["terraform", "destroy", "-input=false"]
-        
-        if auto_approve:
-            cmd_parts.append("-auto-approve")
-        
-        if self.var_file:
-            cmd_parts.append(f"-var-file={self.var_file}")
+        cmd_parts = [
+            "terraform", "destroy", "-input=false",
+            *(("-auto-approve",) if auto_approve else ()),
+            *self._var_args(),
+            *((f"-target={target}",) if target else ()),
+        ]
         
-        if target:
-            cmd_parts.append(f"-target={target}")
-        
-        cmd = " ".join(cmd_parts)
-        
-        result = await self.executor.run(
-            cmd,
-            timeout=1200,
-            stream_output=on_output is not None,
-            on_output=on_output,
-        )
+        async with _tf_slots():
+            result = await self._run(
+                cmd_parts,
+                timeout=1200,
+                stream_output=on_output is not None,
+                on_output=on_output,
+            )
+        self._forget_outputs()
         
         if result.success:
             self.logger.info("Destroy complete")
@@ -365,48 +745,94 @@ class TerraformClient:
         return result.success
     
     async def get_outputs(self) -> Dict[str, Any]:
-        """Get Terraform outputs."""
-        result = await self.executor.run(
-            "terraform output -json",
+        """
+        Get Terraform outputs.
+        
+        Each client remembers the outputs it read until one of its own
+        commands writes the state. With local state, outputs are also
+        cached on disk per state serial, so repeat calls from any client
+        skip Terraform until the state is written again.
+        """
+        serial = _state_serial(self.working_dir)
+        if self._outputs is not None and self._outputs[0] == serial:
+            return dict(self._outputs[1])
+        if serial is not None:
+            cached = _read_outputs_cache(self.working_dir, serial)
+            if cached is not None:
+                self._outputs = (serial, cached)
+                return dict(cached)
+        
+        result = await self._run(
+            ["terraform", "output", "-json"],
             timeout=30,
         )
         
         if result.success:
             try:
-                data = json.loads(result.stdout)
+                data = json_loads(result.stdout)
                 # Extract just the values
-                return {
+                outputs = {
                     key: info.get("value")
                     for key, info in data.items()
                 }
             except json.JSONDecodeError:
                 pass
+            else:
+                # Sensitive values stay in the state file only
+                if serial is not None and not any(
+                    info.get("sensitive") for info in data.values()
+                ):
+                    _write_outputs_cache(self.working_dir, serial, outputs)
+                self._outputs = (serial, outputs)
+                return dict(outputs)
         
         return {}
     
+    def _forget_outputs(self) -> None:
+        """Drop remembered outputs after a command that writes the state."""
+        self._outputs = None
+        _drop_outputs_cache(self.working_dir)
+    
     async def get_state(self) -> TerraformState:
         """Get current Terraform state information."""
         state = TerraformState(exists=False)
         
-        # Check if state exists
-        result = await self.executor.run(
-            "terraform state list",
-            timeout=30,
-        )
+        # One read-only `show -json` has both the resources and the outputs
+        result = await self._run(["terraform", "show", "-json"], timeout=30)
+        if not result.success:
+            return state
+        try:
+            values = json_loads(result.stdout).get("values") or {}
+        except (json.JSONDecodeError, AttributeError):
+            return state
         
-        if result.success and result.stdout.strip():
+        resources = []
+        modules = [values.get("root_module") or {}]
+        while modules:
+            module = modules.pop()
+            resources.extend(r["address"] for r in module.get("resources", ()))
+            modules.extend(module.get("child_modules", ()))
+        
+        # Check if state exists
+        if resources:
             state.exists = True
-            state.resources = result.stdout.strip().split("\n")
-            state.outputs = await self.get_outputs()
+            state.resources = sorted(resources)
+            state.outputs = {
+                key: info.get("value")
+                for key, info in (values.get("outputs") or {}).items()
+            }
+            self._outputs = (_state_serial(self.working_dir), dict(state.outputs))
         
         return state
     
     async def refresh(self) -> bool:
         """Refresh Terraform state."""
-        result = await self.executor.run(
-            "terraform refresh -input=false",
-            timeout=300,
-        )
+        async with _tf_slots():
+            result = await self._run(
+                ["terraform", "refresh", "-input=false"],
+                timeout=300,
+            )
+        self._forget_outputs()
         return result.success
     
     async def import_resource(
@@ -424,45 +850,142 @@ class TerraformClient:
         Returns:
             True if successful
         """
-        result = await self.executor.run(
-            f"terraform import {address} {resource_id}",
-            timeout=120,
-        )
+        async with _tf_slots():
+            result = await self._run(
+                ["terraform", "import", address, resource_id],
+                timeout=120,
+            )
+        self._forget_outputs()
         return result.success
 
 
+class _JsonProgress:
+    """
+    Incremental reader for Terraform's -json (NDJSON) output.
+    
+    Fed one line at a time by the executor's stream, it keeps the change
+    summaries, whether any output changes, and error diagnostics, and
+    forwards each message's human-readable text to the caller's callback.
+    """
+    
+    def __init__(self, on_output: Optional[Callable[[str], None]] = None):
+        self.on_output = on_output
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        self.outputs_changed = False
+        self.errors: List[str] = []
+        self.messages: List[str] = []
+    
+    def feed(self, line: str) -> None:
+        try:
+            message = json_loads(line)
+        except json.JSONDecodeError:
+            message = None
+        if not isinstance(message, dict):
+            # stderr, or anything else printed as plain text
+            if self.on_output:
+                self.on_output(line)
+            return
+        
+        text = message.get("@message", "")
+        self.messages.append(text)
+        kind = message.get("type")
+        if kind == "change_summary":
+            changes = message.get("changes") or {}
+            self.summaries[changes.get("operation", "plan")] = changes
+        elif kind == "outputs":
+            self.outputs_changed = self.outputs_changed or any(
+                output.get("action", "noop") != "noop"
+                for output in (message.get("outputs") or {}).values()
+            )
+        elif kind == "diagnostic":
+            diagnostic = message.get("diagnostic") or {}
+            if diagnostic.get("severity") == "error":
+                self.errors.append(diagnostic.get("summary") or text)
+        
+        if self.on_output:
+            self.on_output(text + "\n")
+
+
 # Convenience functions
 async def deploy_infrastructure(
     terraform_dir: Path,
     var_file: str = None,
     variables: Dict[str, str] = None,
     auto_approve: bool = True,
+    use_cache: bool = False,
 ) -> TerraformApplyResult:
     """
     Deploy infrastructure using Terraform.
     
+    With use_cache, a deploy whose config, provider locks and variables
+    are unchanged since the last successful one, against the local state
+    that deploy left behind, returns the current outputs without running
+    init, validate, plan or apply. That also skips the plan's check for
+    drift made outside Terraform, and changes to the backend or to
+    provider settings taken from the environment go unnoticed, so it is
+    off by default.
+    
     Args:
         terraform_dir: Directory containing Terraform files
         var_file: Variables file
         variables: Variable overrides
         auto_approve: Auto-approve changes
+        use_cache: Skip the pipeline when nothing has changed
         
     Returns:
         TerraformApplyResult
     """
     tf = TerraformClient(working_dir=terraform_dir, var_file=var_file)
+    cache_file = _cache_file(DEPLOY_CACHE_DIR, terraform_dir)
+    
+    if use_cache:
+        serial = _state_serial(terraform_dir)
+        if serial is not None:
+            try:
+                cached = json_loads(cache_file.read_bytes())
+            except (OSError, json.JSONDecodeError):
+                cached = {}
+            if [cached.get("lineage"), cached.get("serial")] == list(serial) and (
+                cached.get("fingerprint")
+                == _deploy_fingerprint(terraform_dir, var_file, variables)
+            ):
+                tf.logger.info("Infrastructure unchanged since last deploy, skipping")
+                return TerraformApplyResult(success=True, outputs=await tf.get_outputs())
     
+    result = await _deploy(tf, variables, auto_approve)
+    
+    if use_cache and result.success:
+        # Fingerprint after init, which may have written the lock file
+        serial = _state_serial(terraform_dir)
+        if serial is not None:
+            _write_cache_file(cache_file, {
+                "fingerprint": _deploy_fingerprint(terraform_dir, var_file, variables),
+                "lineage": serial[0],
+                "serial": serial[1],
+            })
+    return result
+
+
+async def _deploy(
+    tf: TerraformClient,
+    variables: Optional[Dict[str, str]],
+    auto_approve: bool,
+) -> TerraformApplyResult:
+    """Run init, validate, plan and (if needed) apply."""
     # Initialize
     if not await tf.init():
         return TerraformApplyResult(success=False, errors=["Init failed"])
     
-    # Validate
-    is_valid, errors = await tf.validate()
+    # Validate and plan concurrently. A failed validation discards the
+    # plan; it isn't cancelled, since killing terraform mid-plan can leave
+    # the state lock held.
+    (is_valid, errors), plan = await asyncio.gather(
+        tf.validate(),
+        tf.plan(var_overrides=variables),
+    )
     if not is_valid:
         return TerraformApplyResult(success=False, errors=errors)
     
-    # Plan
-    plan = await tf.plan(var_overrides=variables)
     if not plan.success:
         return TerraformApplyResult(success=False, errors=plan.errors)
     
@@ -9,13 +9,175 @@ This module handles cases where the system cannot determine clear answers:
 """
 
 import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import Counter
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, Dict, Any, List
+from itertools import chain, islice
+from typing import Optional, Dict, Any, List, Callable
 from pathlib import Path
 
 from ..core.logger import get_logger
 from ..core.gemini_client import GeminiClient
+from ..utils.helpers import json_dumps, json_dumps_bytes, json_loads, strip_fence, walk_scandir
+
+
+def _load_cache_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            data = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _unexpired(answers: Dict[str, Any], now: float) -> Dict[str, Dict[str, Any]]:
+    return {
+        key: entry for key, entry in answers.items()
+        if isinstance(entry, dict) and entry.get("expires", 0) > now
+    }
+
+
+def _save_cache_file(path: Path, data: Dict[str, Any]) -> None:
+    # Write then rename, so a concurrent reader never sees a partial file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp_path, "w") as f:
+        f.write(json_dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _port_code_excerpt(code_samples: List[str]) -> str:
+    """Distinct code samples, each trimmed to the part most likely to set the port."""
+    excerpts = []
+    for code in islice(dict.fromkeys(code_samples), PORT_PROMPT_SAMPLES):
+        if len(code) > PORT_PROMPT_SAMPLE_CHARS:
+            match = next(
+                filter(None, (pattern.search(code) for pattern in _PORT_PATTERNS)),
+                None,
+            ) or _PORT_HINT_RE.search(code)
+            start = max(0, match.start() - PORT_PROMPT_SAMPLE_CHARS // 2) if match else 0
+            start = min(start, len(code) - PORT_PROMPT_SAMPLE_CHARS)
+            code = code[start:start + PORT_PROMPT_SAMPLE_CHARS]
+        excerpts.append(code)
+    return "\n\n".join(excerpts)
+
+
+def _package_excerpt(content: str) -> str:
+    """The part of a package file that bears on how the app starts."""
+    # For package.json that's the entry point and scripts, not whatever
+    # happens to come first
+    try:
+        package = json_loads(content)
+    except ValueError:
+        package = None
+    if isinstance(package, dict) and ("scripts" in package or "main" in package):
+        content = json_dumps({k: package[k] for k in ("main", "scripts") if k in package})
+    return content[:PACKAGE_PROMPT_CHARS]
+
+
+def _start_command(template: str, default_entry_point: Optional[str], entry_point: Optional[str]) -> str:
+    if default_entry_point is None:
+        return template
+    return template.format(entry_point=entry_point or default_entry_point)
+
+
+def _list_files(project_path: Path, limit: int) -> str:
+    # scandir tells files from directories without a stat per entry, and
+    # the walk stops once enough files are found
+    walk = walk_scandir(os.fspath(project_path), ())
+    return "\n".join(islice(chain.from_iterable(files for _, _, files in walk), limit))
+
+
+# Source file extensions counted towards each language
+_LANG_EXTENSIONS = (
+    ("python", (".py",)),
+    ("nodejs", (".js", ".ts", ".jsx", ".tsx")),
+    ("go", (".go",)),
+    ("java", (".java",)),
+    ("rust", (".rs",)),
+)
+_EXT_TO_LANG = {ext: lang for lang, exts in _LANG_EXTENSIONS for ext in exts}
+
+# Default port for each framework
+_FRAMEWORK_PORTS = {
+    "flask": 5000,
+    "fastapi": 8000,
+    "express": 3000,
+    "spring": 8080,
+    "spring_boot": 8080,
+    "django": 8000,
+    "streamlit": 8501,
+    "gradio": 7860,
+}
+
+# Start commands as (template, default entry point). Templates with an entry
+# point get it filled in for "{entry_point}" only when they are used.
+_FRAMEWORK_START_COMMANDS = {
+    ("python", "flask"): ("flask run --host 0.0.0.0 --port 8080", None),
+    ("python", "fastapi"): ("uvicorn {entry_point}:app --host 0.0.0.0 --port 8080", "main"),
+    ("python", "django"): ("python manage.py runserver 0.0.0.0:8080", None),
+    ("python", "streamlit"): ("streamlit run {entry_point} --server.port 8080", "app.py"),
+    ("nodejs", "express"): ("node index.js", None),
+    ("nodejs", None): ("npm start", None),
+    ("go", None): ("./app", None),
+    ("rust", None): ("./target/release/app", None),
+}
+_GENERIC_START_COMMANDS = {
+    "python": ("python {entry_point}", "main.py"),
+    "nodejs": ("node index.js", None),
+    "go": ("./app", None),
+    "java": ("java -jar app.jar", None),
+    "rust": ("./app", None),
+}
+
+# Where code sets its listening port, in order of preference
+_PORT_PATTERNS = tuple(re.compile(p) for p in (
+    r"\.listen\((\d+)",  # app.listen(3000)
+    r"PORT\s*=\s*(\d+)",  # PORT = 8080
+    r"port\s*=\s*(\d+)",  # port = 5000
+    r"--port[= ](\d+)",  # --port=8000
+))
+
+# Code sent with a port question: up to this many distinct samples, each cut
+# to a window of this many characters around where it sets its port (one of
+# _PORT_PATTERNS, else a listen() call or the word "port" without a number)
+PORT_PROMPT_SAMPLES = 3
+PORT_PROMPT_SAMPLE_CHARS = 2048
+_PORT_HINT_RE = re.compile(r"\.listen\(|\bport\b", re.IGNORECASE)
+
+# Package file contents sent with a start-command question are cut to this
+PACKAGE_PROMPT_CHARS = 500
+
+# Outermost {...} in a reply that has text around its JSON
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Fixed instructions for each AI question. Prompts start with these and end
+# with the project-specific payload, so repeated questions share a prefix
+# that Gemini can serve from its implicit context cache.
+_PROJECT_TYPE_INSTRUCTIONS = """Analyze this project structure and determine the project type.
+
+Return JSON with:
+- type: "python", "nodejs", "go", "java", or "rust"
+- confidence: 0.0 to 1.0
+- reasoning: brief explanation
+
+Return ONLY valid JSON."""
+
+_PORT_INSTRUCTIONS = """Analyze this code and determine what port the application listens on.
+
+Return ONLY the port number as a single integer, nothing else."""
+
+_START_COMMAND_INSTRUCTIONS = """Determine the command to start this application.
+
+Return ONLY the command string, nothing else. Example: "uvicorn main:app --host 0.0.0.0 --port 8080\""""
+
+_BATCH_INSTRUCTIONS = """Answer each of the questions below about one application.
+
+Return ONLY valid JSON with one key per question heading; project_type and start_command as strings, port as an integer."""
 
 
 class UncertaintyLevel(Enum):
@@ -56,11 +218,100 @@ class UncertaintyHandler:
     4. Manual escalation (last resort)
     """
     
-    def __init__(self, gemini_client: Optional[GeminiClient] = None):
-        """Initialize uncertainty handler."""
+    def __init__(
+        self,
+        gemini_client: Optional[GeminiClient] = None,
+        cache_enabled: bool = True,
+        cache_ttl: float = 3600,
+        cache_file: Optional[Path] = None,
+        speculative_ai: bool = False,
+    ):
+        """
+        Initialize uncertainty handler.
+        
+        Args:
+            gemini_client: Client for AI analysis
+            cache_enabled: Reuse answers to identical AI questions
+            cache_ttl: Seconds an answer stays reusable
+            cache_file: JSON file to persist answers across runs
+                (memory only if None)
+            speculative_ai: Ask Gemini for the port while the code is still
+                being scanned, at the cost of a request the scan may make
+                unnecessary
+        """
         self.logger = get_logger("UncertaintyHandler")
         self.gemini = gemini_client or GeminiClient()
         
+        # AI answers by question digest, as {"expires": epoch, "value": ...}
+        # (loaded from cache_file on first use), plus in-flight questions so
+        # concurrent callers share one request
+        self.cache_enabled = cache_enabled
+        self.cache_ttl = cache_ttl
+        self.cache_file = cache_file
+        self._answers: Optional[Dict[str, Dict[str, Any]]] = None if cache_file else {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.speculative_ai = speculative_ai
+    
+    async def _ask_cached(
+        self, kind: str, prompt: str, parse: Callable[[str], Any]
+    ) -> Any:
+        """
+        Ask Gemini a question and parse the reply, reusing earlier answers.
+        
+        Only parsed (non-None) answers are cached, so a reply that couldn't
+        be used is asked again next time.
+        
+        Args:
+            kind: Which question this is, so equal prompts for different
+                questions don't share answers
+            prompt: The prompt to send
+            parse: Turns the reply into an answer, or None
+            
+        Returns:
+            The parsed answer, or None
+        """
+        if not self.cache_enabled:
+            return parse(await self.gemini.generate(prompt, enable_tools=False))
+        
+        key = hashlib.sha256(json_dumps_bytes([kind, prompt])).hexdigest()
+        if self._answers is None:
+            loaded = await asyncio.to_thread(_load_cache_file, self.cache_file)
+            # A concurrent first call may have loaded (and added to) it already
+            if self._answers is None:
+                self._answers = _unexpired(loaded, time.time())
+        
+        entry = self._answers.get(key)
+        if entry is not None:
+            if entry.get("expires", 0) > time.time():
+                return entry.get("value")
+            del self._answers[key]
+        
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._ask_and_cache(key, prompt, parse))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shielded so one caller being cancelled doesn't fail the others
+        return await asyncio.shield(task)
+    
+    async def _ask_and_cache(
+        self, key: str, prompt: str, parse: Callable[[str], Any]
+    ) -> Any:
+        value = parse(await self.gemini.generate(prompt, enable_tools=False))
+        if value is not None:
+            now = time.time()
+            # Drop expired answers so they are neither kept nor persisted
+            self._answers = _unexpired(self._answers, now)
+            self._answers[key] = {"expires": now + self.cache_ttl, "value": value}
+            if self.cache_file:
+                try:
+                    await asyncio.to_thread(
+                        _save_cache_file, self.cache_file, dict(self._answers)
+                    )
+                except OSError as e:
+                    self.logger.warning(f"Failed to persist AI answer cache: {e}")
+        return value
+        
     async def resolve_project_type(
         self,
         project_path: Path,
@@ -79,15 +330,9 @@ class UncertaintyHandler:
         self.logger.info("Resolving project type uncertainty")
         
         # Strategy 1: Heuristics based on file counts
-        dominant_type = self._determine_dominant_language(file_patterns)
-        if dominant_type:
-            return AnalysisResult(
-                resolved=True,
-                confidence=UncertaintyLevel.CONFIDENT,
-                value=dominant_type,
-                reasoning=f"Dominant file type: {dominant_type}",
-                strategy_used=ResolutionStrategy.HEURISTIC,
-            )
+        result = self._project_type_from_heuristics(file_patterns)
+        if result:
+            return result
         
         # Strategy 2: AI Analysis
         try:
@@ -104,13 +349,7 @@ class UncertaintyHandler:
             self.logger.warning(f"AI analysis failed: {e}")
         
         # Strategy 3: Default fallback
-        return AnalysisResult(
-            resolved=False,
-            confidence=UncertaintyLevel.AMBIGUOUS,
-            value=None,
-            reasoning="Could not determine project type",
-            strategy_used=ResolutionStrategy.MANUAL_INTERVENTION,
-        )
+        return self._project_type_fallback()
     
     async def resolve_port(
         self,
@@ -132,19 +371,233 @@ class UncertaintyHandler:
         self.logger.info("Resolving port number")
         
         # Strategy 1: Framework defaults
-        framework_ports = {
-            "flask": 5000,
-            "fastapi": 8000,
-            "express": 3000,
-            "spring": 8080,
-            "spring_boot": 8080,
-            "django": 8000,
-            "streamlit": 8501,
-            "gradio": 7860,
+        result = self._port_from_framework(detected_framework)
+        if result:
+            return result
+        
+        if code_samples:
+            # When speculating, the AI question is in flight during the scan
+            # (run in a thread so the two overlap) and dropped if it finds a port
+            ai_task = None
+            if self.speculative_ai:
+                ai_task = asyncio.ensure_future(self._ask_gemini_port(code_samples))
+            try:
+                # Strategy 2: Code analysis for listen() or PORT usage
+                if ai_task:
+                    result = await asyncio.to_thread(self._port_from_code, code_samples)
+                else:
+                    result = self._port_from_code(code_samples)
+                if result:
+                    return result
+                
+                # Strategy 3: AI analysis
+                try:
+                    ai_port = await (ai_task or self._ask_gemini_port(code_samples))
+                    if ai_port:
+                        return AnalysisResult(
+                            resolved=True,
+                            confidence=UncertaintyLevel.LIKELY,
+                            value=ai_port,
+                            reasoning="AI-determined from code analysis",
+                            strategy_used=ResolutionStrategy.AI_ANALYSIS,
+                        )
+                except Exception as e:
+                    self.logger.warning(f"AI port analysis failed: {e}")
+            finally:
+                if ai_task:
+                    ai_task.cancel()
+        
+        # Strategy 4: Safe default
+        return self._port_fallback()
+    
+    async def resolve_start_command(
+        self,
+        project_type: str,
+        framework: str = None,
+        entry_point: str = None,
+        package_file_content: str = None,
+    ) -> AnalysisResult:
+        """
+        Resolve uncertain start command.
+        
+        Args:
+            project_type: Detected project type
+            framework: Framework if known
+            entry_point: Entry point file
+            package_file_content: Content of package.json, requirements.txt, etc.
+            
+        Returns:
+            AnalysisResult with start command
+        """
+        self.logger.info("Resolving start command")
+        
+        # Strategy 1 and 2: Framework-specific commands, then package file
+        result = self._start_command_from_heuristics(
+            project_type, framework, entry_point, package_file_content
+        )
+        if result:
+            return result
+        
+        # Strategy 3: AI analysis
+        try:
+            ai_cmd = await self._ask_gemini_start_command(
+                project_type, framework, entry_point, package_file_content
+            )
+            if ai_cmd:
+                return AnalysisResult(
+                    resolved=True,
+                    confidence=UncertaintyLevel.LIKELY,
+                    value=ai_cmd,
+                    reasoning="AI-recommended command",
+                    strategy_used=ResolutionStrategy.AI_ANALYSIS,
+                )
+        except Exception as e:
+            self.logger.warning(f"AI start command analysis failed: {e}")
+        
+        # Strategy 4: Generic fallback
+        return self._start_command_fallback(project_type, entry_point)
+    
+    async def batch_resolve(
+        self,
+        project_path: Path,
+        file_patterns: Dict[str, int],
+        framework: str = None,
+        entry_point: str = None,
+        code_samples: List[str] = None,
+        package_file_content: str = None,
+    ) -> Dict[str, AnalysisResult]:
+        """
+        Resolve project type, port and start command together.
+        
+        Same strategies as the resolve_* methods, but whatever the heuristics
+        leave open is asked of Gemini in one request instead of one each.
+        
+        Args:
+            project_path: Path to analyze
+            file_patterns: Counts of files by extension
+            framework: Framework if known
+            entry_point: Entry point file
+            code_samples: Sample code to analyze
+            package_file_content: Content of package.json, requirements.txt, etc.
+            
+        Returns:
+            AnalysisResult for each of "project_type", "port" and "start_command"
+        """
+        self.logger.info("Resolving project type, port and start command")
+        
+        # Strategy 1: Heuristics
+        results: Dict[str, Optional[AnalysisResult]] = {
+            "project_type": self._project_type_from_heuristics(file_patterns),
+            "port": self._port_from_heuristics(framework, code_samples),
+            "start_command": None,
         }
+        project_type = results["project_type"].value if results["project_type"] else None
+        if project_type:
+            results["start_command"] = self._start_command_from_heuristics(
+                project_type, framework, entry_point, package_file_content
+            )
+        
+        # Strategy 2: One AI question for everything still open
+        sections = {}
+        if not results["project_type"]:
+            file_list = await asyncio.to_thread(_list_files, project_path, 50)
+            sections["project_type"] = f"""Which project type is this: "python", "nodejs", "go", "java", or "rust"?
+
+Files:
+{file_list}"""
+        if not results["port"] and code_samples:
+            combined_code = _port_code_excerpt(code_samples)
+            sections["port"] = f"""What port does the application listen on? Answer with an integer.
+
+Code:
+```
+{combined_code}
+```"""
+        if not results["start_command"]:
+            sections["start_command"] = f"""What command starts this application? Example: uvicorn main:app --host 0.0.0.0 --port 8080
+
+Context:
+```json
+{self._start_command_context(project_type, framework, entry_point, package_file_content)}
+```"""
         
-        if detected_framework and detected_framework.lower() in framework_ports:
-            port = framework_ports[detected_framework.lower()]
+        answers: Dict[str, Any] = {}
+        if sections:
+            try:
+                answers = await self._ask_gemini_batch(sections) or {}
+            except Exception as e:
+                self.logger.warning(f"AI batch analysis failed: {e}")
+        
+        if not results["project_type"] and answers.get("project_type"):
+            project_type = answers["project_type"]
+            results["project_type"] = AnalysisResult(
+                resolved=True,
+                confidence=UncertaintyLevel.LIKELY,
+                value=project_type,
+                reasoning="AI analysis",
+                strategy_used=ResolutionStrategy.AI_ANALYSIS,
+            )
+        if not results["port"] and answers.get("port"):
+            results["port"] = AnalysisResult(
+                resolved=True,
+                confidence=UncertaintyLevel.LIKELY,
+                value=answers["port"],
+                reasoning="AI-determined from code analysis",
+                strategy_used=ResolutionStrategy.AI_ANALYSIS,
+            )
+        if not results["start_command"] and answers.get("start_command"):
+            results["start_command"] = AnalysisResult(
+                resolved=True,
+                confidence=UncertaintyLevel.LIKELY,
+                value=answers["start_command"],
+                reasoning="AI-recommended command",
+                strategy_used=ResolutionStrategy.AI_ANALYSIS,
+            )
+        
+        # Strategy 3: Defaults
+        return {
+            "project_type": results["project_type"] or self._project_type_fallback(),
+            "port": results["port"] or self._port_fallback(),
+            "start_command": results["start_command"]
+            or self._start_command_fallback(project_type or "", entry_point),
+        }
+    
+    def _project_type_from_heuristics(
+        self, file_patterns: Dict[str, int]
+    ) -> Optional[AnalysisResult]:
+        dominant_type = self._determine_dominant_language(file_patterns)
+        if dominant_type:
+            return AnalysisResult(
+                resolved=True,
+                confidence=UncertaintyLevel.CONFIDENT,
+                value=dominant_type,
+                reasoning=f"Dominant file type: {dominant_type}",
+                strategy_used=ResolutionStrategy.HEURISTIC,
+            )
+        return None
+    
+    def _project_type_fallback(self) -> AnalysisResult:
+        return AnalysisResult(
+            resolved=False,
+            confidence=UncertaintyLevel.AMBIGUOUS,
+            value=None,
+            reasoning="Could not determine project type",
+            strategy_used=ResolutionStrategy.MANUAL_INTERVENTION,
+        )
+    
+    def _port_from_heuristics(
+        self,
+        detected_framework: str = None,
+        code_samples: List[str] = None,
+    ) -> Optional[AnalysisResult]:
+        return (
+            self._port_from_framework(detected_framework)
+            or self._port_from_code(code_samples)
+        )
+    
+    def _port_from_framework(self, detected_framework: str = None) -> Optional[AnalysisResult]:
+        if detected_framework and detected_framework.lower() in _FRAMEWORK_PORTS:
+            port = _FRAMEWORK_PORTS[detected_framework.lower()]
             return AnalysisResult(
                 resolved=True,
                 confidence=UncertaintyLevel.CONFIDENT,
@@ -152,8 +605,9 @@ class UncertaintyHandler:
                 reasoning=f"Framework default for {detected_framework}",
                 strategy_used=ResolutionStrategy.HEURISTIC,
             )
-        
-        # Strategy 2: Code analysis for listen() or PORT usage
+        return None
+    
+    def _port_from_code(self, code_samples: List[str] = None) -> Optional[AnalysisResult]:
         if code_samples:
             for code in code_samples:
                 port = self._extract_port_from_code(code)
@@ -166,22 +620,9 @@ class UncertaintyHandler:
                         strategy_used=ResolutionStrategy.HEURISTIC,
                     )
         
-        # Strategy 3: AI analysis
-        if code_samples:
-            try:
-                ai_port = await self._ask_gemini_port(code_samples)
-                if ai_port:
-                    return AnalysisResult(
-                        resolved=True,
-                        confidence=UncertaintyLevel.LIKELY,
-                        value=ai_port,
-                        reasoning="AI-determined from code analysis",
-                        strategy_used=ResolutionStrategy.AI_ANALYSIS,
-                    )
-            except Exception as e:
-                self.logger.warning(f"AI port analysis failed: {e}")
-        
-        # Strategy 4: Safe default
+        return None
+    
+    def _port_fallback(self) -> AnalysisResult:
         return AnalysisResult(
             resolved=True,
             confidence=UncertaintyLevel.UNCERTAIN,
@@ -190,28 +631,13 @@ class UncertaintyHandler:
             strategy_used=ResolutionStrategy.DEFAULT_FALLBACK,
         )
     
-    async def resolve_start_command(
+    def _start_command_from_heuristics(
         self,
         project_type: str,
         framework: str = None,
         entry_point: str = None,
         package_file_content: str = None,
-    ) -> AnalysisResult:
-        """
-        Resolve uncertain start command.
-        
-        Args:
-            project_type: Detected project type
-            framework: Framework if known
-            entry_point: Entry point file
-            package_file_content: Content of package.json, requirements.txt, etc.
-            
-        Returns:
-            AnalysisResult with start command
-        """
-        self.logger.info("Resolving start command")
-        
-        # Strategy 1: Framework-specific commands
+    ) -> Optional[AnalysisResult]:
         if framework:
             cmd = self._get_framework_start_command(project_type, framework, entry_point)
             if cmd:
@@ -223,7 +649,6 @@ class UncertaintyHandler:
                     strategy_used=ResolutionStrategy.HEURISTIC,
                 )
         
-        # Strategy 2: Package file analysis
         if package_file_content:
             cmd = self._extract_start_from_package(project_type, package_file_content)
             if cmd:
@@ -235,23 +660,11 @@ class UncertaintyHandler:
                     strategy_used=ResolutionStrategy.HEURISTIC,
                 )
         
-        # Strategy 3: AI analysis
-        try:
-            ai_cmd = await self._ask_gemini_start_command(
-                project_type, framework, entry_point, package_file_content
-            )
-            if ai_cmd:
-                return AnalysisResult(
-                    resolved=True,
-                    confidence=UncertaintyLevel.LIKELY,
-                    value=ai_cmd,
-                    reasoning="AI-recommended command",
-                    strategy_used=ResolutionStrategy.AI_ANALYSIS,
-                )
-        except Exception as e:
-            self.logger.warning(f"AI start command analysis failed: {e}")
-        
-        # Strategy 4: Generic fallback
+        return None
+    
+    def _start_command_fallback(
+        self, project_type: str, entry_point: str = None
+    ) -> AnalysisResult:
         generic_cmd = self._get_generic_start_command(project_type, entry_point)
         return AnalysisResult(
             resolved=True,
@@ -266,48 +679,30 @@ class UncertaintyHandler:
         if not file_patterns:
             return None
         
-        # Language file extensions
-        lang_map = {
-            "python": [".py"],
-            "nodejs": [".js", ".ts", ".jsx", ".tsx"],
-            "go": [".go"],
-            "java": [".java"],
-            "rust": [".rs"],
-        }
-        
-        # Count files per language
-        lang_counts = {}
-        for lang, extensions in lang_map.items():
-            count = sum(file_patterns.get(ext, 0) for ext in extensions)
-            if count > 0:
-                lang_counts[lang] = count
+        # Count files per language, in one pass over the extensions seen
+        lang_counts: Counter = Counter()
+        for ext, count in file_patterns.items():
+            lang = _EXT_TO_LANG.get(ext)
+            if lang and count > 0:
+                lang_counts[lang] += count
         
         if not lang_counts:
             return None
         
-        # Get dominant (must be >50% of total or clear winner)
+        # Get dominant (must be >50% of total or clear winner); ties go to
+        # the language listed first
         total = sum(lang_counts.values())
-        dominant = max(lang_counts.items(), key=lambda x: x[1])
+        dominant = max((lang for lang, _ in _LANG_EXTENSIONS), key=lang_counts.__getitem__)
         
-        if dominant[1] / total > 0.5 or dominant[1] > total * 0.4:
-            return dominant[0]
+        if lang_counts[dominant] / total > 0.5 or lang_counts[dominant] > total * 0.4:
+            return dominant
         
         return None
     
     def _extract_port_from_code(self, code: str) -> Optional[int]:
         """Extract port number from code patterns."""
-        import re
-        
-        # Common patterns
-        patterns = [
-            r"\.listen\((\d+)",  # app.listen(3000)
-            r"PORT\s*=\s*(\d+)",  # PORT = 8080
-            r"port\s*=\s*(\d+)",  # port = 5000
-            r"--port[= ](\d+)",  # --port=8000
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, code)
+        for pattern in _PORT_PATTERNS:
+            match = pattern.search(code)
             if match:
                 try:
                     port = int(match.group(1))
@@ -325,96 +720,52 @@ class UncertaintyHandler:
         entry_point: str = None,
     ) -> Optional[str]:
         """Get standard start command for framework."""
-        commands = {
-            ("python", "flask"): f"flask run --host 0.0.0.0 --port 8080",
-            ("python", "fastapi"): f"uvicorn {entry_point or 'main'}:app --host 0.0.0.0 --port 8080",
-            ("python", "django"): "python manage.py runserver 0.0.0.0:8080",
-            ("python", "streamlit"): f"streamlit run {entry_point or 'app.py'} --server.port 8080",
-            ("nodejs", "express"): "node index.js",
-            ("nodejs", None): "npm start",
-            ("go", None): "./app",
-            ("rust", None): "./target/release/app",
-        }
-        
-        return commands.get((project_type.lower(), framework.lower() if framework else None))
+        command = _FRAMEWORK_START_COMMANDS.get(
+            (project_type.lower(), framework.lower() if framework else None)
+        )
+        return _start_command(*command, entry_point) if command else None
     
     def _extract_start_from_package(self, project_type: str, content: str) -> Optional[str]:
         """Extract start command from package file."""
-        import json
-        
         if project_type.lower() == "nodejs":
             try:
-                package = json.loads(content)
-                scripts = package.get("scripts", {})
+                package = json_loads(content)
+            except ValueError:
+                return None
+            scripts = package.get("scripts") if isinstance(package, dict) else None
+            if isinstance(scripts, dict):
                 return scripts.get("start")
-            except:
-                pass
         
         return None
     
     def _get_generic_start_command(self, project_type: str, entry_point: str = None) -> str:
         """Get generic start command for project type."""
-        commands = {
-            "python": f"python {entry_point or 'main.py'}",
-            "nodejs": "node index.js",
-            "go": "./app",
-            "java": "java -jar app.jar",
-            "rust": "./app",
-        }
-        return commands.get(project_type.lower(), "npm start")
+        command = _GENERIC_START_COMMANDS.get(project_type.lower())
+        return _start_command(*command, entry_point) if command else "npm start"
     
     async def _ask_gemini_project_type(self, project_path: Path) -> Optional[Dict[str, Any]]:
         """Ask Gemini AI to determine project type."""
-        # List files
-        files = list(project_path.rglob("*"))[:50]  # Limit for context window
-        file_list = "\\n".join([f.name for f in files if f.is_file()])
-        
-        prompt = f"""Analyze this project structure and determine the project type.
+        # Limit for context window; walked off the event loop
+        file_list = await asyncio.to_thread(_list_files, project_path, 50)
+        prompt = f"""{_PROJECT_TYPE_INSTRUCTIONS}
 
 Files:
-{file_list}
-
-Return JSON with:
-- type: "python", "nodejs", "go", "java", or "rust"
-- confidence: 0.0 to 1.0
-- reasoning: brief explanation
-
-Return ONLY valid JSON."""
+{file_list}"""
         
-        try:
-            response = await self.gemini.generate(prompt, enable_tools=False)
-            import json
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("\\n", 1)[1]
-            if response.endswith("```"):
-                response = response.rsplit("```", 1)[0]
-            return json.loads(response.strip())
-        except:
-            return None
+        return await self._ask_cached("project_type", prompt, _parse_project_type)
     
     async def _ask_gemini_port(self, code_samples: List[str]) -> Optional[int]:
         """Ask Gemini AI to determine port from code."""
-        combined_code = "\\n\\n".join(code_samples[:3])  # Limit samples
+        combined_code = _port_code_excerpt(code_samples)
         
-        prompt = f"""Analyze this code and determine what port the application listens on.
+        prompt = f"""{_PORT_INSTRUCTIONS}
 
 Code:
 ```
 {combined_code}
-```
-
-Return ONLY the port number as a single integer, nothing else."""
+```"""
         
-        try:
-            response = await self.gemini.generate(prompt, enable_tools=False)
-            port = int(response.strip())
-            if 1 <= port <= 65535:
-                return port
-        except:
-            pass
-        
-        return None
+        return await self._ask_cached("port", prompt, _parse_port)
     
     async def _ask_gemini_start_command(
         self,
@@ -424,6 +775,29 @@ Return ONLY the port number as a single integer, nothing else."""
         package_content: str = None,
     ) -> Optional[str]:
         """Ask Gemini AI to determine start command."""
+        prompt = f"""{_START_COMMAND_INSTRUCTIONS}
+
+Context:
+```json
+{self._start_command_context(project_type, framework, entry_point, package_content)}
+```"""
+        
+        return await self._ask_cached("start_command", prompt, _parse_start_command)
+    
+    async def _ask_gemini_batch(self, sections: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Ask Gemini AI several questions in one request."""
+        questions = "\n\n".join(f"## {key}\n{text}" for key, text in sections.items())
+        prompt = f"{_BATCH_INSTRUCTIONS}\n\n{questions}"
+        
+        return await self._ask_cached("batch", prompt, _parse_batch)
+    
+    def _start_command_context(
+        self,
+        project_type: Optional[str],
+        framework: str = None,
+        entry_point: str = None,
+        package_content: str = None,
+    ) -> str:
         context = {
             "project_type": project_type,
             "framework": framework,
@@ -431,21 +805,64 @@ Return ONLY the port number as a single integer, nothing else."""
         }
         
         if package_content:
-            context["package_file"] = package_content[:500]  # Truncate
+            context["package_file"] = _package_excerpt(package_content)
         
-        import json
-        prompt = f"""Determine the command to start this application.
+        return json_dumps(context, indent=True)
 
-Context:
-```json
-{json.dumps(context, indent=2)}
-```
 
-Return ONLY the command string, nothing else. Example: "uvicorn main:app --host 0.0.0.0 --port 8080"
-"""
-        
+def _parse_json_object(response: str) -> Optional[Dict[str, Any]]:
+    """Parse the JSON object in a reply, salvaging it from chatty or cut-off text."""
+    body = strip_fence(response)
+    candidates = [body]
+    match = _JSON_OBJECT_RE.search(body)
+    if match and match.group() != body:
+        candidates.append(match.group())
+    # A reply cut off before its closing brace
+    start = body.find("{")
+    if start != -1 and "}" not in body[start:]:
+        candidates.append(body[start:].rstrip().rstrip(",") + "}")
+    
+    for candidate in candidates:
         try:
-            response = await self.gemini.generate(prompt, enable_tools=False)
-            return response.strip()
-        except:
-            return None
+            data = json_loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def _parse_project_type(response: str) -> Optional[Dict[str, Any]]:
+    data = _parse_json_object(response)
+    return data if data and data.get("type") else None
+
+
+def _parse_batch(response: str) -> Optional[Dict[str, Any]]:
+    answers = _parse_json_object(response)
+    if answers is None:
+        return None
+    
+    # Keep only usable answers; an empty result isn't cached
+    parsed: Dict[str, Any] = {}
+    if isinstance(answers.get("project_type"), str) and answers["project_type"].strip():
+        parsed["project_type"] = answers["project_type"].strip().lower()
+    port = _parse_port(str(answers.get("port", "")))
+    if port:
+        parsed["port"] = port
+    if isinstance(answers.get("start_command"), str):
+        cmd = _parse_start_command(answers["start_command"])
+        if cmd:
+            parsed["start_command"] = cmd
+    return parsed or None
+
+
+def _parse_port(response: str) -> Optional[int]:
+    try:
+        port = int(response.strip())
+    except ValueError:
+        return None
+    return port if 1 <= port <= 65535 else None
+
+
+def _parse_start_command(response: str) -> Optional[str]:
+    return response.strip() or None
@@ -1,8 +1,19 @@
 """Helper utilities."""
 
+import json
+import os
 import re
 import uuid
-from typing import Optional
+from typing import Any, Container, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# A reply wrapped in a single markdown code block, with any info string
+_FENCE_RE = re.compile(r'\A```[^\n]*\n(.*?)\n?```\s*\Z', re.S)
 
 
 def slugify(text: str, max_length: int = 63) -> str:
@@ -73,3 +84,94 @@ def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     if len(text) <= max_length:
         return text
     return text[:max_length - len(suffix)] + suffix
+
+
+def json_dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Serialize to JSON, using orjson when it is installed.
+    
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with two-space indentation
+        
+    Returns:
+        JSON string
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode()
+    if indent:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON bytes, using orjson when it is installed.
+    
+    Saves the decode/encode round trip of json_dumps(obj).encode() when the
+    result is written or hashed as bytes.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse JSON, using orjson when it is installed.
+    
+    Raises json.JSONDecodeError on invalid input either way (orjson's
+    error type subclasses it).
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def strip_fence(text: str) -> str:
+    """Return the body of a fenced LLM reply, or the stripped reply as is."""
+    text = text.strip()
+    match = _FENCE_RE.match(text)
+    return match.group(1).strip() if match else text
+
+
+def walk_scandir(
+    top: str, exclude_dirs: Container[str]
+) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """
+    Top-down directory walk on os.scandir, like os.walk(top).
+    
+    Excluded directory names are pruned before descending, symlinked
+    directories are listed but not followed, and unreadable directories
+    are skipped.
+    
+    Path.walk (3.12+) is not a faster substitute: it is pure Python over
+    os.scandir as well, and builds a Path per directory.
+    """
+    stack = [top]
+    while stack:
+        root = stack.pop()
+        dirs: List[str] = []
+        files: List[str] = []
+        descend: List[str] = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry.name)
+                    elif entry.name not in exclude_dirs:
+                        dirs.append(entry.name)
+                        if not entry.is_symlink():
+                            descend.append(entry.path)
+        except OSError:
+            continue
+        yield root, dirs, files
+        # Reverse so subdirectories are visited in listing order
+        stack.extend(reversed(descend))
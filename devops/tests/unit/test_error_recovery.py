@@ -0,0 +1,234 @@
+"""
+Unit tests for the error recovery system.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from devops_agent.core.error_recovery import (
+    ErrorAnalyzer,
+    ErrorCategory,
+    Fix,
+    FixAction,
+    FixGenerator,
+    RecoveryLoop,
+    SelfHealingExecutor,
+    RAW_OUTPUT_TAIL,
+)
+
+
+class TestErrorAnalyzer:
+    """Test error classification."""
+
+    def test_missing_python_module(self):
+        """Test detection of a missing Python module."""
+        output = (
+            'Traceback (most recent call last):\n'
+            '  File "app.py", line 3, in <module>\n'
+            "ModuleNotFoundError: No module named 'flask'\n"
+        )
+        error = ErrorAnalyzer().analyze(output)
+
+        assert error.category == ErrorCategory.DEPENDENCY_MISSING
+        assert error.details == "flask"
+        assert error.file_path == "app.py"
+        assert error.line_number == 3
+
+    def test_permission_error(self):
+        """Test detection of permission errors."""
+        error = ErrorAnalyzer().analyze("open ./build: Permission denied")
+        assert error.category == ErrorCategory.PERMISSION
+
+    def test_raw_output_keeps_tail_only(self):
+        """Test that only the tail of large outputs is retained."""
+        output = "x" * 100_000 + "\nModuleNotFoundError: No module named 'yaml'"
+        error = ErrorAnalyzer().analyze(output)
+
+        assert len(error.raw_output) == RAW_OUTPUT_TAIL
+        assert output.endswith(error.raw_output)
+
+    def test_unknown_error(self):
+        """Test fallback for unrecognised output."""
+        error = ErrorAnalyzer().analyze("something went wrong\nfatal Error here")
+
+        assert error.category == ErrorCategory.UNKNOWN
+        assert error.message == "fatal Error here"
+
+
+class TestFixGenerator:
+    """Test rule-based fix generation."""
+
+    @pytest.mark.asyncio
+    async def test_missing_dependency_fix(self, tmp_path):
+        """Test that a missing module yields an install fix for the root package."""
+        error = ErrorAnalyzer().analyze("ModuleNotFoundError: No module named 'google.cloud'")
+        fix = await FixGenerator().generate_fix(error, tmp_path)
+
+        assert fix.action == FixAction.INSTALL_DEPENDENCY
+        assert fix.target == "google"
+
+    @pytest.mark.asyncio
+    async def test_network_fix_is_retry(self, tmp_path):
+        """Test that network errors are retried."""
+        error = ErrorAnalyzer().analyze("connect ECONNREFUSED 127.0.0.1:5432")
+        fix = await FixGenerator().generate_fix(error, tmp_path)
+
+        assert fix.action == FixAction.SKIP
+
+    @pytest.mark.asyncio
+    async def test_no_fix_without_gemini(self, tmp_path):
+        """Test that unknown errors get no fix when Gemini is unavailable."""
+        error = ErrorAnalyzer().analyze("SyntaxError: invalid syntax")
+        fix = await FixGenerator().generate_fix(error, tmp_path)
+
+        assert fix is None
+
+    @pytest.mark.asyncio
+    async def test_gemini_candidates_reused_across_retries(self, tmp_path):
+        """Test that one Gemini call serves several retries of the same error."""
+        gemini = AsyncMock()
+        gemini.generate.return_value = """[
+            {"action": "run_command", "description": "second", "content": "make b", "confidence": 0.4},
+            {"action": "run_command", "description": "first", "content": "make a", "confidence": 0.8}
+        ]"""
+        generator = FixGenerator(gemini)
+        error = ErrorAnalyzer().analyze("SyntaxError: invalid syntax")
+
+        first = await generator.generate_fix(error, tmp_path, candidates=2)
+        second = await generator.generate_fix(error, tmp_path, candidates=2)
+
+        assert [first.description, second.description] == ["first", "second"]
+        gemini.generate.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_lone_object_with_list_field(self, tmp_path):
+        """Test that a single fix object is not mistaken for a list inside it."""
+        gemini = AsyncMock()
+        gemini.generate.return_value = """Here is the fix:
+        {"action": "run_command", "description": "rebuild", "content": "make", "tags": []}"""
+        generator = FixGenerator(gemini)
+        error = ErrorAnalyzer().analyze("SyntaxError: invalid syntax")
+
+        fixes = await generator.generate_fixes(error, tmp_path)
+
+        assert [f.description for f in fixes] == ["rebuild"]
+
+    @pytest.mark.asyncio
+    async def test_candidates_scoped_to_project(self, tmp_path):
+        """Test that candidates for one project are not offered to another."""
+        gemini = AsyncMock()
+        gemini.generate.return_value = """[
+            {"action": "run_command", "description": "first", "content": "make a", "confidence": 0.8},
+            {"action": "run_command", "description": "second", "content": "make b", "confidence": 0.4}
+        ]"""
+        generator = FixGenerator(gemini)
+        error = ErrorAnalyzer().analyze("SyntaxError: invalid syntax")
+
+        await generator.generate_fix(error, tmp_path / "a", candidates=2)
+        fix = await generator.generate_fix(error, tmp_path / "b", candidates=2)
+
+        assert fix.description == "first"
+        assert gemini.generate.await_count == 2
+
+
+class TestRecoveryLoop:
+    """Test the retry loop."""
+
+    @pytest.mark.asyncio
+    async def test_cancel_event_skips_backoff(self, tmp_path):
+        """Test that a set cancel event cuts the backoff wait short."""
+        outputs = iter([(False, "connect ETIMEDOUT"), (True, "ok")])
+
+        async def command_fn():
+            return next(outputs)
+
+        cancel_event = asyncio.Event()
+        cancel_event.set()
+        loop = RecoveryLoop(max_retries=2, base_delay=60)
+
+        result = await asyncio.wait_for(
+            loop.run(command_fn, tmp_path, cancel_event=cancel_event), timeout=5
+        )
+
+        assert result.final_success
+        assert result.total_attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_run_clears_unused_candidates(self, tmp_path):
+        """Test that candidates left over from a run are dropped when it ends."""
+        gemini = AsyncMock()
+        gemini.generate.return_value = """[
+            {"action": "skip", "description": "first", "confidence": 0.8},
+            {"action": "skip", "description": "second", "confidence": 0.4}
+        ]"""
+        outputs = iter([(False, "SyntaxError: invalid syntax"), (True, "ok")])
+
+        async def command_fn():
+            return next(outputs)
+
+        loop = RecoveryLoop(gemini, max_retries=2, base_delay=0)
+        result = await loop.run(command_fn, tmp_path)
+
+        assert result.final_success
+        assert loop.fix_generator._candidates == {}
+
+
+class TestSelfHealingExecutor:
+    """Test fix application."""
+
+    @pytest.mark.asyncio
+    async def test_install_dependency_quotes_package(self, tmp_path):
+        """Test that package names are shell-quoted for the detected manager."""
+        (tmp_path / "package.json").write_text("{}")
+        base_executor = AsyncMock()
+        base_executor.run.return_value = Mock(success=True)
+        executor = SelfHealingExecutor(base_executor=base_executor)
+
+        assert await executor._install_dependency("left pad", tmp_path)
+        base_executor.run.assert_awaited_once_with("npm install 'left pad'", timeout=120)
+
+    @pytest.mark.asyncio
+    async def test_install_dependency_unknown_project(self, tmp_path):
+        """Test that nothing is installed when no manifest is present."""
+        base_executor = AsyncMock()
+        executor = SelfHealingExecutor(base_executor=base_executor)
+
+        assert not await executor._install_dependency("flask", tmp_path)
+        base_executor.run.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_apply_create_file(self, tmp_path):
+        """Test that CREATE_FILE writes the file and its parent directories."""
+        executor = SelfHealingExecutor(base_executor=AsyncMock())
+        fix = Fix(
+            action=FixAction.CREATE_FILE,
+            description="Add config",
+            target="config/app.env",
+            content="PORT=8080\n",
+        )
+
+        assert await executor._apply_fix(fix, tmp_path)
+        assert (tmp_path / "config" / "app.env").read_text() == "PORT=8080\n"
+
+    @pytest.mark.asyncio
+    async def test_apply_modify_file_truncates(self, tmp_path):
+        """Test that MODIFY_FILE replaces existing content."""
+        (tmp_path / "app.py").write_text("print('a much longer original body')\n")
+        executor = SelfHealingExecutor(base_executor=AsyncMock())
+        fix = Fix(
+            action=FixAction.MODIFY_FILE,
+            description="Rewrite app",
+            target="app.py",
+            content="print('é')\n",
+        )
+
+        assert await executor._apply_fix(fix, tmp_path)
+        assert (tmp_path / "app.py").read_text(encoding="utf-8") == "print('é')\n"
+
+    @pytest.mark.asyncio
+    async def test_apply_unsupported_action(self, tmp_path):
+        """Test that actions without a handler are reported as not applied."""
+        executor = SelfHealingExecutor(base_executor=AsyncMock())
+        fix = Fix(action=FixAction.UPDATE_DEPENDENCY, description="Bump flask")
+
+        assert not await executor._apply_fix(fix, tmp_path)
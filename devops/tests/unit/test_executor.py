@@ -0,0 +1,152 @@
+"""
+Unit tests for the command executor.
+"""
+
+import os
+import sys
+import pytest
+from devops_agent.core.executor import CommandExecutor, PIPE_BUFFER_SIZE, _F_SETPIPE_SZ
+
+
+class TestDirectArgv:
+    """Test detection of commands that can skip the shell."""
+
+    def test_plain_command_is_split(self):
+        """Test that simple commands are split into argv."""
+        assert CommandExecutor._direct_argv("pip install flask") == ["pip", "install", "flask"]
+
+    def test_quoted_argument(self):
+        """Test that quoting is honoured like the shell would."""
+        assert CommandExecutor._direct_argv("npm install 'left pad'") == [
+            "npm", "install", "left pad",
+        ]
+
+    @pytest.mark.parametrize("command", [
+        "echo $HOME",
+        "ls *.py",
+        "make && make install",
+        "FOO=1 env",
+        "cd /tmp",
+        'echo "unterminated',
+    ])
+    def test_shell_syntax_needs_shell(self, command):
+        """Test that anything using shell features falls back to the shell."""
+        assert CommandExecutor._direct_argv(command) is None
+
+
+class TestCommandExecutor:
+    """Test command execution."""
+
+    @pytest.fixture
+    def executor(self, tmp_path):
+        return CommandExecutor(working_dir=tmp_path, validate_commands=False)
+
+    @pytest.mark.asyncio
+    async def test_run_captures_output(self, executor):
+        """Test that stdout and the return code are captured."""
+        result = await executor.run("echo hello world")
+
+        assert result.success
+        assert result.stdout == "hello world\n"
+
+    @pytest.mark.asyncio
+    async def test_missing_executable_reports_127(self, executor):
+        """Test that unknown commands fail like they do in the shell."""
+        result = await executor.run("definitely-not-a-real-tool --version")
+
+        assert not result.success
+        assert result.return_code == 127
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("command", ["echo hi", "echo hi | cat", ["echo", "hi"]])
+    async def test_missing_working_dir_is_a_failed_result(self, tmp_path, command):
+        """Test that a missing working directory fails the command, not the caller."""
+        executor = CommandExecutor(working_dir=tmp_path / "gone", validate_commands=False)
+
+        result = await executor.run(command)
+
+        assert not result.success
+        assert result.return_code == -1
+
+    @pytest.mark.asyncio
+    async def test_tool_found_after_failed_lookup(self, executor, tmp_path, monkeypatch):
+        """Test that a missing tool is looked up again, e.g. after an install."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        assert await executor.get_tool_version("late-tool") is None
+        assert not await executor.check_tool_exists("late-tool")
+
+        tool = bin_dir / "late-tool"
+        tool.write_text("#!/bin/sh\necho late-tool 1.2.3\n")
+        tool.chmod(0o755)
+
+        assert await executor.check_tool_exists("late-tool")
+        assert await executor.get_tool_version("late-tool") == "late-tool 1.2.3"
+
+    @pytest.mark.asyncio
+    async def test_streaming_delivers_whole_lines(self, executor):
+        """Test that streamed output is split into complete lines."""
+        script = "import sys; [print('x' * i) for i in range(3000)]; sys.stdout.write('tail')"
+        lines = []
+
+        result = await executor.run(
+            f'{sys.executable} -c "{script}"',
+            stream_output=True,
+            on_output=lines.append,
+        )
+
+        assert result.success
+        assert "".join(lines) == result.stdout
+        assert lines[10] == "x" * 10 + "\n"
+        assert lines[-1] == "tail"
+
+    @pytest.mark.asyncio
+    async def test_streaming_to_fd_writes_raw_bytes(self, executor, tmp_path):
+        """Test that output streamed to a file descriptor arrives unchanged."""
+        script = "import sys; sys.stdout.write('x' * 200000 + '\\r\\nend')"
+        log = tmp_path / "out.log"
+
+        with open(log, "wb") as f:
+            result = await executor.run(
+                f'{sys.executable} -c "{script}"',
+                stream_output=True,
+                on_output_fd=f.fileno(),
+            )
+
+        assert result.success
+        assert log.read_bytes() == result.stdout.encode()
+        assert log.stat().st_size == 200005
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(_F_SETPIPE_SZ is None, reason="pipes can only be resized on Linux")
+    async def test_streaming_uses_enlarged_pipe(self, executor):
+        """Test that streamed commands write into a pipe of PIPE_BUFFER_SIZE."""
+        script = "import fcntl; print(fcntl.fcntl(1, fcntl.F_GETPIPE_SZ))"
+        lines = []
+
+        result = await executor.run(
+            [sys.executable, "-c", script], stream_output=True, on_output=lines.append
+        )
+
+        assert result.success
+        assert int(lines[0]) == PIPE_BUFFER_SIZE
+
+    @pytest.mark.asyncio
+    async def test_argv_list_is_not_shell_parsed(self, tmp_path):
+        """Test that argv lists are exec'd as-is, without quoting or validation of args."""
+        executor = CommandExecutor(working_dir=tmp_path, allowed_commands=["echo"])
+
+        result = await executor.run(["echo", "-var=name=a b; $HOME"])
+
+        assert result.success
+        assert result.stdout == "-var=name=a b; $HOME\n"
+        assert result.command == "echo '-var=name=a b; $HOME'"
+
+    @pytest.mark.asyncio
+    async def test_argv_missing_executable_reports_127(self, executor):
+        """Test that an unknown argv executable fails like the shell would."""
+        result = await executor.run(["definitely-not-a-real-tool", "--version"])
+
+        assert not result.success
+        assert result.return_code == 127
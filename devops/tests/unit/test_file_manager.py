@@ -0,0 +1,180 @@
+"""
+Unit tests for the file manager.
+"""
+
+import hashlib
+import os
+import pytest
+from devops_agent.core.file_manager import FileManager, SMALL_FILE_BYTES
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create a file manager rooted at a temporary directory."""
+    return FileManager(base_dir=tmp_path)
+
+
+class TestTemplates:
+    """Test template rendering."""
+
+    def test_render_template(self, manager):
+        """Test rendering a template string."""
+        assert manager.render_template("FROM {{ image }}", {"image": "python:3.11"}) == "FROM python:3.11"
+
+    def test_render_template_reuses_compiled_template(self, manager):
+        """Test that the same source is compiled only once."""
+        manager.render_template("port={{ port }}", {"port": 1})
+        manager.render_template("port={{ port }}", {"port": 2})
+
+        assert len(manager._template_cache) == 1
+
+    def test_bytecode_cache_shared_across_instances(self, tmp_path):
+        """Test that a fresh manager loads compiled code from the bytecode cache."""
+        source = "name={{ name }}"
+        FileManager(base_dir=tmp_path, dev_mode=False).render_template(source, {"name": "a"})
+
+        other = FileManager(base_dir=tmp_path, dev_mode=False)
+        bucket = other.jinja_env.bytecode_cache.get_bucket(
+            other.jinja_env, hashlib.sha1(source.encode()).hexdigest(), None, source
+        )
+        assert bucket.code is not None
+        assert other.render_template(source, {"name": "b"}) == "name=b"
+
+    def test_bytecode_cache_dir_is_private(self, tmp_path):
+        """Test that compiled code is kept where only this user can write."""
+        manager = FileManager(base_dir=tmp_path, dev_mode=False)
+
+        st = os.stat(manager.jinja_env.bytecode_cache.directory)
+        assert st.st_uid == os.getuid()
+        assert st.st_mode & 0o077 == 0
+
+    def test_dev_mode_disables_caching(self, tmp_path):
+        """Test that dev mode auto-reloads and skips the bytecode cache."""
+        manager = FileManager(base_dir=tmp_path, dev_mode=True)
+
+        assert manager.jinja_env.auto_reload
+        assert manager.jinja_env.bytecode_cache is None
+        assert manager.render_template("{{ x }}", {"x": 1}) == "1"
+
+    @pytest.mark.asyncio
+    async def test_render_template_file_picks_up_changes(self, manager, tmp_path):
+        """Test that editing a template file invalidates the cached template."""
+        template = tmp_path / "Dockerfile.j2"
+        template.write_text("FROM {{ image }}")
+        await manager.render_template_file(template, "Dockerfile", {"image": "node:20"})
+        assert (tmp_path / "Dockerfile").read_text() == "FROM node:20"
+
+        template.write_text("FROM {{ image }}-slim")
+        stat = template.stat()
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        await manager.render_template_file(template, "Dockerfile", {"image": "node:20"})
+        assert (tmp_path / "Dockerfile").read_text() == "FROM node:20-slim"
+
+
+class TestScanning:
+    """Test project scanning and file search."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        """Create a small project tree with an excluded directory."""
+        (tmp_path / "src" / "pkg").mkdir(parents=True)
+        (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+        (tmp_path / "README.md").write_text("# demo")
+        (tmp_path / ".env").write_text("A=1")
+        (tmp_path / "src" / "app.py").write_text("")
+        (tmp_path / "src" / "pkg" / "util.PY").write_text("")
+        (tmp_path / "node_modules" / "dep" / "index.js").write_text("")
+        return tmp_path
+
+    @pytest.mark.asyncio
+    async def test_scan_project(self, manager, project):
+        """Test the inventory returned by scan_project."""
+        result = await manager.scan_project()
+
+        assert sorted(result["files"]) == sorted([
+            "README.md",
+            ".env",
+            os.path.join("src", "app.py"),
+            os.path.join("src", "pkg", "util.PY"),
+        ])
+        assert sorted(result["directories"]) == ["src", os.path.join("src", "pkg")]
+        assert result["file_count"] == 4
+        assert result["extensions"] == {".md": 1, ".py": 2}
+
+    @pytest.mark.asyncio
+    async def test_find_files_skips_excluded_dirs(self, manager, project):
+        """Test that find_files matches patterns outside excluded directories."""
+        assert await manager.find_files("*.js") == []
+        assert await manager.find_files("*.py") == [project / "src" / "app.py"]
+
+    @pytest.mark.asyncio
+    async def test_find_files_multi_component_pattern(self, manager, project):
+        """Test that patterns with a directory part still match from the right."""
+        assert await manager.find_files("pkg/*.PY") == [project / "src" / "pkg" / "util.PY"]
+
+    @pytest.mark.asyncio
+    async def test_find_files_non_recursive(self, manager, project):
+        """Test matching only the top level."""
+        assert await manager.find_files("*.md", recursive=False) == [project / "README.md"]
+
+
+class TestBulkOperations:
+    """Test the concurrent bulk helpers."""
+
+    @pytest.mark.asyncio
+    async def test_write_then_read_files(self, manager, tmp_path):
+        """Test that bulk writes land on disk and bulk reads keep order."""
+        files = {f"tf/file{i}.tf": f"# {i}\n" for i in range(100)}
+        await manager.write_files(files)
+
+        contents = await manager.read_files(list(files))
+        assert contents == list(files.values())
+        assert (tmp_path / "tf" / "file7.tf").read_text() == "# 7\n"
+
+    @pytest.mark.asyncio
+    async def test_read_files_mixed_sizes(self, manager, tmp_path):
+        """Test that small and chunked large reads both return full content."""
+        (tmp_path / "small.txt").write_text("s" * 10)
+        (tmp_path / "large.txt").write_text("l" * (SMALL_FILE_BYTES * 5 + 1))
+
+        small, large = await manager.read_files(["small.txt", "large.txt"])
+        assert small == "s" * 10
+        assert large == "l" * (SMALL_FILE_BYTES * 5 + 1)
+
+    @pytest.mark.asyncio
+    async def test_read_bytes_large_file(self, manager, tmp_path):
+        """Test that large binary files are read whole, in place."""
+        data = os.urandom(SMALL_FILE_BYTES * 3 + 7)
+        (tmp_path / "blob.bin").write_bytes(data)
+
+        assert await manager.read_bytes("blob.bin") == data
+
+    @pytest.mark.asyncio
+    async def test_read_variants(self, manager, tmp_path):
+        """Test text, byte and line reads of the same file."""
+        raw = "first\r\nsecond é\n".encode() + b"\xff" * 3 + b"x" * 300_000
+        (tmp_path / "data.txt").write_bytes(raw)
+
+        text = await manager.read_file("data.txt")
+        assert text.startswith("first\nsecond é\n\ufffd")
+        assert len(text) == len("first\nsecond é\n") + 3 + 300_000
+        assert await manager.read_bytes("data.txt") == raw
+
+        lines = []
+        async for line in manager.read_lines("data.txt"):
+            lines.append(line)
+            if len(lines) == 2:
+                break
+        assert lines == ["first\n", "second é\n"]
+
+    @pytest.mark.asyncio
+    async def test_copy_file_and_directory(self, manager, tmp_path):
+        """Test copying a file and a directory tree."""
+        (tmp_path / "src" / "nested").mkdir(parents=True)
+        (tmp_path / "src" / "nested" / "a.txt").write_text("a")
+
+        await manager.copy_file("src/nested/a.txt", "copies/a.txt")
+        await manager.copy_directory("src", "mirror")
+
+        assert (tmp_path / "copies" / "a.txt").read_text() == "a"
+        assert (tmp_path / "mirror" / "nested" / "a.txt").read_text() == "a"
@@ -0,0 +1,235 @@
+"""
+Unit tests for the Gemini client.
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from devops_agent.config import get_config
+from devops_agent.core import gemini_client
+from devops_agent.core.gemini_client import GeminiClient
+from devops_agent.utils.helpers import strip_fence
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    """Create a client with a dummy API key (no requests are made)."""
+    monkeypatch.setattr(get_config().gemini, "api_key", "test-key")
+    monkeypatch.setattr(get_config(), "workspace_dir", tmp_path)
+    return GeminiClient()
+
+
+async def _noop(**kwargs):
+    return kwargs
+
+
+def _response(*parts):
+    """Build a minimal stand-in for a generate_content response."""
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=list(parts)))])
+
+
+def _call(name, **args):
+    return SimpleNamespace(function_call=SimpleNamespace(name=name, args=args))
+
+
+class TestTools:
+    """Test tool registration."""
+
+    def test_build_tools_is_cached_until_registry_changes(self, client):
+        """Test that Tool objects are rebuilt only after a new registration."""
+        client.register_tool("a", "Tool a", {"type": "object", "properties": {}}, _noop)
+        first = client._build_tools()
+        assert client._build_tools() is first
+
+        client.register_tool("b", "Tool b", {"type": "object", "properties": {}}, _noop)
+        second = client._build_tools()
+        assert second is not first
+        assert len(second[0].function_declarations) == 2
+
+    def test_declaration_built_at_registration(self, client):
+        """Test that the schema is converted once, when the tool is registered."""
+        params = {"type": "object", "properties": {"path": {"type": "string"}}}
+        client.register_tool("read", "Read a file", params, _noop)
+
+        decl = client.tools["read"].func_decl
+        assert decl.name == "read"
+        assert client._build_tools()[0].function_declarations == [decl]
+
+
+class TestSdkConfiguration:
+    """Test sharing the SDK's connection between clients."""
+
+    def test_configured_once_per_key(self, monkeypatch, tmp_path):
+        """Test that new clients don't reset the SDK's cached connection."""
+        configure = Mock()
+        monkeypatch.setattr(gemini_client, "_configured_api_key", None)
+        monkeypatch.setattr(gemini_client.genai, "configure", configure)
+        monkeypatch.setattr(get_config(), "workspace_dir", tmp_path)
+
+        monkeypatch.setattr(get_config().gemini, "api_key", "key-1")
+        GeminiClient()
+        GeminiClient(system_instruction="Another agent")
+        assert configure.call_count == 1
+
+        monkeypatch.setattr(get_config().gemini, "api_key", "key-2")
+        GeminiClient()
+        assert configure.call_count == 2
+
+
+class TestGenerate:
+    """Test generation with tool calls."""
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_in_one_turn_run_concurrently(self, client):
+        """Test that parallel tool calls overlap and results keep call order."""
+        a_started, b_started = asyncio.Event(), asyncio.Event()
+
+        async def tool_a():
+            a_started.set()
+            await b_started.wait()
+            return "a"
+
+        async def tool_b():
+            b_started.set()
+            await a_started.wait()
+            return "b"
+
+        params = {"type": "object", "properties": {}}
+        client.register_tool("a", "Tool a", params, tool_a)
+        client.register_tool("b", "Tool b", params, tool_b)
+        client.model = Mock()
+        client.model.generate_content.return_value = _response(_call("a"), _call("b"))
+        chat = client.model.start_chat.return_value
+        chat.send_message.return_value = _response(SimpleNamespace(text="done"))
+
+        assert await asyncio.wait_for(client.generate("deploy"), timeout=5) == "done"
+        client.model.generate_content.assert_called_once()
+        parts = chat.send_message.call_args.args[0]
+        assert [p.function_response.name for p in parts] == ["a", "b"]
+        assert [p.function_response.response["result"] for p in parts] == ["a", "b"]
+
+
+class TestStructuredReplies:
+    """Test parsing of JSON replies."""
+
+    @pytest.mark.parametrize("reply", [
+        '{"language": "python"}',
+        '```json\n{"language": "python"}\n```',
+        '  ```\n{"language": "python"}```\n',
+        '```JSON5\n{"language": "python"}\n```  ',
+    ])
+    def test_strip_fence(self, reply):
+        """Test that fenced and bare replies yield the same body."""
+        assert strip_fence(reply) == '{"language": "python"}'
+
+    @pytest.mark.asyncio
+    async def test_analyze_code_parses_fenced_json(self, client):
+        """Test that analyze_code returns the parsed object."""
+        client.generate = AsyncMock(return_value='```json\n{"language": "go", "port": 8080}\n```')
+
+        assert await client.analyze_code("package main") == {"language": "go", "port": 8080}
+
+    @pytest.mark.asyncio
+    async def test_analyze_code_keeps_unparseable_reply(self, client):
+        """Test that invalid JSON is returned as the raw response."""
+        client.generate = AsyncMock(return_value="not json")
+
+        assert await client.analyze_code("x = 1") == {"raw_response": "not json"}
+
+    @pytest.mark.asyncio
+    async def test_follow_up_turns_share_one_chat(self, client):
+        """Test that later tool turns reuse the chat instead of resending the prompt."""
+        client.register_tool("a", "Tool a", {"type": "object", "properties": {}}, _noop)
+        client.model = Mock()
+        client.model.generate_content.return_value = _response(_call("a"))
+        chat = client.model.start_chat.return_value
+        chat.send_message.side_effect = [
+            _response(_call("a")),
+            _response(SimpleNamespace(text="done")),
+        ]
+
+        assert await client.generate("deploy", context={"service": "api"}) == "done"
+        client.model.start_chat.assert_called_once()
+        history = client.model.start_chat.call_args.kwargs["history"]
+        assert history[0]["parts"][0].startswith('Context:\n```json\n{"service":"api"}')
+        assert chat.send_message.call_count == 2
+
+
+class TestAnalyzeCache:
+    """Test caching of code analysis."""
+
+    @pytest.mark.asyncio
+    async def test_same_content_analyzed_once(self, client):
+        """Test that repeated and concurrent calls share one Gemini request."""
+        client.generate = AsyncMock(return_value='{"language": "python"}')
+
+        results = await asyncio.gather(*(client.analyze_code("x = 1", "a.py") for _ in range(3)))
+        results.append(await client.analyze_code("x = 1", "a.py"))
+
+        assert results == [{"language": "python"}] * 4
+        client.generate.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_cache_persists_across_clients(self, client):
+        """Test that a new client reuses analyses saved in the workspace."""
+        client.generate = AsyncMock(return_value='{"language": "go"}')
+        await client.analyze_code("package main")
+
+        other = GeminiClient()
+        other.generate = AsyncMock()
+        assert await other.analyze_code("package main") == {"language": "go"}
+        other.generate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_model_change_misses_cache(self, client, monkeypatch):
+        """Test that analyses from another model are not reused."""
+        client.generate = AsyncMock(side_effect=['{"language": "go"}', '{"language": "golang"}'])
+        await client.analyze_code("package main")
+
+        monkeypatch.setattr(client.config.gemini, "model_name", "other-model")
+        assert await client.analyze_code("package main") == {"language": "golang"}
+        assert client.generate.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unparseable_reply_not_cached(self, client):
+        """Test that failed parses are retried on the next call."""
+        client.generate = AsyncMock(side_effect=["oops", '{"language": "rust"}'])
+
+        assert await client.analyze_code("fn main() {}") == {"raw_response": "oops"}
+        assert await client.analyze_code("fn main() {}") == {"language": "rust"}
+
+    @pytest.mark.asyncio
+    async def test_clients_sharing_workspace_keep_each_others_entries(self, client):
+        """Test that saving merges with entries another client wrote meanwhile."""
+        other = GeminiClient()
+        client.generate = AsyncMock(return_value='{"language": "go"}')
+        other.generate = AsyncMock(return_value='{"language": "rust"}')
+        await client.analyze_code("package main")
+        await other.analyze_code("fn main() {}")
+
+        fresh = GeminiClient()
+        fresh.generate = AsyncMock()
+        assert await fresh.analyze_code("package main") == {"language": "go"}
+        assert await fresh.analyze_code("fn main() {}") == {"language": "rust"}
+        fresh.generate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entries_evicted(self, client, monkeypatch):
+        """Test that the cache keeps only the most recently used entries."""
+        monkeypatch.setattr(gemini_client, "ANALYZE_CACHE_MAX_ENTRIES", 2)
+        clock = iter(range(100))
+        monkeypatch.setattr(gemini_client.time, "time", lambda: next(clock))
+        client.generate = AsyncMock(return_value='{"language": "python"}')
+        await client.analyze_code("a = 1")
+        await client.analyze_code("b = 2")
+        await client.analyze_code("a = 1")  # Touch a, so b is the oldest
+        await client.analyze_code("c = 3")
+
+        fresh = GeminiClient()
+        fresh.generate = AsyncMock(return_value='{"language": "python"}')
+        await fresh.analyze_code("a = 1")
+        await fresh.analyze_code("c = 3")
+        fresh.generate.assert_not_awaited()
+        await fresh.analyze_code("b = 2")
+        fresh.generate.assert_awaited_once()
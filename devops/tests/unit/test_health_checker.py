@@ -0,0 +1,192 @@
+"""
+Unit tests for the health checker.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from devops_agent.core.health_checker import (
+    DeploymentVerifier,
+    HealthChecker,
+    MAX_HEALTH_BODY_BYTES,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address))
+        status = self.server.statuses.get(self.path, 200)
+        body = self.server.bodies.get(self.path) or json.dumps({"status": "ok"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Run a local HTTP/1.1 server that records each request."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    httpd.statuses = {}
+    httpd.bodies = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server, path="/health"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+class TestHealthChecker:
+    """Test single-endpoint checks."""
+
+    @pytest.mark.asyncio
+    async def test_probes_reuse_one_connection(self, server):
+        """Test that repeated probes go over the same keep-alive connection."""
+        async with HealthChecker(expected_json_fields=["status"]) as checker:
+            first = await checker.check(_url(server), max_retries=1)
+            second = await checker.check(_url(server), max_retries=1, use_cache=False)
+
+        assert first.healthy and second.healthy
+        assert len({client for _, client in server.requests}) == 1
+        assert checker._client is None
+
+    @pytest.mark.asyncio
+    async def test_recent_healthy_result_is_reused(self, server):
+        """Test that a healthy result is cached briefly per URL."""
+        async with HealthChecker() as checker:
+            await checker.check(_url(server), max_retries=1)
+            await checker.check(_url(server), max_retries=1)
+            assert len(server.requests) == 1
+
+            await checker.check(_url(server), max_retries=1, use_cache=False)
+            await checker.check(_url(server), max_retries=1, headers={"X-Probe": "1"})
+            assert len(server.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_cache_expires(self, server, monkeypatch):
+        """Test that results older than the TTL are probed again."""
+        monkeypatch.setattr(HealthChecker, "CACHE_TTL", 0)
+        async with HealthChecker() as checker:
+            await checker.check(_url(server), max_retries=1)
+            await checker.check(_url(server), max_retries=1)
+
+        assert len(server.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_oversized_body(self, server):
+        """Test that a huge body fails JSON checks but not a status-only check."""
+        server.bodies["/health"] = b" " * (MAX_HEALTH_BODY_BYTES + 1)
+        async with HealthChecker(expected_json_fields=["status"]) as checker:
+            result = await checker._do_check(_url(server))
+        assert not result.healthy
+        assert "larger than" in result.message
+
+        async with HealthChecker() as checker:
+            result = await checker.check(_url(server), max_retries=1)
+        assert result.healthy
+
+    @pytest.mark.asyncio
+    async def test_unexpected_status(self, server):
+        """Test that a non-expected status code is unhealthy."""
+        server.statuses["/health"] = 503
+        async with HealthChecker() as checker:
+            result = await checker.check(_url(server), max_retries=1)
+
+        assert not result.healthy
+        assert result.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_client_error_is_not_retried(self, server):
+        """Test that a permanent 4xx ends the retry loop immediately."""
+        server.statuses["/health"] = 404
+        async with HealthChecker() as checker:
+            result = await checker.check(_url(server), max_retries=3, retry_delay=60)
+
+        assert not result.healthy
+        assert result.checks_performed == 1
+        assert len(server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_retryable_status_is_retried(self, server):
+        """Test that statuses in retry_on_status keep retrying."""
+        server.statuses["/health"] = 429
+        async with HealthChecker() as checker:
+            result = await checker.check(_url(server), max_retries=3, retry_delay=0)
+
+        assert not result.healthy
+        assert result.checks_performed == 3
+        assert len(server.requests) == 3
+
+
+class TestWaitForReady:
+    """Test readiness polling."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_waiters_share_one_poller(self, server):
+        """Test that waiters on one URL don't multiply the probes."""
+        server.statuses["/health"] = 503
+        async with HealthChecker() as checker:
+            waiters = [
+                asyncio.create_task(
+                    checker.wait_for_ready(_url(server), timeout=5, poll_interval=0.05)
+                )
+                for _ in range(5)
+            ]
+            await asyncio.sleep(0.2)
+            server.statuses["/health"] = 200
+            results = await asyncio.gather(*waiters)
+
+        assert all(r.healthy for r in results)
+        assert {r.checks_performed for r in results} == {len(server.requests)}
+        assert not checker._readiness_polls
+
+    @pytest.mark.asyncio
+    async def test_timeout_stops_poller(self, server):
+        """Test that the poller stops when its last waiter times out."""
+        server.statuses["/health"] = 503
+        async with HealthChecker() as checker:
+            result = await checker.wait_for_ready(
+                _url(server), timeout=0.2, poll_interval=0.05
+            )
+            assert not checker._readiness_polls
+            # Let a probe that was already on the wire reach the server
+            await asyncio.sleep(0.05)
+            probes = len(server.requests)
+            await asyncio.sleep(0.2)
+
+        assert not result.healthy
+        assert result.status_code == 503
+        assert result.message == "Timeout after 0.2s"
+        assert len(server.requests) == probes
+
+
+class TestDeploymentVerifier:
+    """Test full deployment verification."""
+
+    @pytest.mark.asyncio
+    async def test_additional_checks_reported_in_order(self, server):
+        """Test that concurrent additional checks keep the order they were given."""
+        server.statuses["/admin"] = 404
+        checks = [{"name": f"page{i}", "path": f"/page{i}"} for i in range(12)]
+        checks.insert(5, {"name": "admin", "path": "/admin"})
+
+        result = await DeploymentVerifier().verify(
+            _url(server, ""), additional_checks=checks, max_retries=1
+        )
+
+        assert not result["success"]
+        assert [c["name"] for c in result["checks"]] == ["health"] + [c["name"] for c in checks]
+        assert result["errors"] == ["Check 'admin' failed"]
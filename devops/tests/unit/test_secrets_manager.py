@@ -6,6 +6,7 @@ import pytest
 from pathlib import Path
 from devops_agent.core.secrets_manager import (
     SecretsManager,
+    _derive_fernet,
     get_secrets_manager,
     get_secret,
     set_secret,
@@ -59,6 +60,18 @@ class TestSecretsManager:
         assert "key1" in keys
         assert "key2" in keys
     
+    def test_update(self, manager, secrets_file):
+        """Test storing several secrets at once."""
+        manager.set_secret("key1", "old")
+        manager.update({"key1": "value1", "key2": "value2"})
+        
+        reloaded = SecretsManager(
+            secrets_file=secrets_file,
+            passphrase="test-passphrase-123"
+        )
+        assert reloaded.get_secret("key1") == "value1"
+        assert reloaded.get_secret("key2") == "value2"
+    
     def test_clear_all(self, manager):
         """Test clearing all secrets."""
         manager.set_secret("key1", "value1")
@@ -83,6 +96,33 @@ class TestSecretsManager:
         value = manager2.get_secret("persistent_key")
         assert value == "persistent_value"
     
+    def test_key_derived_once_per_passphrase(self, secrets_file):
+        """Test new instances reuse the derived key instead of rerunning PBKDF2."""
+        SecretsManager(secrets_file=secrets_file, passphrase="cached-passphrase")
+        misses = _derive_fernet.cache_info().misses
+        
+        SecretsManager(secrets_file=secrets_file, passphrase="cached-passphrase")
+        assert _derive_fernet.cache_info().misses == misses
+    
+    def test_unchanged_file_not_decrypted_again(self, manager, secrets_file):
+        """Test a new instance reuses secrets decrypted for an unchanged file."""
+        manager.set_secret("cached_key", "cached_value")
+        
+        manager2 = SecretsManager(
+            secrets_file=secrets_file,
+            passphrase="test-passphrase-123"
+        )
+        manager2._cipher = None  # would fail to parse the ciphertext
+        assert manager2.get_secret("cached_key") == "cached_value"
+    
+    def test_cached_secrets_need_same_passphrase(self, manager, secrets_file):
+        """Test a different passphrase still has to decrypt the file."""
+        manager.set_secret("cached_key", "cached_value")
+        
+        other = SecretsManager(secrets_file=secrets_file, passphrase="wrong")
+        with pytest.raises(RuntimeError, match="Failed to load secrets"):
+            other.get_secret("cached_key")
+    
     def test_env_var_precedence(self, manager, monkeypatch):
         """Test environment variable takes precedence."""
         manager.set_secret("test_key", "stored_value")
@@ -30,6 +30,14 @@ class TestInputValidator:
         with pytest.raises(SecurityError, match="traversal"):
             InputValidator.sanitize_path("../etc/passwd", tmp_path)
     
+    def test_sanitize_path_without_base(self, tmp_path, monkeypatch):
+        """Test a path without base_dir is made absolute."""
+        monkeypatch.chdir(tmp_path)
+        assert InputValidator.sanitize_path("sub/file.txt") == tmp_path / "sub" / "file.txt"
+        
+        with pytest.raises(SecurityError, match="traversal"):
+            InputValidator.sanitize_path("sub/../../etc/passwd")
+    
     def test_sanitize_path_outside_base(self, tmp_path):
         """Test path outside base directory."""
         with pytest.raises(SecurityError, match="outside allowed"):
@@ -86,6 +94,21 @@ class TestInputValidator:
         
         with pytest.raises(SecurityError):
             InputValidator.validate_github_url("https://github.com/user")
+        
+        with pytest.raises(SecurityError):
+            InputValidator.validate_github_url("https://github.com/user/repo\n")
+    
+    def test_validate_github_url_strips_git_suffix(self):
+        """Test owner and repo come from the URL, without .git."""
+        owner, repo = InputValidator.validate_github_url(
+            "https://github.com/some-org/my.repo.git/"
+        )
+        assert (owner, repo) == ("some-org", "my.repo")
+        
+        owner, repo = InputValidator.validate_github_url(
+            "https://github.com/some-org/my.github-tools"
+        )
+        assert repo == "my.github-tools"
     
     def test_validate_env_var_name_valid(self):
         """Test valid environment variable names."""
@@ -109,6 +132,9 @@ class TestInputValidator:
         xss = "<script>alert('xss')</script>"
         safe = InputValidator.sanitize_template_input(xss)
         assert "<script" not in safe.lower()
+        
+        spliced = "<scr{{x}}ipt>"
+        assert InputValidator.sanitize_template_input(spliced) == ">"
 
 
 class TestSecretsMasker:
@@ -135,6 +161,20 @@ class TestSecretsMasker:
         assert "super_secret" not in masked
         assert "REDACTED" in masked
     
+    def test_mask_several_secrets_in_one_pass(self):
+        """Test that each secret is labelled by the pattern that matched it."""
+        text = f"gh=ghp_{'a' * 36} slack=xoxb-123-abc"
+        masked = SecretsMasker.mask_secrets(text)
+        assert masked == "gh=***GITHUB_TOKEN*** slack=***SLACK_TOKEN***"
+    
+    def test_mask_generic_token(self):
+        """Test 40-char tokens are masked, shorter runs and prefixed keys are not."""
+        text = f"short={'x' * 39} long={'y' * 40} openai=sk-{'c' * 48}"
+        masked = SecretsMasker.mask_secrets(text)
+        assert masked == (
+            f"short={'x' * 39} long=***GENERIC_TOKEN*** openai=***OPENAI_KEY***"
+        )
+    
     def test_mask_dict(self):
         """Test dictionary masking."""
         data = {
@@ -0,0 +1,521 @@
+"""
+Unit tests for the Terraform client.
+"""
+
+import asyncio
+import json
+import os
+import pytest
+from unittest.mock import AsyncMock
+from devops_agent.core.executor import CommandResult
+from devops_agent.core import terraform_client
+from devops_agent.core.terraform_client import TerraformClient
+
+
+def _result(stdout: str = "", success: bool = True) -> CommandResult:
+    return CommandResult(
+        command="terraform",
+        return_code=0 if success else 1,
+        stdout=stdout,
+        stderr="",
+        success=success,
+        duration_seconds=0,
+    )
+
+
+@pytest.fixture
+def tf(tmp_path, monkeypatch):
+    """A client whose executor records commands instead of running them."""
+    monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", str(tmp_path / "plugin-cache"))
+    monkeypatch.setattr(terraform_client, "OUTPUTS_CACHE_DIR", tmp_path / "outputs-cache")
+    monkeypatch.setattr(terraform_client, "VALIDATE_CACHE_DIR", tmp_path / "validate-cache")
+    client = TerraformClient(working_dir=tmp_path, var_file="prod.tfvars")
+    client.executor.run = AsyncMock(return_value=_result())
+    return client
+
+
+def _argv(tf, call: int = 0):
+    return tf.executor.run.await_args_list[call].args[0]
+
+
+def _respond(tf, outputs: dict, success: bool = True):
+    """Answer each command with the stdout mapped to its subcommand."""
+    async def run(argv, on_output=None, **kwargs):
+        stdout = outputs.get(argv[1], "")
+        if on_output:
+            for line in stdout.splitlines(keepends=True):
+                on_output(line)
+        return _result(stdout, success)
+    tf.executor.run = AsyncMock(side_effect=run)
+
+
+def _ndjson(*messages) -> str:
+    return "".join(json.dumps(message) + "\n" for message in messages)
+
+
+class TestTerraformClient:
+    """Test command construction and output parsing."""
+
+    @pytest.mark.asyncio
+    async def test_plan_passes_argv_list(self, tf):
+        """Test that variables with spaces and shell characters stay single args."""
+        await tf.plan(var_overrides={"name": "my app; rm -rf /"}, target="module.x")
+
+        assert _argv(tf) == [
+            "terraform", "plan", "-input=false", "-json", "-out=tfplan",
+            "-var-file=prod.tfvars", "-var=name=my app; rm -rf /", "-target=module.x",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_apply_and_destroy_argv(self, tf):
+        """Test that variables are passed unless applying a saved plan."""
+        await tf.apply(auto_approve=True, var_overrides={"region": "eu"})
+        await tf.apply(plan_file="tfplan", var_overrides={"region": "eu"})
+        await tf.destroy(auto_approve=True, target="module.x")
+
+        assert _argv(tf, 0) == [
+            "terraform", "apply", "-input=false", "-json", "-auto-approve",
+            "-var-file=prod.tfvars", "-var=region=eu",
+        ]
+        assert _argv(tf, 2) == ["terraform", "apply", "-input=false", "-json", "tfplan"]
+        assert _argv(tf, 4) == [
+            "terraform", "destroy", "-input=false", "-auto-approve",
+            "-var-file=prod.tfvars", "-target=module.x",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_import_resource(self, tf):
+        """Test that import passes address and ID as separate args."""
+        await tf.import_resource("google_cloud_run_service.app", "projects/p/services/s")
+
+        assert _argv(tf) == [
+            "terraform", "import", "google_cloud_run_service.app", "projects/p/services/s",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_state(self, tf):
+        """Test that resources, including module resources, and outputs come from one show."""
+        _respond(tf, {"show": json.dumps({"values": {
+            "outputs": {"service_url": {"sensitive": False, "value": "https://app.run"}},
+            "root_module": {
+                "resources": [{"address": "google_project_service.run"}],
+                "child_modules": [{
+                    "address": "module.app",
+                    "resources": [{"address": "module.app.google_cloud_run_service.app"}],
+                }],
+            },
+        }})})
+
+        state = await tf.get_state()
+
+        assert _argv(tf) == ["terraform", "show", "-json"]
+        assert tf.executor.run.await_count == 1
+        assert state.exists
+        assert state.resources == [
+            "google_project_service.run", "module.app.google_cloud_run_service.app",
+        ]
+        assert state.outputs == {"service_url": "https://app.run"}
+
+    @pytest.mark.asyncio
+    async def test_get_state_without_state(self, tf):
+        """Test that an empty state reports nothing."""
+        _respond(tf, {"show": '{"format_version": "1.0"}'})
+
+        state = await tf.get_state()
+
+        assert not state.exists
+        assert state.resources == [] and state.outputs == {}
+
+    @pytest.mark.asyncio
+    async def test_init_skipped_when_unchanged(self, tf, tmp_path):
+        """Test that init only reruns after the working dir changes."""
+        (tmp_path / "main.tf").write_text("")
+        (tmp_path / ".terraform" / "providers").mkdir(parents=True)
+        (tmp_path / ".terraform.lock.hcl").write_text("")
+
+        assert await tf.init()
+        assert await tf.init()
+        assert tf.executor.run.await_count == 1
+
+        assert await tf.init(upgrade=True)
+        assert tf.executor.run.await_count == 2
+
+        main_tf = tmp_path / "main.tf"
+        main_tf.write_text('module "x" {}')
+        mtime = main_tf.stat().st_mtime_ns + 10**9
+        os.utime(main_tf, ns=(mtime, mtime))
+        assert await tf.init()
+        assert tf.executor.run.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_validate_skipped_when_unchanged(self, tf, tmp_path):
+        """Test that validate only reruns after the config changes."""
+        (tmp_path / "main.tf").write_text("")
+        (tmp_path / ".terraform").mkdir()
+        (tmp_path / ".terraform.lock.hcl").write_text("")
+        _respond(tf, {"validate": '{"valid": true, "diagnostics": []}'})
+
+        assert await tf.validate() == (True, [])
+        assert await tf.validate() == (True, [])
+        assert tf.executor.run.await_count == 1
+
+        (tmp_path / "main.tf").write_text('variable "x" {}')
+        await tf.validate()
+        assert tf.executor.run.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_validate_not_remembered(self, tf, tmp_path):
+        """Test that an invalid config is validated again every time."""
+        (tmp_path / ".terraform").mkdir()
+        (tmp_path / ".terraform.lock.hcl").write_text("")
+        _respond(tf, {"validate": json.dumps({"valid": False, "diagnostics": [
+            {"severity": "error", "summary": "Unsupported argument"}]})})
+
+        assert await tf.validate() == (False, ["Unsupported argument"])
+        assert await tf.validate() == (False, ["Unsupported argument"])
+        assert tf.executor.run.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_check_installed_is_cached(self, tf, monkeypatch):
+        """Test that the version probe runs once per process."""
+        monkeypatch.setattr(terraform_client, "_installed", None)
+        _respond(tf, {"version": '{"terraform_version": "1.7.0"}'})
+
+        assert await tf.check_installed() == (True, "1.7.0")
+        assert await tf.check_installed() == (True, "1.7.0")
+        assert tf.executor.run.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_check_installed_retries_when_missing(self, tf, monkeypatch):
+        """Test that a failed probe is not cached."""
+        monkeypatch.setattr(terraform_client, "_installed", None)
+        _respond(tf, {}, success=False)
+
+        assert await tf.check_installed() == (False, None)
+        _respond(tf, {"version": '{"terraform_version": "1.7.0"}'})
+        assert await tf.check_installed() == (True, "1.7.0")
+
+    @pytest.mark.asyncio
+    async def test_plan_counts(self, tf):
+        """Test that the streamed change summary is parsed into change counts."""
+        seen = []
+        _respond(tf, {"plan": _ndjson(
+            {"@message": "app: Plan to create", "type": "planned_change"},
+            {"@message": "Plan: 2 to add, 1 to change, 0 to destroy.",
+             "type": "change_summary",
+             "changes": {"add": 2, "change": 1, "remove": 0, "operation": "plan"}},
+        )})
+
+        plan = await tf.plan(on_output=seen.append)
+
+        assert plan.success and plan.has_changes
+        assert (plan.add, plan.change, plan.destroy) == (2, 1, 0)
+        assert tf.executor.run.await_count == 1
+        assert seen == ["app: Plan to create\n", "Plan: 2 to add, 1 to change, 0 to destroy.\n"]
+
+    @pytest.mark.asyncio
+    async def test_plan_output_only_changes(self, tf):
+        """Test that output changes alone still count as changes."""
+        _respond(tf, {"plan": _ndjson(
+            {"type": "outputs", "outputs": {"url": {"action": "update"}}},
+            {"type": "change_summary",
+             "changes": {"add": 0, "change": 0, "remove": 0, "operation": "plan"}},
+        )})
+
+        plan = await tf.plan()
+
+        assert plan.has_changes
+        assert (plan.add, plan.change, plan.destroy) == (0, 0, 0)
+
+    @pytest.mark.asyncio
+    async def test_plan_counts_from_saved_plan(self, tf):
+        """Test the fallback to the saved plan, with replaces counted twice."""
+        _respond(tf, {
+            "plan": "Plan: 9 to add, 9 to change, 9 to destroy.",
+            "show": json.dumps({
+                "resource_changes": [
+                    {"change": {"actions": ["create"]}},
+                    {"change": {"actions": ["delete", "create"]}},
+                    {"change": {"actions": ["update"]}},
+                    {"change": {"actions": ["no-op"]}},
+                ],
+            }),
+        })
+
+        plan = await tf.plan()
+
+        assert _argv(tf, 1) == ["terraform", "show", "-json", "tfplan"]
+        assert plan.has_changes
+        assert (plan.add, plan.change, plan.destroy) == (2, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_saved_plan_output_only_changes(self, tf):
+        """Test that output changes in the saved plan count as changes."""
+        _respond(tf, {"show": json.dumps({
+            "resource_changes": [],
+            "output_changes": {"url": {"actions": ["update"]}},
+        })})
+
+        plan = await tf.plan()
+
+        assert plan.has_changes
+        assert (plan.add, plan.change, plan.destroy) == (0, 0, 0)
+
+    @pytest.mark.asyncio
+    async def test_apply_reads_json_summary(self, tf):
+        """Test that apply counts come from the -json change summary."""
+        _respond(tf, {"apply": _ndjson(
+            {"type": "change_summary",
+             "changes": {"add": 9, "change": 9, "remove": 9, "operation": "plan"}},
+            {"@message": "Apply complete!", "type": "change_summary",
+             "changes": {"add": 3, "change": 1, "remove": 2, "operation": "apply"}},
+        )})
+
+        result = await tf.apply(plan_file="tfplan")
+
+        assert _argv(tf) == ["terraform", "apply", "-input=false", "-json", "tfplan"]
+        assert result.success
+        assert (
+            result.resources_created,
+            result.resources_updated,
+            result.resources_destroyed,
+        ) == (3, 1, 2)
+
+    @pytest.mark.asyncio
+    async def test_apply_json_errors(self, tf):
+        """Test that error diagnostics become the apply's errors."""
+        line = {"type": "diagnostic", "@message": "Error: quota",
+                "diagnostic": {"severity": "error", "summary": "quota exceeded"}}
+        _respond(tf, {"apply": _ndjson(line)}, success=False)
+
+        result = await tf.apply(auto_approve=True)
+
+        assert not result.success
+        assert result.errors == ["quota exceeded"]
+
+
+class TestOutputsCache:
+    """Test the on-disk cache of terraform outputs."""
+
+    @staticmethod
+    def _write_state(path, serial, lineage="abc"):
+        path.write_text(json.dumps(
+            {"version": 4, "terraform_version": "1.7.0", "serial": serial,
+             "lineage": lineage, "outputs": {}},
+            indent=2,
+        ))
+
+    @pytest.mark.asyncio
+    async def test_outputs_cached_per_serial(self, tf, tmp_path):
+        """Test that outputs are reused until the state serial changes."""
+        self._write_state(tmp_path / "terraform.tfstate", 1)
+        _respond(tf, {"output": '{"url": {"value": "https://a", "sensitive": false}}'})
+
+        assert await tf.get_outputs() == {"url": "https://a"}
+        assert await tf.get_outputs() == {"url": "https://a"}
+        assert tf.executor.run.await_count == 1
+
+        self._write_state(tmp_path / "terraform.tfstate", 2)
+        await tf.get_outputs()
+        assert tf.executor.run.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_sensitive_outputs_not_cached(self, tf, tmp_path):
+        """Test that outputs with sensitive values are never written to disk."""
+        self._write_state(tmp_path / "terraform.tfstate", 1)
+        _respond(tf, {"output": '{"password": {"value": "hunter2", "sensitive": true}}'})
+
+        await tf.get_outputs()
+        tf._outputs = None  # As a fresh client would start
+        await tf.get_outputs()
+
+        assert tf.executor.run.await_count == 2
+        assert not (tmp_path / "outputs-cache").exists()
+
+    @pytest.mark.asyncio
+    async def test_remote_backend_not_cached(self, tf, tmp_path):
+        """Test that a leftover local state file is ignored with a remote backend."""
+        self._write_state(tmp_path / "terraform.tfstate", 1)
+        (tmp_path / ".terraform").mkdir()
+        (tmp_path / ".terraform" / "terraform.tfstate").write_text(
+            '{"backend": {"type": "gcs", "config": {"bucket": "b"}}}'
+        )
+        _respond(tf, {"output": '{"url": {"value": "https://a"}}'})
+
+        await tf.get_outputs()
+        tf._outputs = None  # As a fresh client would start
+        await tf.get_outputs()
+
+        assert tf.executor.run.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_client_remembers_outputs(self, tf):
+        """Test that one client reads outputs once until it writes the state."""
+        _respond(tf, {
+            "show": json.dumps({"values": {
+                "outputs": {"url": {"value": "https://a"}},
+                "root_module": {"resources": [{"address": "null_resource.x"}]},
+            }}),
+            "output": '{"url": {"value": "https://b"}}',
+        })
+
+        await tf.get_state()
+        assert await tf.get_outputs() == {"url": "https://a"}
+        assert tf.executor.run.await_count == 1
+
+        await tf.import_resource("null_resource.y", "y")
+        assert await tf.get_outputs() == {"url": "https://b"}
+        assert await tf.get_outputs() == {"url": "https://b"}
+        assert tf.executor.run.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_refresh_drops_cache(self, tf, tmp_path):
+        """Test that commands that write state drop the cached outputs."""
+        self._write_state(tmp_path / "terraform.tfstate", 1)
+        _respond(tf, {"output": '{"url": {"value": "https://a"}}'})
+
+        await tf.get_outputs()
+        await tf.refresh()
+        await tf.get_outputs()
+
+        assert tf.executor.run.await_count == 3
+
+
+class TestConcurrencyLimit:
+    """Test the cap on concurrent state-changing commands."""
+
+    @pytest.mark.asyncio
+    async def test_heavy_commands_share_slots(self, tf, monkeypatch):
+        """Test that plans wait for a slot while read-only commands don't."""
+        monkeypatch.setattr(terraform_client, "TF_CONCURRENCY", 2)
+        running = {"plan": 0, "output": 0}
+        peak = {"plan": 0, "output": 0}
+
+        async def run(argv, **kwargs):
+            running[argv[1]] += 1
+            peak[argv[1]] = max(peak[argv[1]], running[argv[1]])
+            await asyncio.sleep(0.01)
+            running[argv[1]] -= 1
+            return _result("{}" if argv[1] == "output" else "")
+        tf.executor.run = AsyncMock(side_effect=run)
+
+        await asyncio.gather(*[tf.plan(out_file=None) for _ in range(5)])
+        await asyncio.gather(*[tf.get_outputs() for _ in range(5)])
+
+        assert peak == {"plan": 2, "output": 5}
+
+
+class TestPluginCache:
+    """Test the shared provider cache setup."""
+
+    @pytest.mark.asyncio
+    async def test_commands_get_automation_env(self, tf, monkeypatch):
+        """Test that Terraform runs unattended without overriding the user's env."""
+        monkeypatch.delenv("TF_IN_AUTOMATION", raising=False)
+        monkeypatch.setenv("CHECKPOINT_DISABLE", "")
+        monkeypatch.delenv("TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE", raising=False)
+
+        await tf.validate()
+
+        env = tf.executor.run.await_args.kwargs["env"]
+        assert env["TF_IN_AUTOMATION"] == "1"
+        assert "CHECKPOINT_DISABLE" not in env
+        assert "TF_PLUGIN_CACHE_DIR" not in env
+        assert "TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE" not in env
+
+    @pytest.mark.asyncio
+    async def test_prewarm_inits_stub_config(self, tmp_path, monkeypatch):
+        """Test that prewarm inits a throwaway config requiring the providers."""
+        monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", str(tmp_path / "plugin-cache"))
+        seen = {}
+
+        async def run(executor, argv, **kwargs):
+            seen["argv"] = argv
+            seen["versions_tf"] = (executor.working_dir / "versions.tf").read_text()
+            return _result()
+        monkeypatch.setattr(terraform_client.CommandExecutor, "run", run)
+
+        assert await TerraformClient.prewarm({"hashicorp/google": "~> 5.0", "hashicorp/random": None})
+
+        assert seen["argv"] == ["terraform", "init", "-backend=false", "-input=false"]
+        assert 'google = { source = "hashicorp/google", version = "~> 5.0" }' in seen["versions_tf"]
+        assert 'random = { source = "hashicorp/random" }' in seen["versions_tf"]
+
+
+class TestDeployCache:
+    """Test skipping deploys whose inputs haven't changed."""
+
+    @pytest.fixture
+    def fake_terraform(self, tmp_path, monkeypatch):
+        """Fake terraform in a dir with local state; apply bumps the serial."""
+        monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", str(tmp_path / "plugin-cache"))
+        monkeypatch.setattr(terraform_client, "OUTPUTS_CACHE_DIR", tmp_path / "outputs-cache")
+        monkeypatch.setattr(terraform_client, "DEPLOY_CACHE_DIR", tmp_path / "deploy-cache")
+        monkeypatch.setattr(terraform_client, "VALIDATE_CACHE_DIR", tmp_path / "validate-cache")
+        tf_dir = tmp_path / "infra"
+        tf_dir.mkdir()
+        (tf_dir / "main.tf").write_text('resource "null_resource" "x" {}')
+        state = {"version": 4, "serial": 1, "lineage": "abc"}
+        (tf_dir / "terraform.tfstate").write_text(json.dumps(state, indent=2))
+        commands = []
+
+        async def run(executor, argv, on_output=None, **kwargs):
+            commands.append(argv[1])
+            stdout = {
+                "validate": '{"valid": true, "diagnostics": []}',
+                "plan": _ndjson({"type": "change_summary", "changes": {
+                    "add": 1, "change": 0, "remove": 0, "operation": "plan"}}),
+                "output": '{"url": {"value": "https://a"}}',
+            }.get(argv[1], "")
+            if argv[1] == "apply":
+                state["serial"] += 1
+                (tf_dir / "terraform.tfstate").write_text(json.dumps(state, indent=2))
+            if on_output:
+                for line in stdout.splitlines(keepends=True):
+                    on_output(line)
+            return _result(stdout)
+        monkeypatch.setattr(terraform_client.CommandExecutor, "run", run)
+        return tf_dir, commands
+
+    @pytest.mark.asyncio
+    async def test_unchanged_deploy_is_skipped(self, fake_terraform):
+        """Test that a repeat deploy runs no Terraform until an input changes."""
+        tf_dir, commands = fake_terraform
+
+        first = await terraform_client.deploy_infrastructure(
+            tf_dir, variables={"a": "1"}, use_cache=True
+        )
+        assert first.success and "apply" in commands
+
+        commands.clear()
+        second = await terraform_client.deploy_infrastructure(
+            tf_dir, variables={"a": "1"}, use_cache=True
+        )
+        assert second.success and second.outputs == {"url": "https://a"}
+        assert commands == []
+
+        await terraform_client.deploy_infrastructure(tf_dir, variables={"a": "2"}, use_cache=True)
+        assert "plan" in commands
+
+    @pytest.mark.asyncio
+    async def test_config_change_redeploys(self, fake_terraform):
+        """Test that editing the config runs the full pipeline again."""
+        tf_dir, commands = fake_terraform
+        await terraform_client.deploy_infrastructure(tf_dir, use_cache=True)
+
+        (tf_dir / "main.tf").write_text('resource "null_resource" "y" {}')
+        commands.clear()
+        await terraform_client.deploy_infrastructure(tf_dir, use_cache=True)
+
+        assert commands[:1] == ["init"] and "apply" in commands
+
+    @pytest.mark.asyncio
+    async def test_cache_is_opt_in(self, fake_terraform):
+        """Test that a plain repeat deploy still plans to catch drift."""
+        tf_dir, commands = fake_terraform
+        await terraform_client.deploy_infrastructure(tf_dir)
+
+        commands.clear()
+        await terraform_client.deploy_infrastructure(tf_dir)
+
+        assert "plan" in commands
@@ -0,0 +1,399 @@
+"""
+Unit tests for the uncertainty handler.
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock
+from devops_agent.core.uncertainty_handler import (
+    PORT_PROMPT_SAMPLE_CHARS,
+    ResolutionStrategy,
+    UncertaintyHandler,
+    _package_excerpt,
+    _parse_project_type,
+    _port_code_excerpt,
+)
+
+
+def _handler(*replies, **kwargs):
+    """Create a handler whose Gemini client returns the given replies in turn."""
+    gemini = Mock()
+    gemini.generate = AsyncMock(side_effect=list(replies))
+    return UncertaintyHandler(gemini_client=gemini, **kwargs)
+
+
+class TestDominantLanguage:
+    """Test picking the project language from file counts."""
+
+    def test_clear_majority(self):
+        """Test that extensions are grouped by language before comparing."""
+        handler = _handler()
+
+        assert handler._determine_dominant_language({".ts": 3, ".tsx": 3, ".py": 4}) == "nodejs"
+
+    def test_tie_goes_to_first_language(self):
+        """Test that equal counts resolve in table order, whatever the dict order."""
+        handler = _handler()
+
+        assert handler._determine_dominant_language({".js": 2, ".py": 2}) == "python"
+
+    def test_no_source_files(self):
+        """Test that unrelated extensions give no answer."""
+        handler = _handler()
+
+        assert handler._determine_dominant_language({".md": 5, ".yml": 2}) is None
+        assert handler._determine_dominant_language({}) is None
+
+
+class TestStartCommands:
+    """Test the standard start command tables."""
+
+    def test_entry_point_filled_in(self):
+        """Test that templates use the entry point, or their own default."""
+        handler = _handler()
+
+        assert handler._get_framework_start_command("python", "FastAPI", "api.server") == (
+            "uvicorn api.server:app --host 0.0.0.0 --port 8080"
+        )
+        assert handler._get_framework_start_command("python", "streamlit") == (
+            "streamlit run app.py --server.port 8080"
+        )
+        assert handler._get_generic_start_command("python") == "python main.py"
+
+    def test_unknown_combinations(self):
+        """Test that unlisted frameworks and project types fall through."""
+        handler = _handler()
+
+        assert handler._get_framework_start_command("python", "bottle") is None
+        assert handler._get_generic_start_command("elixir") == "npm start"
+
+
+class TestPortExtraction:
+    """Test finding the listening port in code."""
+
+    def test_patterns_checked_in_order(self):
+        """Test that an earlier pattern wins even if a later one matches first."""
+        handler = _handler()
+        code = "port = 5000\napp.listen(3000)"
+
+        assert handler._extract_port_from_code(code) == 3000
+
+    def test_out_of_range_port_ignored(self):
+        """Test that impossible port numbers are skipped."""
+        handler = _handler()
+
+        assert handler._extract_port_from_code("PORT = 70000") is None
+        assert handler._extract_port_from_code("uvicorn app --port=8001") == 8001
+
+
+class TestAnswerCache:
+    """Test reuse of answers to identical AI questions."""
+
+    @pytest.mark.asyncio
+    async def test_same_question_asked_once(self):
+        """Test that a repeated question is answered from the cache."""
+        handler = _handler("8000", "9000")
+
+        assert await handler._ask_gemini_port(["app.run()"]) == 8000
+        assert await handler._ask_gemini_port(["app.run()"]) == 8000
+        assert await handler._ask_gemini_port(["server.start()"]) == 9000
+        assert handler.gemini.generate.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unusable_reply_not_cached(self):
+        """Test that a reply that can't be parsed is asked again."""
+        handler = _handler("the port is 8000", "8000")
+
+        assert await handler._ask_gemini_port(["app.run()"]) is None
+        assert await handler._ask_gemini_port(["app.run()"]) == 8000
+        assert handler.gemini.generate.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_answer_asked_again(self):
+        """Test that answers older than the TTL are not reused."""
+        handler = _handler("npm start", "node server.js", cache_ttl=0)
+
+        assert await handler._ask_gemini_start_command("nodejs") == "npm start"
+        assert await handler._ask_gemini_start_command("nodejs") == "node server.js"
+
+    @pytest.mark.asyncio
+    async def test_expired_answers_pruned_on_save(self, tmp_path):
+        """Test that expired answers are dropped from memory and the cache file."""
+        cache_file = tmp_path / "answers.json"
+        handler = _handler("8000", "9000", cache_ttl=0, cache_file=cache_file)
+
+        await handler._ask_gemini_port(["app.run()"])
+        await handler._ask_gemini_port(["server.start()"])
+
+        assert len(handler._answers) == 1
+        assert len(json.loads(cache_file.read_text())) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_answers_pruned_on_load(self, tmp_path):
+        """Test that expired answers in the cache file are not loaded."""
+        cache_file = tmp_path / "answers.json"
+        cache_file.write_text(json.dumps({"old": {"expires": 0, "value": 1}}))
+        handler = _handler("8000", cache_file=cache_file)
+
+        await handler._ask_gemini_port(["app.run()"])
+
+        assert "old" not in handler._answers
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache(self):
+        """Test that every call reaches Gemini when caching is off."""
+        handler = _handler("8000", "8000", cache_enabled=False)
+
+        await handler._ask_gemini_port(["app.run()"])
+        await handler._ask_gemini_port(["app.run()"])
+        assert handler.gemini.generate.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_prompts_share_fixed_prefix(self):
+        """Test that the fixed instructions come before the code in each prompt."""
+        handler = _handler("8000", "9000")
+
+        await handler._ask_gemini_port(["app.run()"])
+        await handler._ask_gemini_port(["server.start()"])
+
+        first, second = (c.args[0] for c in handler.gemini.generate.await_args_list)
+        prefix = first.split("Code:")[0]
+        assert "Return ONLY the port number" in prefix
+        assert second.startswith(prefix)
+
+    @pytest.mark.asyncio
+    async def test_answers_persist_across_handlers(self, tmp_path):
+        """Test that answers saved to the cache file are reused by a new handler."""
+        cache_file = tmp_path / "cache" / "answers.json"
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "main.go").write_text("package main")
+        first = _handler('{"type": "go", "confidence": 0.9}', cache_file=cache_file)
+        assert (await first._ask_gemini_project_type(project))["type"] == "go"
+
+        second = _handler(cache_file=cache_file)
+        assert (await second._ask_gemini_project_type(project))["type"] == "go"
+        assert second.gemini.generate.await_count == 0
+
+
+class TestBatchResolve:
+    """Test resolving project type, port and start command together."""
+
+    @pytest.mark.asyncio
+    async def test_heuristics_need_no_ai(self, tmp_path):
+        """Test that nothing is asked when heuristics answer everything."""
+        handler = _handler()
+
+        results = await handler.batch_resolve(
+            tmp_path, {".py": 10}, framework="fastapi", entry_point="main"
+        )
+
+        assert results["project_type"].value == "python"
+        assert results["port"].value == 8000
+        assert results["start_command"].value.startswith("uvicorn main:app")
+        handler.gemini.generate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_open_questions_asked_once(self, tmp_path):
+        """Test that every open question goes into a single request."""
+        (tmp_path / "main.go").write_text("package main")
+        handler = _handler(
+            '{"project_type": "Go", "port": "9090", "start_command": "./server"}'
+        )
+
+        results = await handler.batch_resolve(
+            tmp_path, {}, code_samples=["http.ListenAndServe(addr, nil)"]
+        )
+
+        assert handler.gemini.generate.await_count == 1
+        prompt = handler.gemini.generate.await_args.args[0]
+        assert "## project_type" in prompt
+        assert "## port" in prompt
+        assert "## start_command" in prompt
+        assert results["project_type"].value == "go"
+        assert results["port"].value == 9090
+        assert results["start_command"].value == "./server"
+        assert all(
+            r.strategy_used == ResolutionStrategy.AI_ANALYSIS for r in results.values()
+        )
+
+    @pytest.mark.asyncio
+    async def test_only_unresolved_questions_asked(self, tmp_path):
+        """Test that questions answered by heuristics are left out."""
+        handler = _handler('{"start_command": "python -m app"}')
+
+        results = await handler.batch_resolve(
+            tmp_path, {".py": 3}, code_samples=["app.run(port=5000)"]
+        )
+
+        prompt = handler.gemini.generate.await_args.args[0]
+        assert "## start_command" in prompt
+        assert "## project_type" not in prompt
+        assert "## port" not in prompt
+        assert results["port"].value == 5000
+        assert results["start_command"].value == "python -m app"
+
+    @pytest.mark.asyncio
+    async def test_failed_ai_falls_back_to_defaults(self, tmp_path):
+        """Test that defaults are used when the AI request fails."""
+        handler = _handler(RuntimeError("quota exceeded"))
+
+        results = await handler.batch_resolve(tmp_path, {})
+
+        assert results["project_type"].resolved is False
+        assert results["port"].value == 8080
+        assert results["start_command"].strategy_used == ResolutionStrategy.DEFAULT_FALLBACK
+
+
+class TestFileListing:
+    """Test the file list sent with project type questions."""
+
+    @pytest.mark.asyncio
+    async def test_listing_capped_at_files(self, tmp_path):
+        """Test that directories don't count towards the file limit."""
+        for i in range(60):
+            sub = tmp_path / f"pkg{i:02d}"
+            sub.mkdir()
+            (sub / f"mod{i:02d}.py").write_text("")
+        handler = _handler('{"type": "python"}')
+
+        await handler._ask_gemini_project_type(tmp_path)
+
+        prompt = handler.gemini.generate.await_args.args[0]
+        listed = prompt.split("Files:\n", 1)[1].splitlines()
+        assert len(listed) == 50
+        assert all(name.endswith(".py") for name in listed)
+
+
+class TestReplyParsing:
+    """Test reading JSON answers out of Gemini replies."""
+
+    @pytest.mark.parametrize("reply", [
+        '{"type": "go", "confidence": 0.8}',
+        '```json\n{"type": "go", "confidence": 0.8}\n```',
+        'Here is the analysis:\n{"type": "go", "confidence": 0.8}\nHope this helps.',
+        '{"type": "go", "confidence": 0.8,',
+    ])
+    def test_project_type_reply_recovered(self, reply):
+        """Test that fenced, chatty and truncated replies still parse."""
+        assert _parse_project_type(reply)["type"] == "go"
+
+    def test_reply_without_type_rejected(self):
+        """Test that JSON missing the answer isn't used."""
+        assert _parse_project_type('{"confidence": 0.2}') is None
+        assert _parse_project_type("I can't tell from these files.") is None
+
+
+class TestSpeculativePort:
+    """Test asking for the port while the code is still being scanned."""
+
+    @pytest.mark.asyncio
+    async def test_off_by_default(self, tmp_path):
+        """Test that no AI request is made when the scan finds a port."""
+        handler = _handler("9000")
+
+        result = await handler.resolve_port(tmp_path, code_samples=["app.listen(3000)"])
+
+        assert result.value == 3000
+        handler.gemini.generate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_scan_result_preferred(self, tmp_path):
+        """Test that a port found in code wins over the speculative answer."""
+        handler = _handler("9000", speculative_ai=True)
+
+        result = await handler.resolve_port(tmp_path, code_samples=["app.listen(3000)"])
+
+        assert result.value == 3000
+        assert result.strategy_used == ResolutionStrategy.HEURISTIC
+
+    @pytest.mark.asyncio
+    async def test_ai_answer_used_when_scan_misses(self, tmp_path):
+        """Test that the speculative request answers when the scan finds nothing."""
+        handler = _handler("9000", speculative_ai=True)
+
+        result = await handler.resolve_port(tmp_path, code_samples=["serve(cfg)"])
+
+        assert result.value == 9000
+        assert result.strategy_used == ResolutionStrategy.AI_ANALYSIS
+        assert handler.gemini.generate.await_count == 1
+
+
+class TestPromptExcerpts:
+    """Test trimming code and package files before they are sent."""
+
+    def test_duplicate_samples_sent_once(self):
+        """Test that repeated samples don't use up the sample limit."""
+        excerpt = _port_code_excerpt(["a()", "a()", "b()", "a()", "c()", "d()"])
+
+        assert excerpt.split("\n\n") == ["a()", "b()", "c()"]
+
+    def test_long_sample_centred_on_port(self):
+        """Test that long samples keep the text around the port setting."""
+        code = "x = 1\n" * 1000 + "app.listen(4000)\n" + "y = 2\n" * 1000
+
+        excerpt = _port_code_excerpt([code])
+
+        assert len(excerpt) == PORT_PROMPT_SAMPLE_CHARS
+        assert "app.listen(4000)" in excerpt
+
+    def test_window_skips_import_lines(self):
+        """Test that words like import/support don't anchor the window."""
+        code = (
+            "from flask import Flask\nimport os  # support for export\n"
+            + "def view():\n    return 'ok'\n" * 300
+            + "app.run(port=5123)\n"
+        )
+
+        excerpt = _port_code_excerpt([code])
+
+        assert len(code) > 8000
+        assert "app.run(port=5123)" in excerpt
+
+    def test_window_falls_back_to_port_mention(self):
+        """Test that a port read from config still anchors the window."""
+        code = "x = 1\n" * 1000 + "port = int(os.environ['PORT'])\n" + "y = 2\n" * 1000
+
+        assert "os.environ['PORT']" in _port_code_excerpt([code])
+
+    def test_package_json_reduced_to_scripts(self):
+        """Test that only the entry point and scripts of package.json are kept."""
+        content = (
+            '{"name": "app", "description": "' + "x" * 600 + '", '
+            '"main": "server.js", "scripts": {"start": "node server.js"}}'
+        )
+
+        excerpt = _package_excerpt(content)
+
+        assert json.loads(excerpt) == {
+            "main": "server.js",
+            "scripts": {"start": "node server.js"},
+        }
+
+    def test_other_package_files_truncated(self):
+        """Test that non-JSON package files are cut to the size limit."""
+        assert _package_excerpt("flask\n" * 200) == ("flask\n" * 200)[:500]
+
+
+class TestFailures:
+    """Test how failed AI requests and malformed input are handled."""
+
+    @pytest.mark.asyncio
+    async def test_request_error_falls_back_to_default(self, tmp_path):
+        """Test that a failed request reaches resolve_port, which uses the default."""
+        handler = _handler(ConnectionError("reset"))
+
+        with pytest.raises(ConnectionError):
+            await handler._ask_gemini_port(["serve(cfg)"])
+
+        handler.gemini.generate.side_effect = ConnectionError("reset")
+        result = await handler.resolve_port(tmp_path, code_samples=["serve(cfg)"])
+        assert result.value == 8080
+        assert result.strategy_used == ResolutionStrategy.DEFAULT_FALLBACK
+
+    @pytest.mark.parametrize("content", ["not json", "[]", '{"scripts": "npm start"}'])
+    def test_malformed_package_json_ignored(self, content):
+        """Test that package files without a scripts object give no command."""
+        handler = _handler()
+
+        assert handler._extract_start_from_package("nodejs", content) is None